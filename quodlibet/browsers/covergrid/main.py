@@ -11,6 +11,7 @@
 
 
 import os
+from itertools import chain
 
 from gi.repository import GLib, Gtk, Gdk, Gio
 
@@ -44,7 +45,7 @@ from quodlibet.qltk.x import SymbolicIconImage
 from quodlibet.qltk.searchbar import SearchBarBox
 from quodlibet.qltk.menubutton import MenuButton
 from quodlibet.qltk import Icons
-from quodlibet.util import connect_destroy
+from quodlibet.util import connect_destroy, DeferredSignal
 from quodlibet.util import connect_obj
 from quodlibet.qltk import popup_menu_at_widget
 
@@ -154,6 +155,100 @@ class CoverGridContainer(ScrolledWindow):
         return True
 
 
+def _get_prefetch_range(top, bottom, row_height, per_line, rows):
+    """Returns the start and end index of the items in the rows between `top`
+    and `bottom` and `rows` more rows in both directions"""
+
+    first = max(0, int(top // row_height) - rows)
+    last = max(0, int(bottom // row_height) + rows)
+    return first * per_line, (last + 1) * per_line
+
+
+class CoverPrefetcher:
+    """Loads the covers of the album widgets in the visible part of a cover
+    grid and `rows` rows above and below it, and cancels loading the ones
+    which got scrolled out of that range.
+    """
+
+    def __init__(self, view, vadjustment, rows):
+        self._view = view
+        self._adjustment = vadjustment
+        self.rows = rows
+        self._loading = {}
+        """(Gio.Cancellable, album, cover size) by widget"""
+
+        self.queue_update = DeferredSignal(
+            lambda *args: self.update(), timeout=50,
+            priority=GLib.PRIORITY_LOW)
+        self._sigs = [
+            vadjustment.connect("value-changed", self.queue_update),
+            vadjustment.connect("changed", self.queue_update),
+        ]
+
+    def destroy(self):
+        self.queue_update.abort()
+        for sig in self._sigs:
+            self._adjustment.disconnect(sig)
+        self._sigs = []
+        for widget in list(self._loading):
+            self.forget(widget)
+
+    def forget(self, widget):
+        """Cancels loading the cover of `widget`, so the next update loads
+        it again"""
+
+        entry = self._loading.pop(widget, None)
+        if entry is not None:
+            entry[0].cancel()
+
+    def _get_wanted(self):
+        """Returns the widgets in the visible range, followed by the ones
+        below and above it"""
+
+        view = self._view
+        first = view.get_child_at_index(0)
+        if first is None:
+            return []
+        alloc = first.get_allocation()
+        if alloc.width <= 1 or alloc.height <= 1:
+            return []
+        column_spacing = view.props.column_spacing
+        per_line = max(1, (view.get_allocated_width() + column_spacing)
+                       // (alloc.width + column_spacing))
+        row_height = alloc.height + view.props.row_spacing
+        top = self._adjustment.props.value - alloc.y
+        bottom = top + self._adjustment.props.page_size
+        start, end = _get_prefetch_range(top, bottom, row_height, per_line, 0)
+        before, after = _get_prefetch_range(
+            top, bottom, row_height, per_line, self.rows)
+        indices = chain(range(start, end), range(end, after),
+                        range(start - 1, before - 1, -1))
+
+        wanted = []
+        for index in indices:
+            child = view.get_child_at_index(index)
+            if child is not None:
+                wanted.append(child)
+        return wanted
+
+    def update(self):
+        wanted = self._get_wanted()
+        keep = set(wanted)
+        for widget in list(self._loading):
+            if widget not in keep:
+                self.forget(widget)
+
+        for widget in wanted:
+            state = (widget.model.album, widget.cover_pixel_size)
+            entry = self._loading.get(widget)
+            if entry is not None and entry[1:] == state:
+                continue
+            self.forget(widget)
+            cancel = Gio.Cancellable()
+            self._loading[widget] = (cancel, *state)
+            widget.load_cover(cancel)
+
+
 def _get_cover_size():
     mag = config.getfloat("browsers", "covergrid_magnification", 3.)
     size = config.getint("browsers", "cover_size")
@@ -240,8 +335,6 @@ class CoverGrid(Browser, util.InstanceTracker, DisplayPatternMixin):
         self._register_instance()
         self._init_model(library)
 
-        self.__cover_cancel = Gio.Cancellable()
-
         model_sort = AlbumListSortModel(model=self.__model)
         self.__model_filter = model_filter = AlbumListFilterModel(
             include_item_all=config.getboolean("browsers", "covergrid_all", True),
@@ -257,7 +350,7 @@ class CoverGrid(Browser, util.InstanceTracker, DisplayPatternMixin):
                 cover_size=cover_size,
                 padding=item_padding,
                 text_visible=text_visible,
-                cancelable=self.__cover_cancel)
+                prefetcher=self.__prefetcher)
             widget.connect("songs-menu", self.__popup)
             return widget
 
@@ -272,6 +365,9 @@ class CoverGrid(Browser, util.InstanceTracker, DisplayPatternMixin):
             column_spacing=config.getint("browsers", "column_spacing", 6))
 
         self.scrollwin = sw = CoverGridContainer(view)
+        self.__prefetcher = CoverPrefetcher(
+            view, sw.props.vadjustment,
+            config.getint("browsers", "covergrid_prefetch_rows", 2))
 
         view.connect("selected-children-changed",
             util.DeferredSignal(
@@ -345,7 +441,7 @@ class CoverGrid(Browser, util.InstanceTracker, DisplayPatternMixin):
         return False
 
     def __destroy(self, browser):
-        self.__cover_cancel.cancel()
+        self.__prefetcher.destroy()
 
         self.view.bind_model(None, lambda _: None)
         self.__model_filter.destroy()
@@ -365,6 +461,7 @@ class CoverGrid(Browser, util.InstanceTracker, DisplayPatternMixin):
                 continue
             match = songs & album.songs
             if match:
+                self.__prefetcher.forget(child)
                 child.populate()
                 songs -= match
 
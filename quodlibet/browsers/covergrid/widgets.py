@@ -28,7 +28,8 @@ class AlbumWidget(Gtk.FlowBoxChild):
     """An AlbumWidget displays an album with a cover and a label.
 
     The cover initially holds a placeholder. When the widget is drawn the real
-    cover loads and the label is shown.
+    cover loads and the label is shown. If a prefetcher is given, it loads the
+    cover instead.
     """
 
     __gsignals__ = {
@@ -43,11 +44,13 @@ class AlbumWidget(Gtk.FlowBoxChild):
     def __init__(self,
             model: AlbumListItem,
             cancelable: Gio.Cancellable | None = None,
+            prefetcher=None,
             **kwargs):
         super().__init__(has_tooltip=True, **kwargs)
 
         self.model = model
         self._cancelable = cancelable
+        self._prefetcher = prefetcher
         self.__draw_handler_id = None
 
         self._box = box = Gtk.Box(
@@ -103,6 +106,12 @@ class AlbumWidget(Gtk.FlowBoxChild):
     def __get_image_size(self) -> int:
         return self.props.cover_size + 2
 
+    @property
+    def cover_pixel_size(self) -> int:
+        """The size of the cover in device pixels"""
+
+        return self.props.scale_factor * self.props.cover_size
+
     def populate(self):
         self._populate_on_draw()
 
@@ -118,17 +127,21 @@ class AlbumWidget(Gtk.FlowBoxChild):
         self._populate()
 
     def _populate(self):
-        size = self.props.scale_factor * self.props.cover_size
-        self.model.load_cover(size, self._cancelable)
+        if self._prefetcher is not None:
+            self._prefetcher.queue_update()
+        else:
+            self.load_cover(self._cancelable)
         self.model.format_label(self.props.display_pattern)
 
+    def load_cover(self, cancelable: Gio.Cancellable | None = None):
+        self.model.load_cover(self.cover_pixel_size, cancelable)
+
     def _set_cover(self, cover: GdkPixbuf.Pixbuf | None = None):
         if cover:
             pb = add_border_widget(cover, self)
             surface = get_surface_for_pixbuf(self, pb)
         else:
-            size = self.props.scale_factor * self.props.cover_size
-            surface = _no_cover(size, self)
+            surface = _no_cover(self.cover_pixel_size, self)
         self._image.props.surface = surface
 
     def _set_text(self, label: str | None = None):
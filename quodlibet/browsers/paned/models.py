@@ -115,6 +115,9 @@ class PaneModel(ObjectStore):
         super().__init__()
         self.__sort_cache = {} # text to sort text cache
         self.__key_cache = {} # song to key cache
+        self.__song_entries = {} # song to the entries containing it
+        self.__iters = None # entry to iter, rebuilt if None
+        self.__emptied = set() # entries without songs still in the model
         self.config = pattern_config
 
     def get_format_keys(self, song):
@@ -125,6 +128,14 @@ class PaneModel(ObjectStore):
             self.__key_cache[song] = [v for v in self.config.format(song) if v[0]]
             return self.__key_cache[song]
 
+    def __fill_format_keys(self, songs):
+        missing = [s for s in songs if s not in self.__key_cache]
+        if not missing:
+            return
+        formatted = self.config.format_many(missing)
+        for song, values in zip(missing, formatted, strict=True):
+            self.__key_cache[song] = [v for v in values if v[0]]
+
     def __human_sort_key(self, text, reg=re.compile("<.*?>")):
         try:
             return self.__sort_cache[text], text
@@ -137,6 +148,30 @@ class PaneModel(ObjectStore):
             self.__sort_cache[text] = util.human_sort_key(text_stripped)
             return self.__sort_cache[text], text
 
+    def __get_iters(self):
+        if self.__iters is None:
+            self.__iters = {entry: iter_ for iter_, entry in self.iterrows()
+                            if not isinstance(entry, AllEntry)}
+        return self.__iters
+
+    def __add_row(self, entry, iter_):
+        if self.__iters is not None:
+            self.__iters[entry] = iter_
+
+    def __index_songs(self, entry, songs):
+        song_entries = self.__song_entries
+        for song in songs:
+            try:
+                song_entries[song].add(entry)
+            except KeyError:
+                song_entries[song] = {entry}
+
+    def clear(self):
+        super().clear()
+        self.__song_entries.clear()
+        self.__iters = None
+        self.__emptied.clear()
+
     def get_songs(self, paths):
         """Get all songs for the given paths (from a selection e.g.)"""
 
@@ -146,8 +181,7 @@ class PaneModel(ObjectStore):
 
         first_path = paths[0]
         if isinstance(self[first_path][0], AllEntry):
-            for entry in self.itervalues():
-                s.update(entry.songs)
+            s.update(self.__song_entries)
         else:
             for path in paths:
                 s.update(self[path][0].songs)
@@ -161,35 +195,40 @@ class PaneModel(ObjectStore):
         """Remove all songs from the entries.
 
         If remove_if_empty == True, entries with no songs will be removed.
+        Only the rows of entries containing any of the songs get updated.
         """
 
         songs = set(songs)
 
+        affected = set()
         for song in songs:
             if song in self.__key_cache:
                 del self.__key_cache[song]
+            affected.update(self.__song_entries.pop(song, ()))
 
-        to_remove = []
-        for iter_, entry in self.iterrows():
-            if isinstance(entry, AllEntry):
-                continue
+        iters = self.__get_iters()
+        for entry in affected:
             entry.songs -= songs
             entry.finalize()
+            iter_ = iters[entry]
             self.row_changed(self.get_path(iter_), iter_)
             if not entry.songs:
-                to_remove.append(iter_)
+                self.__emptied.add(entry)
 
         if not remove_if_empty:
             return
 
+        # entries emptied earlier might have gotten songs again since
+        to_remove = [e for e in self.__emptied if not e.songs]
+        self.__emptied.clear()
+
         # remove from cache and the model
-        for iter_ in to_remove:
+        for entry in to_remove:
             try:
-                key = self.get_value(iter_).key
-                del(self.__sort_cache[key])
+                del(self.__sort_cache[entry.key])
             except KeyError:
                 pass
-            self.remove(iter_)
+            self.remove(iters.pop(entry))
 
         if len(self) == 1 and isinstance(self[0][0], AllEntry):
             # only All is left.. clear everything
@@ -204,6 +243,8 @@ class PaneModel(ObjectStore):
         collection = {}
         unknown = UnknownEntry()
         human_sort = self.__human_sort_key
+        songs = list(songs)
+        self.__fill_format_keys(songs)
         for song in songs:
             items = self.get_format_keys(song)
             if not items:
@@ -229,12 +270,15 @@ class PaneModel(ObjectStore):
         if not len(self):
             if unknown.songs:
                 self.insert(0, [unknown])
+                self.__index_songs(unknown, unknown.songs)
             entries = []
             for _key, (val, _sort_key, _srtp) in items:
                 entries.append(val)
+                self.__index_songs(val, val.songs)
             self.insert_many(0, reversed(entries))
             if len(self) > 1:
                 self.insert(0, [AllEntry()])
+            self.__iters = None
             return
 
         # insert all new songs
@@ -254,10 +298,12 @@ class PaneModel(ObjectStore):
             if key == entry.key: # Display strings the same
                 entry.songs |= val.songs
                 entry.finalize()
+                self.__index_songs(entry, val.songs)
                 self.row_changed(self.get_path(iter_), iter_)
                 key = None
             elif sort_key < entry.sort:
-                self.insert_before(iter_, row=[val])
+                self.__add_row(val, self.insert_before(iter_, row=[val]))
+                self.__index_songs(val, val.songs)
                 key = None
 
         # the last one failed, add it again
@@ -269,10 +315,17 @@ class PaneModel(ObjectStore):
             entries = []
             for _key, (val, _srt, _srtp) in items:
                 entries.append(val)
-            if isinstance(self[-1][0], UnknownEntry):
-                self.insert_many(len(self) - 1, entries)
+                self.__index_songs(val, val.songs)
+            last_row = self[-1]
+            if isinstance(last_row[0], UnknownEntry):
+                for val in entries:
+                    self.__add_row(
+                        val, self.insert_before(last_row.iter, row=[val]))
             else:
-                self.append_many(entries)
+                for val, iter_ in zip(entries,
+                                      self.iter_append_many(entries),
+                                      strict=True):
+                    self.__add_row(val, iter_)
 
         # check if All needs to be inserted
         if len(self) > 1 and not isinstance(self[0][0], AllEntry):
@@ -285,9 +338,11 @@ class PaneModel(ObjectStore):
             if isinstance(entry, UnknownEntry):
                 entry.songs |= unknown.songs
                 entry.finalize()
+                self.__index_songs(entry, unknown.songs)
                 self.row_changed(last_row.path, last_row.iter)
             else:
-                self.append(row=[unknown])
+                self.__add_row(unknown, self.append(row=[unknown]))
+                self.__index_songs(unknown, unknown.songs)
 
     def matches(self, paths, song):
         """If the song is included in the selection defined by the paths.
@@ -302,6 +357,14 @@ class PaneModel(ObjectStore):
         if isinstance(self[paths[0]][0], AllEntry):
             return True
 
+        entries = self.__song_entries.get(song)
+        if entries is not None:
+            # the song is in the model, look for the entries containing it
+            for path in paths:
+                if self.get_value(self.get_iter(path)) in entries:
+                    return True
+            return False
+
         keys = self.get_format_keys(song)
 
         # empty key -> unknown
@@ -54,6 +54,7 @@ class PaneConfig:
                 pc = XMLFromPattern("")
             tags = pc.tags
             format = pc.format_list
+            format_many = pc.format_list_many
             has_markup = True
         else:
             title = util.tag(cat)
@@ -73,6 +74,10 @@ class PaneConfig:
                 def format(song: AudioFile) -> list[tuple[str, str]]:
                     return song.list_separate(cat)
 
+            def format_many(songs: list[AudioFile]
+                            ) -> list[list[tuple[str, str]]]:
+                return [format(song) for song in songs]
+
         if is_pattern(disp):
             try:
                 pd = XMLFromPattern(disp)
@@ -90,6 +95,7 @@ class PaneConfig:
         self.title = title
         self.tags = set(tags)
         self.format = format
+        self.format_many = format_many
         self.format_display = format_display
         self.has_markup = has_markup
 
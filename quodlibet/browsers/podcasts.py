@@ -10,6 +10,8 @@ import os
 import sys
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
 from urllib.request import urlopen, Request
 
 from gi.repository import Gtk, GLib, Pango, Gdk
@@ -50,6 +52,13 @@ class InvalidFeedError(ValueError):
 
 
 class Feed(list):
+
+    etag = None
+    """ETag header of the last download, to only download changes"""
+
+    last_modified = None
+    """Last-Modified header of the last download"""
+
     def __init__(self, uri):
         self.name = _("Unknown")
         self.uri = uri
@@ -140,31 +149,85 @@ class Feed(list):
                 if value and value not in af.list("genre"):
                     af.add("genre", value)
 
-    def parse(self):
-        req = Request(self.uri, method="HEAD")
+    def download(self, conditional=True):
+        """Returns the content of the feed and its ETag and Last-Modified
+        headers (or None), or None if it didn't change since the last
+        download (with `conditional`).
+
+        Raises OSError or InvalidFeedError.
+        """
+
+        req = Request(self.uri)
+        if conditional:
+            if self.etag:
+                req.add_header("If-None-Match", self.etag)
+            if self.last_modified:
+                req.add_header("If-Modified-Since", self.last_modified)
         try:
-            with urlopen(req, timeout=5) as head:
-                # Some requests don't support status, e.g. file://
-                if hasattr(head, "status"):
-                    print_d(f"Feed URL {self.uri!r} ({head.url}) "
-                            f"returned HTTP {head.status}, "
-                            f"with content {head.headers.get('Content-Type')}")
-                    if head.status and head.status >= 400:
-                        return False
-                if head.headers.get("Content-Type").lower().startswith("audio"):
-                    print_w("Looks like an audio stream / radio, not a audio feed.")
-                    return False
             # Don't pass feedparser URLs
             # see https://github.com/kurtmckee/feedparser/pull/80#issuecomment-449543486
-            content = urlopen(self.uri, timeout=15).read()
+            with urlopen(req, timeout=15) as response:
+                # Some requests don't support status, e.g. file://
+                if hasattr(response, "status"):
+                    print_d(f"Feed URL {self.uri!r} ({response.url}) "
+                            f"returned HTTP {response.status}, with content "
+                            f"{response.headers.get('Content-Type')}")
+                content_type = response.headers.get("Content-Type") or ""
+                if content_type.lower().startswith("audio"):
+                    # Don't read the body, it might be a never ending stream
+                    raise InvalidFeedError(
+                        "Looks like an audio stream / radio, "
+                        "not a audio feed.")
+                return (response.read(), response.headers.get("ETag"),
+                        response.headers.get("Last-Modified"))
+        except HTTPError as e:
+            if e.code == 304:
+                print_d(f"Feed {self.uri!r} not modified")
+                return None
+            raise
+
+    @staticmethod
+    def read(content):
+        """Returns the feedparser document for the downloaded `content`.
+        Doesn't change the feed, so can be called from any thread.
+
+        Raises InvalidFeedError.
+        """
+
+        try:
+            return feedparser.parse(content)
+        except Exception as e:
+            raise InvalidFeedError(f"Couldn't parse feed: {e}") from e
+
+    def not_modified(self):
+        """Records a download that found the feed unchanged"""
+
+        self.__lastgot = time.time()
+
+    def parse(self, conditional=True):
+        """Downloads and reads the feed, returns whether there are new
+        episodes"""
+
+        try:
+            downloaded = self.download(conditional)
+            if downloaded is None:
+                self.not_modified()
+                return False
+            content, etag, last_modified = downloaded
+            doc = self.read(content)
         except OSError as e:
             print_w(f"Couldn't fetch content from {self.uri} ({e})")
             return False
-        try:
-            doc = feedparser.parse(content)
-        except Exception as e:
-            print_w(f"Couldn't parse feed: {self.uri} ({e})")
+        except InvalidFeedError as e:
+            print_w(f"{self.uri}: {e}")
             return False
+        return self.update(doc, etag, last_modified)
+
+    def update(self, doc, etag=None, last_modified=None):
+        """Updates the episodes from a feedparser document, and remembers
+        the headers of its download for the next one. Returns whether there
+        are new episodes.
+        """
 
         try:
             album = doc.channel.title
@@ -230,9 +293,78 @@ class Feed(list):
                 else:
                     self.insert(0, song)
         self.__lastgot = time.time()
+        self.etag = etag
+        self.last_modified = last_modified
         return bool(uris)
 
 
+class FeedRefresher:
+    """Downloads and reads feeds in up to `max_connections` threads, then
+    updates all of them at once in the main loop.
+
+    Feeds are only downloaded if they changed since their last download.
+    """
+
+    def __init__(self, max_connections=8):
+        self.max_connections = max_connections
+
+    def refresh(self, feeds, callback, rebuild=False):
+        """Refreshes `feeds` in the background and calls `callback` with
+        the feeds that got new episodes. With `rebuild` all episodes get
+        replaced, whether the feeds changed or not.
+        """
+
+        feeds = list(feeds)
+        thread = threading.Thread(
+            target=self.__download, args=(feeds, callback, rebuild),
+            daemon=True)
+        thread.start()
+        return thread
+
+    def __download(self, feeds, callback, rebuild):
+
+        def fetch(feed):
+            try:
+                downloaded = feed.download(conditional=not rebuild)
+                if downloaded is None:
+                    return feed, None
+                content, etag, last_modified = downloaded
+                return feed, (feed.read(content), etag, last_modified)
+            except OSError as e:
+                print_w(f"Couldn't fetch content from {feed.uri} ({e})")
+            except InvalidFeedError as e:
+                print_w(f"{feed.uri}: {e}")
+            except Exception as e:
+                # e.g. IncompleteRead or a malformed URI, don't let one
+                # feed lose the results of the others
+                print_w(f"Couldn't refresh {feed.uri} ({e!r})")
+            return None
+
+        results = []
+        try:
+            with ThreadPoolExecutor(max(1, self.max_connections)) as pool:
+                for result in pool.map(fetch, feeds):
+                    if result is not None:
+                        results.append(result)
+        finally:
+            GLib.idle_add(self.__update, results, callback, rebuild)
+
+    def __update(self, results, callback, rebuild):
+        changed = []
+        for feed, result in results:
+            if result is None:
+                feed.not_modified()
+                continue
+            if rebuild:
+                feed.clear()
+            if feed.update(*result):
+                changed.append(feed)
+        print_d(f"Refreshed {len(results)} feed(s), "
+                f"{len(changed)} with new episodes")
+        callback(changed)
+        return False
+
+
 class AddFeedDialog(GetStringDialog):
     def __init__(self, parent):
         super().__init__(
@@ -302,6 +434,8 @@ class Podcasts(Browser):
     """
     __feeds = Gtk.ListStore(object)  # unread
 
+    refresher = FeedRefresher()
+
     headers = ("title artist performer ~people album date website language "
                "copyright organization license contact").split()
 
@@ -374,19 +508,13 @@ class Podcasts(Browser):
 
     @classmethod
     def __do_check(cls):
-        thread = threading.Thread(target=cls.__check, args=(), daemon=True)
-        thread.start()
+        feeds = [row[0] for row in cls.__feeds
+                 if row[0].get_age() >= 2 * 60 * 60]
+        cls.refresher.refresh(feeds, cls.__checked)
 
     @classmethod
-    def __check(cls):
-        for row in cls.__feeds:
-            feed = row[0]
-            if feed.get_age() < 2 * 60 * 60:
-                continue
-            elif feed.parse():
-                feed.changed = True
-                row[0] = feed
-        cls.write()
+    def __checked(cls, changed):
+        cls.changed(changed)
         GLib.timeout_add(60 * 60 * 1000, cls.__do_check)
 
     def __init__(self, library):
@@ -502,14 +630,10 @@ class Podcasts(Browser):
         Podcasts.write()
 
     def __refresh(self, feeds):
-        changed = list(filter(Feed.parse, feeds))
-        Podcasts.changed(changed)
+        Podcasts.refresher.refresh(feeds, Podcasts.changed)
 
     def __rebuild(self, feeds):
-        for feed in feeds:
-            feed.clear()
-        changed = list(filter(Feed.parse, feeds))
-        Podcasts.changed(changed)
+        Podcasts.refresher.refresh(feeds, Podcasts.changed, rebuild=True)
 
     def __remove_paths(self, model, paths):
         for path in paths:
@@ -149,6 +149,10 @@ def process_arguments(argv):
             _("location")),
         ("with-pattern", _("Set template for --print-* commands"),
             _("pattern")),
+        ("query-offset", _("Skip this many results of --print-query"),
+            "N"),
+        ("query-limit", _("Print at most this many results of --print-query"),
+            "N"),
             ]:
         options.add(opt, help=help, arg=arg)
 
@@ -266,8 +270,17 @@ def process_arguments(argv):
             except IndexError:
                 queue("print-playing", opts.get("with-pattern"))
         elif command == "print-query":
-            pattern = opts.get("with-pattern")
-            queue(command, json.dumps({"query": arg, "pattern": pattern}))
+            query_args = {"query": arg, "pattern": opts.get("with-pattern")}
+            for name in ["offset", "limit"]:
+                value = opts.get("query-" + name)
+                if value is None:
+                    continue
+                if not value.isdigit():
+                    print_e(_("Invalid argument for '%s'.") % ("query-" + name))
+                    print_e(_("Try %s --help.") % fsn2text(argv[0]))
+                    exit_(True, notify_startup=True)
+                query_args[name] = int(value)
+            queue(command, json.dumps(query_args))
         elif command == "print-query-text":
             queue(command)
         elif command == "start-playing":
@@ -26,6 +26,7 @@ from quodlibet.util.library import scan_library
 from quodlibet.order.repeat import RepeatListForever, RepeatSongForever, OneSong
 from quodlibet.order.reorder import OrderWeighted, OrderShuffle
 from quodlibet.pattern import Pattern
+from quodlibet.query import Query
 
 from quodlibet.config import RATINGS
 
@@ -39,24 +40,31 @@ class CommandRegistry:
 
     def __init__(self):
         self._commands = {}
+        self._streaming = set()
 
-    def register(self, name, args=0, optional=0):
+    def register(self, name, args=0, optional=0, stream=False):
         """Register a new command function
 
         The functions gets zero or more arguments as `fsnative`
         and should return `None` or `fsnative`. In case an error
         occurred the command should raise `CommandError`.
 
+        Streaming commands instead return an iterator of `fsnative` chunks,
+        which get sent one main loop iteration at a time.
+
         Args:
             name (str): the command name
             args (int): amount of required arguments
             optional (int): amount of additional optional arguments
+            stream (bool): if the command returns an iterator of chunks
         Returns:
             Callable
         """
 
         def wrap(func):
             self._commands[name] = (func, args, optional)
+            if stream:
+                self._streaming.add(name)
             return func
 
         return wrap
@@ -70,7 +78,7 @@ class CommandRegistry:
             app (Application)
             line (fsnative)
         Returns:
-            fsnative or None
+            fsnative, an iterator of fsnative for streaming commands, or None
         """
 
         assert isinstance(line, fsnative)
@@ -112,11 +120,20 @@ class CommandRegistry:
         except CommandError as e:
             raise CommandError(f"{name}: {str(e)}") from e
         else:
+            if name in self._streaming:
+                return self._check_chunks(name, result)
             if result is not None and not isinstance(result, fsnative):
                 raise CommandError(
                     f"{name}: returned {result!r} which is not fsnative")
             return result
 
+    def _check_chunks(self, name, chunks):
+        for chunk in chunks:
+            if not isinstance(chunk, fsnative):
+                raise CommandError(
+                    f"{name}: returned {chunk!r} which is not fsnative")
+            yield chunk
+
 
 def arg2text(arg):
     """Like fsn2text but is strict by default and raises CommandError"""
@@ -534,27 +551,114 @@ def _refresh(app):
     scan_library(app.library, False)
 
 
-@registry.register("print-query", args=1)
-def _print_query(app, json_encoded_args):
-    """Queries library, dumping filenames of matches to stdout
-    See Issue 716
+QUERY_CHUNK_SIZE = 500
+"""How many songs streamed queries search per main loop iteration"""
+
+
+def _parse_query_args(json_encoded_args):
+    """Returns the query, pattern, offset and limit of the arguments of
+    the query printing commands, or None if they are invalid.
     """
 
     try:
         args = json.loads(arg2text(json_encoded_args))
         query = args["query"]
         fstring = args["pattern"]
-    except (json.decoder.JSONDecodeError, KeyError, TypeError):
+        offset = args.get("offset", 0)
+        limit = args.get("limit")
+    except (json.decoder.JSONDecodeError, KeyError, TypeError, AttributeError):
         # backward compatibility
         query = arg2text(json_encoded_args)
-        fstring = None
+        fstring = limit = None
+        offset = 0
     if (not isinstance(query, str)
         or (fstring is not None and not isinstance(fstring, str))):
         # This should not happen
-        return "\n"
+        return None
+    for value in [offset, limit]:
+        if value is not None and (
+                isinstance(value, bool) or not isinstance(value, int)
+                or value < 0):
+            return None
+    return query, fstring, offset, limit
+
+
+def _filter_chunks(library, text):
+    """Yields lists of the songs in the library matching the query `text`,
+    searching `QUERY_CHUNK_SIZE` songs at a time. Lists can be empty."""
+
+    query = Query(text)
+    songs = library.values()
+    index = getattr(library, "tag_index", None)
+    if index is not None:
+        candidates = query.candidates(index)
+        if candidates is not None:
+            songs = index.ordered(candidates)
+    songs = list(songs)
+    size = QUERY_CHUNK_SIZE
+    for start in range(0, len(songs), size):
+        yield query.filter(songs[start:start + size])
+
+
+def _query_chunks(library, text, pattern, offset=0, limit=None):
+    """Yields the lines of the matching songs formatted by `pattern`, a
+    chunk of songs at a time, skipping the first `offset` songs and stopping
+    after `limit` songs.
+    """
+
+    for songs in _filter_chunks(library, text):
+        if offset:
+            skipped = min(offset, len(songs))
+            songs = songs[skipped:]
+            offset -= skipped
+        if limit is not None:
+            songs = songs[:limit]
+            limit -= len(songs)
+        yield "".join([text2fsn(pattern.format(song) + "\n")
+                       for song in songs])
+        if limit == 0:
+            break
+
+
+def _or_newline(chunks):
+    """Yields `chunks`, or a single newline if they are all empty"""
+
+    empty = True
+    for chunk in chunks:
+        empty = empty and not chunk
+        yield chunk
+    if empty:
+        yield text2fsn("\n")
+
+
+@registry.register("print-query", args=1, stream=True)
+def _print_query(app, json_encoded_args):
+    """Queries library, dumping filenames of matches to stdout.
+    Like stream-query, but always responds with at least a newline.
+    See Issue 716
+    """
+
+    args = _parse_query_args(json_encoded_args)
+    if args is None:
+        return _or_newline([])
+    query, fstring, offset, limit = args
+    pattern = make_pattern(fstring, "<~filename>")
+    return _or_newline(
+        _query_chunks(app.library, query, pattern, offset, limit))
+
+
+@registry.register("stream-query", args=1, stream=True)
+def _stream_query(app, json_encoded_args):
+    """Like print-query, but sends the matches while the library
+    is still being searched
+    """
+
+    args = _parse_query_args(json_encoded_args)
+    if args is None:
+        raise CommandError("invalid arguments")
+    query, fstring, offset, limit = args
     pattern = make_pattern(fstring, "<~filename>")
-    songs = app.library.query(query)
-    return "\n".join([text2fsn(pattern.format(song)) for song in songs]) + "\n"
+    return _query_chunks(app.library, query, pattern, offset, limit)
 
 
 @registry.register("print-query-text")
@@ -59,7 +59,61 @@ INITIAL: dict[str, dict[str, str]] = {
         "refresh_on_start": "true",
 
         # Watch all library files / directories for changes
-        "watch": "false"
+        "watch": "false",
+
+        # Milliseconds to collect file changes for before handling them
+        # all at once
+        "watch_delay": "500",
+
+        # Maximum number of directories to watch, any others get checked
+        # for changes every "watch_poll_interval" seconds (0 for no limit)
+        "max_watches": "8192",
+        "watch_poll_interval": "60",
+
+        # Save library changes to an append-only journal instead of
+        # rewriting the whole library file every time
+        "journal": "true",
+
+        # Save the library in an indexed format which loads songs only
+        # once they are used (older versions can't read it)
+        "lazy_load": "false",
+
+        # Share tag names and common tag values (artist, album, ...)
+        # between songs to save memory
+        "intern_tags": "true",
+
+        # Merge library signals (added, changed, removed) and emit them
+        # once the main loop is idle. Views kept up to date by the signals,
+        # like the album library, are out of date until then.
+        "batch_signals": "false",
+
+        # Number of workers loading new files while scanning
+        # (0 loads them one by one in the main loop)
+        "scan_workers": "0",
+
+        # Use processes instead of threads for the scan workers
+        "scan_processes": "false",
+
+        # When refreshing, skip directories whose modification time is
+        # unchanged since the last refresh (misses files modified in place)
+        "quick_refresh": "false",
+
+        # Keep an index of the words in tags searched for, so searching
+        # doesn't have to look at every song
+        "tag_index": "true",
+
+        # Cache the sort keys of tag values, so sorting song lists by
+        # a column doesn't have to recompute them every time
+        "sort_keys": "true",
+
+        # Without the tag index, cache case and diacritic insensitive
+        # versions of tag values, so searching for plain text doesn't
+        # need a regex for every song
+        "folded_text": "true",
+
+        # Keep the formatted pattern columns and browser pane keys of this
+        # many songs until they change (0 to disable)
+        "format_cache": "10000",
     },
 
     # State about the player, to restore on startup
@@ -185,6 +239,10 @@ INITIAL: dict[str, dict[str, str]] = {
         # show "all albums" in covergrid view
         "covergrid_all": "1",
 
+        # How many rows of covers to load above and below the visible ones
+        # in covergrid view
+        "covergrid_prefetch_rows": "2",
+
         # Template to build the track title when title tag is missing
         "missing_title_template": "<~basename> [untitled <~format>]",
     },
@@ -328,6 +386,14 @@ INITIAL: dict[str, dict[str, str]] = {
         "force_filename": "false",
         "filename": "folder.jpg",
         "search_filenames": "cover.jpg,folder.jpg,.folder.jpg",
+
+        # How many found (or missing) covers of album directories to
+        # remember between runs (0 disables the cache)
+        "cache_size": "10000",
+
+        # How many MiB of scaled covers to keep in memory for the album
+        # browsers (0 disables the cache)
+        "memory_cache_size": "64",
     },
 
     "display": {
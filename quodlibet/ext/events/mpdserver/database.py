@@ -0,0 +1,270 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""Indexes of the library for the MPD database commands"""
+
+import os
+
+from quodlibet.util import print_d
+
+
+ANY = "any"
+"""Filter key matching any of the indexed tags or the file name"""
+
+BASE = "base"
+"""Filter key matching songs below a directory"""
+
+
+def dir_uri(song):
+    """The path MPD clients see for the directory of `song`"""
+
+    return os.path.dirname(song["~filename"]).strip(os.sep)
+
+
+class MPDDatabase:
+    """Keeps indexes of the songs in a library by tag value and by
+    directory, up to date through the library's signals.
+
+    Tag indexes get built the first time a tag is used. `tags` are the
+    tags searched for the `ANY` filter key.
+    """
+
+    def __init__(self, library, tags):
+        self._library = library
+        self._any = list(tags) + ["~filename"]
+        self._tags: dict[str, dict[str, set]] = {}
+        """Songs by value by tag"""
+        self._song_values: dict[str, dict] = {}
+        """Values by song by tag, to remove changed songs"""
+        self._sorted: dict[str, list[str]] = {}
+        self._lists: dict[tuple, list] = {}
+        self._dirs: dict[str, tuple[set[str], list]] | None = None
+        """Sub directories and songs by directory"""
+        self._dir_of: dict = {}
+        """Directory by song, for the songs in `_dirs`"""
+        self._sigs = [
+            library.connect("added", self.__added),
+            library.connect("changed", self.__changed),
+            library.connect("removed", self.__removed),
+        ]
+
+    def destroy(self):
+        for sig in self._sigs:
+            self._library.disconnect(sig)
+        self._sigs = []
+        self.__reset()
+
+    def __reset(self):
+        self._tags.clear()
+        self._song_values.clear()
+        self._dir_of = {}
+        self.__outdated()
+
+    def __outdated(self, moved=True):
+        self._sorted.clear()
+        self._lists.clear()
+        if moved:
+            self._dirs = None
+
+    def __add(self, songs):
+        for key in self._tags:
+            self.__add_tag(key, songs)
+
+    def __add_tag(self, key, songs):
+        index = self._tags[key]
+        song_values = self._song_values[key]
+        internal = key.startswith("~")
+        for song in songs:
+            if internal:
+                values = song.list(key)
+            else:
+                # Faster than list() for plain tags
+                value = song.get(key)
+                values = value.split("\n") if value else []
+            song_values[song] = values
+            for value in values:
+                entry = index.get(value)
+                if entry is None:
+                    index[value] = {song}
+                else:
+                    entry.add(song)
+
+    def __remove(self, songs):
+        for key, index in self._tags.items():
+            song_values = self._song_values[key]
+            for song in songs:
+                for value in song_values.pop(song, ()):
+                    entry = index.get(value)
+                    if entry is not None:
+                        entry.discard(song)
+                        if not entry:
+                            del index[value]
+
+    def __added(self, library, songs):
+        self.__add(songs)
+        self.__outdated()
+
+    def __changed(self, library, songs):
+        self.__remove(songs)
+        self.__add([s for s in songs if s in library])
+        # Most changes are of tags, keep the directories then
+        dir_of = self._dir_of
+        moved = any(dir_of.get(song) != dir_uri(song) for song in songs)
+        self.__outdated(moved)
+
+    def __removed(self, library, songs):
+        self.__remove(songs)
+        self.__outdated()
+
+    def index(self, key: str) -> dict[str, set]:
+        """Returns the songs by value of tag `key`"""
+
+        index = self._tags.get(key)
+        if index is None:
+            index = self._tags[key] = {}
+            self._song_values[key] = {}
+            self.__add_tag(key, self._library.values())
+            print_d(f"Indexed {len(index)} values of {key!r}")
+        return index
+
+    def song_values(self, key: str) -> dict:
+        """Returns the values of tag `key` by song"""
+
+        self.index(key)
+        return self._song_values[key]
+
+    def values(self, key: str) -> list[str]:
+        """Returns the sorted values of tag `key`"""
+
+        values = self._sorted.get(key)
+        if values is None:
+            values = self._sorted[key] = sorted(self.index(key))
+        return values
+
+    def __matching(self, key, value, exact):
+        if key == BASE:
+            return set(self.songs_below(value))
+        if key == ANY:
+            songs = set()
+            for any_key in self._any:
+                songs |= self.__matching(any_key, value, exact)
+            return songs
+        index = self.index(key)
+        if exact:
+            return set(index.get(value, ()))
+        value = value.lower()
+        songs = set()
+        for text, entry in index.items():
+            if value in text.lower():
+                songs |= entry
+        return songs
+
+    def filter(self, filters, exact=True) -> set | None:
+        """Returns the songs matching all (key, value) `filters`, exactly or
+        containing the values ignoring case, or None without filters.
+        """
+
+        songs = None
+        # Start with the most selective filters
+        for key, value in sorted(filters, key=lambda f: f[0] in (ANY, BASE)):
+            found = self.__matching(key, value, exact)
+            songs = found if songs is None else songs & found
+            if not songs:
+                break
+        return songs
+
+    def find(self, filters, exact=True) -> list:
+        """Returns the songs matching `filters` (see `filter`) sorted by
+        file name"""
+
+        songs = self.filter(filters, exact)
+        if songs is None:
+            songs = self._library.values()
+        return sorted(songs, key=lambda s: s["~filename"])
+
+    def list_values(self, key, filters=(), group=None) -> list[tuple[str, str]]:
+        """Returns the sorted (group value, value) pairs of tag `key` for
+        songs matching `filters`, with `group` the other tag of each pair.
+        Without `group` the group values are empty.
+        """
+
+        cache_key = (key, tuple(filters), group)
+        pairs = self._lists.get(cache_key)
+        if pairs is not None:
+            return pairs
+
+        songs = self.filter(filters)
+        if group is None and songs is None:
+            pairs = [("", value) for value in self.values(key)]
+        else:
+            song_values = self._song_values
+            self.index(key)
+            if group is not None:
+                self.index(group)
+            found = set()
+            for song in (self._library.values() if songs is None else songs):
+                groups = song_values[group].get(song) if group else None
+                for value in song_values[key].get(song, ()):
+                    for group_value in groups or [""]:
+                        found.add((group_value, value))
+            pairs = sorted(found)
+        self._lists[cache_key] = pairs
+        return pairs
+
+    def __get_dirs(self):
+        if self._dirs is None:
+            dirs: dict[str, tuple[set[str], list]] = {"": (set(), [])}
+            dir_of = self._dir_of = {}
+            for song in self._library.values():
+                path = dir_of[song] = dir_uri(song)
+                entry = dirs.get(path)
+                if entry is None:
+                    entry = dirs[path] = (set(), [])
+                    # Add all parent directories not added yet
+                    child = path
+                    while child:
+                        parent = os.path.dirname(child)
+                        parent_entry = dirs.get(parent)
+                        if parent_entry is None:
+                            parent_entry = dirs[parent] = (set(), [])
+                            parent_entry[0].add(child)
+                            child = parent
+                        else:
+                            parent_entry[0].add(child)
+                            break
+                entry[1].append(song)
+            for _sub_dirs, songs in dirs.values():
+                songs.sort(key=lambda s: s["~filename"])
+            self._dirs = dirs
+            print_d(f"Indexed {len(dirs)} directories")
+        return self._dirs
+
+    def lsinfo(self, path: str) -> tuple[list[str], list] | None:
+        """Returns the sorted sub directories and songs in the directory
+        `path`, or None if there is no such directory"""
+
+        entry = self.__get_dirs().get(path.strip(os.sep))
+        if entry is None:
+            return None
+        return sorted(entry[0]), entry[1]
+
+    def walk(self, path: str):
+        """Yields (directory, songs) for `path` and all directories below,
+        or nothing if there is no such directory"""
+
+        dirs = self.__get_dirs()
+        pending = [path.strip(os.sep)]
+        while pending:
+            path = pending.pop()
+            entry = dirs.get(path)
+            if entry is None:
+                continue
+            yield path, entry[1]
+            pending.extend(sorted(entry[0], reverse=True))
+
+    def songs_below(self, path: str) -> list:
+        """Returns all songs in or below the directory `path`"""
+
+        return [song for _path, songs in self.walk(path) for song in songs]
@@ -7,12 +7,14 @@
 
 import re
 import shlex
+from collections import deque
 from collections.abc import Callable
 
 from senf import bytes2fsn, fsn2bytes
 
 from quodlibet import const
 from quodlibet.util import print_d, print_w
+from .database import ANY, BASE, MPDDatabase
 from .tcpserver import BaseTCPServer, BaseTCPConnection
 
 
@@ -66,6 +68,12 @@ TAG_MAPPING = [
 ]
 
 
+TAG_KEYS = {mpd_key.lower(): ql_key for mpd_key, ql_key in TAG_MAPPING}
+TAG_KEYS.update({"file": "~filename", ANY: ANY, BASE: BASE})
+TAG_NAMES = {ql_key: mpd_key for mpd_key, ql_key in TAG_MAPPING}
+TAG_NAMES["~filename"] = "file"
+
+
 def format_tags(song):
     """Gives a tag list message for a song"""
 
@@ -79,6 +87,17 @@ def format_tags(song):
     return "\n".join(lines)
 
 
+def format_song(song):
+    """Gives the info message of a song in the database"""
+
+    lines = [f"file: {song('~filename')}"]
+    tags = format_tags(song)
+    if tags:
+        lines.append(tags)
+    lines.append(f"Time: {int(song('~#length')):d}")
+    return "\n".join(lines)
+
+
 class ParseError(Exception):
     pass
 
@@ -174,15 +193,29 @@ class MPDService:
         id_ = app.player.connect("song-started", playlist_changed)
         self._player_sigs.append(id_)
 
+        self._database = None
+
     def _get_id(self, info):
         # XXX: we need a unique 31 bit ID, but don't have one.
         # Given that the heap is continuous and each object is >16 bytes
         # this should work
         return (id(info) & 0xFFFFFFFF) >> 1
 
+    @property
+    def database(self):
+        """The indexes of the library for the database commands"""
+
+        if self._database is None:
+            self._database = MPDDatabase(
+                self._app.library, [ql_key for _, ql_key in TAG_MAPPING])
+        return self._database
+
     def destroy(self):
         for id_ in self._player_sigs:
             self._app.player.disconnect(id_)
+        if self._database is not None:
+            self._database.destroy()
+            self._database = None
         del self._options
         del self._app
 
@@ -409,6 +442,9 @@ class MPDRequestError(Exception):
 
 class MPDConnection(BaseTCPConnection):
 
+    WRITE_SIZE = 2 ** 16
+    """Bytes of pending output to encode at once"""
+
     #  ------------ connection interface  ------------
 
     def handle_init(self, server):
@@ -418,6 +454,8 @@ class MPDConnection(BaseTCPConnection):
 
         str_version = ".".join(map(str, service.version))
         self._buf = bytearray(f"OK MPD {str_version}\n".encode())
+        self._pending = deque()
+        """Iterators of lines to write once the buffer is written"""
         self._read_buf = bytearray()
 
         # begin - command processing state
@@ -457,12 +495,20 @@ class MPDConnection(BaseTCPConnection):
                 del self._command_list[:]
 
     def handle_write(self):
+        pending = self._pending
+        while pending and len(self._buf) < self.WRITE_SIZE:
+            for line in pending[0]:
+                self._write(line)
+                if len(self._buf) >= self.WRITE_SIZE:
+                    break
+            else:
+                pending.popleft()
         data = self._buf[:]
         del self._buf[:]
         return data
 
     def can_write(self):
-        return bool(self._buf)
+        return bool(self._buf or self._pending)
 
     def handle_close(self):
         self.log("connection closed")
@@ -503,8 +549,19 @@ class MPDConnection(BaseTCPConnection):
         """Writes a line to the client"""
 
         assert isinstance(line, str)
-        self.log(f"<- {repr(line)}")
+        if self._pending:
+            self._pending.append(iter([line]))
+        else:
+            self._write(line)
+
+    def write_lines(self, lines):
+        """Writes the lines of an iterable to the client, taking them only
+        as the client reads the ones before"""
 
+        self._pending.append(iter(lines))
+
+    def _write(self, line):
+        self.log(f"<- {repr(line)}")
         self._buf.extend(line.encode("utf-8", errors="replace") + b"\n")
 
     def ok(self):
@@ -638,6 +695,63 @@ def _parse_range(arg):
         raise MPDRequestError("invalid range")
 
 
+def _parse_tag(arg):
+    try:
+        return TAG_KEYS[arg.lower()]
+    except KeyError as e:
+        raise MPDRequestError(f"Unknown tag type: {arg}", AckError.ARG) from e
+
+
+def _parse_filters(args):
+    """Returns the (tag, value) filters and group tags from pairs of
+    arguments"""
+
+    if len(args) % 2:
+        raise MPDRequestError("Incorrect number of filter arguments",
+                              AckError.ARG)
+    filters = []
+    groups = []
+    for name, value in zip(args[::2], args[1::2], strict=True):
+        if name.lower() == "group":
+            group = _parse_tag(value)
+            if group not in TAG_NAMES:
+                raise MPDRequestError(f"Unknown tag type: {value}",
+                                      AckError.ARG)
+            groups.append(group)
+        elif name.lower() not in ("sort", "window"):
+            filters.append((_parse_tag(name), value))
+    return filters, groups
+
+
+def _parse_find_filters(args):
+    _verify_length(args, 2)
+    filters, groups = _parse_filters(args)
+    if groups:
+        raise MPDRequestError("group not supported")
+    return filters
+
+
+def _write_songs(conn, songs):
+    conn.write_lines(format_song(song) for song in songs)
+
+
+def _write_tree(conn, service, args, format_song):
+    path = args[0] if args else ""
+    if service.database.lsinfo(path) is None:
+        raise MPDRequestError("Not found", AckError.NO_EXIST)
+    walked = service.database.walk(path)
+
+    def lines():
+        for i, (path, songs) in enumerate(walked):
+            # Only the directories below the one listed
+            if i:
+                yield f"directory: {path}"
+            for song in songs:
+                yield format_song(song)
+
+    conn.write_lines(lines())
+
+
 @MPDConnection.Command("idle", ack=False)
 def _cmd_idle(conn, service, args):
     service.register_idle(conn, args)
@@ -677,7 +791,49 @@ def _cmd_listplaylists(conn, service, args):
 
 @MPDConnection.Command("list")
 def _cmd_list(conn, service, args):
-    pass
+    _verify_length(args, 1)
+    tag = _parse_tag(args[0])
+    if tag not in TAG_NAMES:
+        raise MPDRequestError(f"Unknown tag type: {args[0]}", AckError.ARG)
+    args = args[1:]
+    if len(args) == 1:
+        # Old clients give the artist of albums to list
+        if tag != "album":
+            raise MPDRequestError('should be "Album" for 3 arguments')
+        args = ["artist", args[0]]
+    filters, groups = _parse_filters(args)
+    if len(groups) > 1:
+        raise MPDRequestError("only one group supported")
+    group = groups[0] if groups else None
+
+    pairs = service.database.list_values(tag, filters, group)
+    name = TAG_NAMES[tag]
+    if group is None:
+        conn.write_lines(f"{name}: {value}" for _, value in pairs)
+        return
+
+    group_name = TAG_NAMES[group]
+
+    def lines():
+        last = None
+        for group_value, value in pairs:
+            if group_value != last:
+                yield f"{group_name}: {group_value}"
+                last = group_value
+            yield f"{name}: {value}"
+
+    conn.write_lines(lines())
+
+
+@MPDConnection.Command("find")
+def _cmd_find(conn, service, args):
+    _write_songs(conn, service.database.find(_parse_find_filters(args)))
+
+
+@MPDConnection.Command("search")
+def _cmd_search(conn, service, args):
+    filters = _parse_find_filters(args)
+    _write_songs(conn, service.database.find(filters, exact=False))
 
 
 @MPDConnection.Command("playid")
@@ -762,8 +918,32 @@ def _cmd_currentsong(conn, service, args):
 
 @MPDConnection.Command("count")
 def _cmd_count(conn, service, args):
-    conn.write_line("songs: 0")
-    conn.write_line("playtime: 0")
+    filters, groups = _parse_filters(args)
+    if len(groups) > 1:
+        raise MPDRequestError("only one group supported")
+    database = service.database
+    songs = database.filter(filters)
+    if songs is None:
+        songs = service._app.library.values()
+
+    def write_count(songs):
+        playtime = sum(int(song("~#length")) for song in songs)
+        conn.write_line(f"songs: {len(songs):d}")
+        conn.write_line(f"playtime: {playtime:d}")
+
+    if not groups:
+        write_count(songs)
+        return
+
+    group = groups[0]
+    song_values = database.song_values(group)
+    by_value: dict[str, list] = {}
+    for song in songs:
+        for value in song_values.get(song) or [""]:
+            by_value.setdefault(value, []).append(song)
+    for value, group_songs in sorted(by_value.items()):
+        conn.write_line(f"{TAG_NAMES[group]}: {value}")
+        write_count(group_songs)
 
 
 @MPDConnection.Command("plchanges")
@@ -785,8 +965,13 @@ def _cmd_plchangesposid(conn, service, args):
 
 
 @MPDConnection.Command("listallinfo")
-def _cmd_listallinfo(*args):
-    _cmd_currentsong(*args)
+def _cmd_listallinfo(conn, service, args):
+    _write_tree(conn, service, args, format_song)
+
+
+@MPDConnection.Command("listall")
+def _cmd_listall(conn, service, args):
+    _write_tree(conn, service, args, lambda song: f"file: {song('~filename')}")
 
 
 @MPDConnection.Command("seek")
@@ -843,7 +1028,13 @@ def _cmd_tagtypes(conn, service, args):
 
 @MPDConnection.Command("lsinfo")
 def _cmd_lsinfo(conn, service, args):
-    _verify_length(args, 1)
+    entries = service.database.lsinfo(args[0] if args else "")
+    if entries is None:
+        raise MPDRequestError("Not found", AckError.NO_EXIST)
+    dirs, songs = entries
+    for path in dirs:
+        conn.write_line(f"directory: {path}")
+    _write_songs(conn, songs)
 
 
 @MPDConnection.Command("playlistinfo")
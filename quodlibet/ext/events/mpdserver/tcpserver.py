@@ -126,6 +126,9 @@ class BaseTCPConnection:
     Subclasses need to implement the handle_*() can_*() methods.
     """
 
+    WRITE_BUFFER_SIZE = 2 ** 16
+    """Only ask for more data to write below this many unsent bytes"""
+
     def __init__(self, server, sock):
         self._server = server
         self._sock = sock
@@ -197,7 +200,8 @@ class BaseTCPConnection:
                 return False
 
             if flags & GLib.IOCondition.OUT:
-                if self.can_write():
+                if (len(write_buffer) < self.WRITE_BUFFER_SIZE
+                        and self.can_write()):
                     write_buffer.extend(self.handle_write())
                 if not write_buffer:
                     self._out_id = None
@@ -259,7 +263,11 @@ class BaseTCPConnection:
         raise NotImplementedError
 
     def handle_write(self):
-        """Called if new data can be written, should return the data"""
+        """Called if new data can be written, should return the data.
+
+        Large amounts of data can be returned in parts, it gets called
+        again as long as can_write() is True.
+        """
 
         raise NotImplementedError
 
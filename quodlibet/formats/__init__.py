@@ -7,7 +7,8 @@
 # (at your option) any later version.
 
 from ._audio import PEOPLE, AudioFile, DUMMY_SONG, decode_value, \
-    FILESYSTEM_TAGS, TIME_TAGS
+    FILESYSTEM_TAGS, TIME_TAGS, intern_tag, clear_shared_values, \
+    tag_memory_usage
 from ._image import EmbeddedImage, APICType
 from ._misc import AudioFileError, init, MusicFile, types, loaders, filter, \
     mimes
@@ -15,4 +16,5 @@ from ._serialize import load_audio_files, dump_audio_files, SerializationError
 
 AudioFile, AudioFileError, EmbeddedImage, DUMMY_SONG, PEOPLE, decode_value,
 APICType, FILESYSTEM_TAGS, TIME_TAGS, init, MusicFile, types, loaders, filter,
-mimes, load_audio_files, dump_audio_files, SerializationError
+mimes, load_audio_files, dump_audio_files, SerializationError, intern_tag,
+clear_shared_values, tag_memory_usage
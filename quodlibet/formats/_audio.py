@@ -15,9 +15,11 @@ import json
 import os
 import re
 import shutil
+import sys
 import time
 from typing import Any, Generic, TypeVar
 from collections import OrderedDict
+from collections.abc import Iterable
 from itertools import zip_longest
 
 from senf import fsn2uri, fsnative, fsn2text, bytes2fsn, path2fsn
@@ -58,6 +60,9 @@ TIME_TAGS = {"~#lastplayed", "~#laststarted", "~#added", "~#mtime"}
 
 HUMAN_TO_NUMERIC_TIME_TAGS = {t.replace("~#", "~"): t for t in TIME_TAGS}
 
+VOLATILE_TAGS = {"~lyrics", "~playlists"} | set(HUMAN_TO_NUMERIC_TIME_TAGS)
+"""Synthetic tags which can change without the song changing"""
+
 DURATION_TAGS = {"~#length"}
 """Duration in seconds"""
 
@@ -82,6 +87,73 @@ PEOPLE_SORT = [TAG_TO_SORT.get(k, k) for k in PEOPLE]
 VARIOUS_ARTISTS_VALUES = "V.A.", "various artists", "Various Artists"
 """Values for ~people representing lots of people, most important last"""
 
+SHARED_TAGS = {
+    "artist", "albumartist", "album", "genre", "date", "originaldate",
+    "composer", "performer", "conductor", "arranger", "lyricist", "producer",
+    "author", "organization", "labelid", "encoder", "encodedby", "language",
+    "media", "copyright", "website", "discnumber", "tracknumber",
+    "discsubtitle", "artistsort", "albumartistsort", "albumsort",
+    "composersort", "releasecountry", "musicbrainz_albumid",
+    "musicbrainz_artistid", "musicbrainz_albumartistid",
+    "musicbrainz_releasegroupid", "musicbrainz_albumstatus",
+    "musicbrainz_albumtype", "replaygain_album_gain", "replaygain_album_peak",
+    "~format", "~codec", "~encoding", "~mountpoint",
+}
+"""Tags with values common to many songs, which are shared between songs
+if `AudioFile.intern_tags` is set"""
+
+_shared_values: dict[str, str] = {}
+"""Values of `SHARED_TAGS` seen by `intern_tag` since the last
+`clear_shared_values`. Not pruned when songs go away, but cleared when
+the library gets loaded or destroyed."""
+
+
+def intern_tag(key: str, value: Any) -> tuple[str, Any]:
+    """Returns `key` interned and, for `SHARED_TAGS`, an existing equal
+    string for `value`, so that songs don't need their own copies.
+    """
+
+    key = sys.intern(key)
+    if key in SHARED_TAGS and isinstance(value, str):
+        value = _shared_values.setdefault(value, value)
+    return key, value
+
+
+def clear_shared_values() -> None:
+    """Forget all values shared by `intern_tag`, e.g. before (re)loading
+    the library. Existing songs keep their values, but songs created
+    afterwards don't share them anymore.
+    """
+
+    _shared_values.clear()
+
+
+def tag_memory_usage(songs: Iterable["AudioFile"]) -> dict[str, int]:
+    """Returns the approximate memory used by each tag of `songs` in bytes.
+
+    Names and values shared between songs (see `intern_tag`) are only
+    counted once, the size of the songs themselves is split evenly between
+    their tags.
+    """
+
+    seen = set()
+    usage: dict[str, float] = {}
+    getsizeof = sys.getsizeof
+    for song in songs:
+        if not song:
+            continue
+        entry = getsizeof(song) / len(song)
+        for key, value in dict.items(song):
+            size = entry
+            if id(key) not in seen:
+                seen.add(id(key))
+                size += getsizeof(key)
+            if id(value) not in seen:
+                seen.add(id(value))
+                size += getsizeof(value)
+            usage[key] = usage.get(key, 0) + size
+    return {key: round(size) for key, size in usage.items()}
+
 
 def decode_value(tag, value):
     """Returns a unicode representation of the passed value, based on
@@ -149,6 +221,10 @@ class AudioFile(dict, ImageContainer, HasKey):
     supports_rating_and_play_count_in_file = False
     """Does this format support storing ratings and play counts in the file"""
 
+    intern_tags = False
+    """Share tag names and values of `SHARED_TAGS` between songs
+    (see `intern_tag`) to save memory"""
+
     mimes: list[str] = []
     """MIME types this class can represent"""
 
@@ -220,6 +296,8 @@ class AudioFile(dict, ImageContainer, HasKey):
         else:
             value = str(value)
 
+        if self.intern_tags:
+            key, value = intern_tag(key, value)
         dict.__setitem__(self, key, value)
 
         pop = self.__dict__.pop
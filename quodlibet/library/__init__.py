@@ -16,9 +16,11 @@ also be queried in various ways.
 import time
 
 from quodlibet import print_d, print_w, config
+from quodlibet.formats import AudioFile, clear_shared_values
 
 from quodlibet.library.song import SongLibrary, SongFileLibrary
 from quodlibet.library.librarians import SongLibrarian
+from quodlibet.pattern import format_cache
 from quodlibet.util.library import get_scan_dirs
 from quodlibet.util.path import mtime
 
@@ -30,10 +32,28 @@ def init(cache_fn=None):
     all future SongLibraries.
     """
 
-    SongFileLibrary.librarian = SongLibrary.librarian = SongLibrarian()
+    librarian = SongLibrarian()
+    librarian.batch_signals = config.getboolean("library", "batch_signals")
+    librarian.use_sort_keys = config.getboolean("library", "sort_keys")
+    SongFileLibrary.librarian = SongLibrary.librarian = librarian
+    format_cache.max_size = config.getint("library", "format_cache")
+    format_cache.attach(librarian)
+    AudioFile.intern_tags = config.getboolean("library", "intern_tags")
     watch = config.getboolean("library", "watch")
     library = SongFileLibrary("main", watch_dirs=get_scan_dirs() if watch else [])
+    # Watches get set up in the main loop, after these are set
+    library.watch_delay = config.getint("library", "watch_delay")
+    library.max_watches = config.getint("library", "max_watches")
+    library.poll_interval = config.getint("library", "watch_poll_interval")
+    library.batch_signals = librarian.batch_signals
+    library.use_journal = config.getboolean("library", "journal")
+    library.lazy_load = config.getboolean("library", "lazy_load")
+    library.scan_workers = config.getint("library", "scan_workers")
+    library.scan_processes = config.getboolean("library", "scan_processes")
+    library.use_tag_index = config.getboolean("library", "tag_index")
+    library.use_folded_text = config.getboolean("library", "folded_text")
     if cache_fn:
+        clear_shared_values()
         library.load(cache_fn)
     return library
 
@@ -69,4 +89,6 @@ def destroy() -> None:
                 lib.destroy()
             except Exception as e:
                 print_w(f"Couldn't destroy {lib} ({e!r})")
+        format_cache.detach()
         librarian.destroy()
+    clear_shared_values()
@@ -4,7 +4,7 @@
 # (at your option) any later version.
 
 from quodlibet import print_d
-from quodlibet.formats._audio import AlbumKey
+from quodlibet.formats._audio import AlbumKey, AudioFile
 from quodlibet.library.base import Library
 from quodlibet.util.collection import Album
 
@@ -25,6 +25,9 @@ class AlbumLibrary(Library[AlbumKey, Album]):
             "AlbumLibrary for %s" % library._name)
 
         self._library = library
+        self._keys: dict[AudioFile, AlbumKey] = {}
+        """The key of the album each song was sorted into, which stays the
+        same when the song's `album_key` changes until it is re-sorted"""
         self._asig = library.connect("added", self.__added)
         self._rsig = library.connect("removed", self.__removed)
         self._csig = library.connect("changed", self.__changed)
@@ -37,6 +40,7 @@ class AlbumLibrary(Library[AlbumKey, Album]):
     def destroy(self):
         for sig in [self._asig, self._rsig, self._csig]:
             self._library.disconnect(sig)
+        self._keys.clear()
 
     def _get(self, item):
         return self._contents.get(item)
@@ -53,6 +57,7 @@ class AlbumLibrary(Library[AlbumKey, Album]):
                 self._contents[key] = album
                 new.add(album)
             self._contents[key].songs.add(song)
+            self._keys[song] = key
 
         changed -= new
         return changed, new
@@ -69,17 +74,28 @@ class AlbumLibrary(Library[AlbumKey, Album]):
             if changed:
                 self.emit("changed", changed)
 
+    def __discard(self, song):
+        """Takes the song out of its album and returns the album, or None
+        if it isn't in one"""
+
+        key = self._keys.pop(song, None)
+        if key is None:
+            return None
+        album = self._contents[key]
+        album.songs.discard(song)
+        return album
+
     def __removed(self, library, items):
         changed = set()
         removed = set()
         for song in items:
-            key = song.album_key
-            album = self._contents[key]
-            album.songs.remove(song)
+            album = self.__discard(song)
+            if album is None:
+                continue
             changed.add(album)
             if not album.songs:
                 removed.add(album)
-                del self._contents[key]
+                del self._contents[album.key]
 
         changed -= removed
 
@@ -92,37 +108,36 @@ class AlbumLibrary(Library[AlbumKey, Album]):
             self.emit("changed", changed)
 
     def __changed(self, library, items):
-        """Album keys could change between already existing ones... so we
-        have to do it the hard way and search by id."""
+        """Album keys could have changed, songs are moved between albums
+        using the key they were last sorted in with."""
         print_d("Updating affected albums for %d items" % len(items))
         changed = set()
         removed = set()
         to_add = []
+        keys = self._keys
         for song in items:
-            # in case the key hasn't changed
             key = song.album_key
-            if key in self._contents and song in self._contents[key].songs:
+            # in case the key hasn't changed
+            if keys.get(song) == key:
                 changed.add(self._contents[key])
-            else:  # key changed... look for it in each album
-                to_add.append(song)
-                for album in self._contents.values():
-                    if song in album.songs:
-                        album.songs.remove(song)
-                        if not album.songs:
-                            removed.add(album)
-                        else:
-                            changed.add(album)
-                        break
+                continue
+            to_add.append(song)
+            album = self.__discard(song)
+            if album is not None:
+                if not album.songs:
+                    removed.add(album)
+                else:
+                    changed.add(album)
 
         # get new albums and changed ones because keys could have changed
         add_changed, new = self.__add(to_add)
         changed |= add_changed
 
         # check if albums that were empty at some point are still empty
+        removed = {album for album in removed if not album.songs}
         for album in removed:
-            if not album.songs:
-                del self._contents[album.key]
-                changed.discard(album)
+            del self._contents[album.key]
+            changed.discard(album)
 
         for album in changed:
             album.finalize()
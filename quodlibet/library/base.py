@@ -14,13 +14,15 @@ from typing import TypeVar, Optional, Generic
 from collections.abc import Collection, Sequence, Iterable, Iterator, MutableMapping, \
     Generator
 
-from gi.repository import GObject
+from gi.repository import GObject, GLib
 
 import quodlibet
 from quodlibet import util
 from quodlibet.formats import (load_audio_files,
                                dump_audio_files, SerializationError)
 from quodlibet.formats._audio import HasKey
+from quodlibet.library.lazy import (LazyItems, dump_items, is_lazy_file,
+                                    load_items)
 from quodlibet.util.atomic import atomic_save
 from quodlibet.util.collections import DictMixin
 from quodlibet.util.dprint import print_d, print_w
@@ -30,8 +32,110 @@ from senf import fsnative, path2fsn
 K = TypeVar("K", covariant=True)
 V = TypeVar("V", bound=HasKey)
 
+BATCHED_SIGNALS = ("added", "changed", "removed")
+"""Signals `BatchedSignalsMixin` can merge"""
 
-class Library(GObject.GObject, DictMixin, Generic[K, V]):
+
+class _PendingSignals:
+    """Item signals waiting to be emitted, in order.
+
+    Consecutive signals of the same kind and all 'changed' signals get
+    merged. Items that were added in the same batch aren't reported as
+    changed, and if they get removed again they aren't reported at all.
+    """
+
+    def __init__(self):
+        self._signals: list[tuple[str, set]] = []
+
+    def __bool__(self):
+        return bool(self._signals)
+
+    def add(self, signal: str, items: Iterable):
+        signals = self._signals
+        items = set(items)
+        for queued_signal, queued in signals:
+            if signal == "changed" and queued_signal == "added":
+                items -= queued
+            elif signal == "removed" and queued_signal == "added":
+                common = queued & items
+                queued -= common
+                items -= common
+            elif signal == "removed" and queued_signal == "changed":
+                queued -= items
+        if not items:
+            return
+
+        if signal == "changed":
+            for queued_signal, queued in signals:
+                if queued_signal == "changed":
+                    queued |= items
+                    return
+        elif signals and signals[-1][0] == signal:
+            signals[-1][1].update(items)
+            return
+        signals.append((signal, items))
+
+    def pop_all(self) -> list[tuple[str, set]]:
+        signals = [(signal, items) for signal, items in self._signals if items]
+        self._signals = []
+        return signals
+
+
+class BatchedSignalsMixin:
+    """Lets GObjects with 'added', 'changed' and 'removed' signals merge
+    them into batches (see `batch_signals`)."""
+
+    batch_signals = False
+    """If set, the signals in `BATCHED_SIGNALS` get collected and emitted
+    together once the main loop is idle, so listeners handle every item
+    only once per batch. Otherwise they are emitted right away."""
+
+    _pending_signals: _PendingSignals | None = None
+    _flush_id: int | None = None
+
+    def emit(self, signal, *args):
+        if not self.batch_signals or signal not in BATCHED_SIGNALS:
+            return super().emit(signal, *args)
+
+        items, = args
+        if self._pending_signals is None:
+            self._pending_signals = _PendingSignals()
+        self._pending_signals.add(signal, items)
+        if self._flush_id is None:
+            # before redrawing, so it all happens in the same frame
+            self._flush_id = GLib.idle_add(
+                self.__flush_idle, priority=GLib.PRIORITY_HIGH_IDLE)
+        return None
+
+    def __flush_idle(self):
+        self._flush_id = None
+        self.flush_signals()
+        return False
+
+    def flush_signals(self):
+        """Emits all pending signals now"""
+
+        if self._flush_id is not None:
+            GLib.source_remove(self._flush_id)
+            self._flush_id = None
+        pending = self._pending_signals
+        # handlers can cause more signals, emit those as well
+        while pending:
+            for signal, items in pending.pop_all():
+                print_d(f"Emitting {signal} for {len(items)} item(s) batched",
+                        self)
+                super().emit(signal, items)
+
+    def _drop_signals(self):
+        """Forgets all pending signals"""
+
+        if self._flush_id is not None:
+            GLib.source_remove(self._flush_id)
+            self._flush_id = None
+        self._pending_signals = None
+
+
+class Library(BatchedSignalsMixin, GObject.GObject, DictMixin, Generic[K, V]):
     """A Library contains useful objects.
 
     The only required method these objects support is a .key
@@ -70,6 +174,7 @@ class Library(GObject.GObject, DictMixin, Generic[K, V]):
         return f"<{type(self).__name__} @ {hex(id(self))}>"
 
     def destroy(self):
+        self._drop_signals()
         if self.librarian is not None and self._name is not None:
             self.librarian._unregister(self, self._name)
 
@@ -163,6 +268,12 @@ class Library(GObject.GObject, DictMixin, Generic[K, V]):
         # Subclasses should override this if they want to check
         # item validity; see `FileLibrary`.
         content = self._contents
+        if isinstance(items, LazyItems):
+            if not content:
+                # keep the items unloaded until they are used
+                self._contents = items
+                return
+            items = items.values()
         for item in items:
             content[item.key] = item
 
@@ -210,22 +321,27 @@ class Library(GObject.GObject, DictMixin, Generic[K, V]):
 def _load_items(filename) -> Iterable[V]:
     """Load items from disk.
 
+    Files in the indexed format are returned as `LazyItems`, which only
+    load items once they are used.
+
     In case of an error returns default or an empty list.
     """
 
     try:
         with open(filename, "rb") as fp:
-            data = fp.read()
+            try:
+                if is_lazy_file(fp):
+                    return load_items(fp)
+                items = load_audio_files(fp.read())
+            except SerializationError:
+                # there are too many ways this could fail
+                util.print_exc()
+                items = None
     except OSError:
         print_w("Couldn't load library file from: %r" % filename)
         return []
 
-    try:
-        items = load_audio_files(data)
-    except SerializationError:
-        # there are too many ways this could fail
-        util.print_exc()
-
+    if items is None:
         # move the broken file out of the way
         try:
             shutil.copy(filename, filename + ".not-valid")
@@ -242,6 +358,10 @@ class PicklingMixin:
 
     filename = None
 
+    lazy_load = False
+    """Whether to save in the indexed format of `library.lazy`, where items
+    only get loaded once they are used. Loading supports both formats."""
+
     def load(self, filename):
         """Load a library from a file, containing a picked list.
 
@@ -271,7 +391,7 @@ class PicklingMixin:
             dirname = os.path.dirname(filename)
             mkdir(dirname)
             with atomic_save(filename, "wb") as fileobj:
-                fileobj.write(dump_audio_files(self.get_content()))
+                fileobj.write(self._dump_content(self._get_save_content()))
         except SerializationError:
             # Can happen when we try to pickle while the library is being
             # modified, like in the periodic 15min save.
@@ -282,6 +402,27 @@ class PicklingMixin:
         else:
             self.dirty = False
 
+    def _get_save_content(self) -> list:
+        """Like `get_content`, but when saving in the indexed format, items
+        which haven't been loaded yet are returned as unchanged records.
+        Everything returned has a `key` attribute.
+        """
+
+        if self.lazy_load and isinstance(self._contents, LazyItems):
+            return list(self._contents.entries())
+        return self.get_content()
+
+    def _dump_content(self, items: list) -> bytes:
+        """Serializes the result of `_get_save_content`
+
+        Raises:
+            SerializationError
+        """
+
+        if self.lazy_load:
+            return dump_items(items)
+        return dump_audio_files(items)
+
 
 def iter_paths(root: fsnative,
                exclude: Iterable[fsnative] | None = None,
@@ -3,23 +3,64 @@
 # the Free Software Foundation; either version 2 of the License, or
 # (at your option) any later version.
 
+import multiprocessing
 import os
 import time
+from concurrent.futures import (ThreadPoolExecutor, ProcessPoolExecutor,
+                                FIRST_COMPLETED, wait)
 from pathlib import Path
 from collections.abc import Generator, Iterable
 
 from gi.repository import Gio, GLib, GObject
 
-from quodlibet import print_d, print_w, _, formats
+from quodlibet import print_d, print_w, _, formats, config
 from quodlibet.formats import AudioFileError, AudioFile
 from quodlibet.library.base import iter_paths, Library, PicklingMixin
+from quodlibet.library.lazy import LazyItems
+from quodlibet.library.paths import PathIndex
 from quodlibet.qltk.notif import Task
 from quodlibet.util import copool, print_exc
+from quodlibet.util.atomic import atomic_save
 from quodlibet.util.library import get_exclude_dirs
 from quodlibet.util.path import ismount, unexpand, normalize_path
+from quodlibet.util.picklehelper import pickle_dumps, pickle_loads, PickleError
 from senf import fsn2text, fsnative
 
 
+def _init_scan_worker(config_file):
+    """Sets up a scan worker process so it can load files"""
+
+    import quodlibet
+    quodlibet.init_cli(no_translations=True, config_file=config_file)
+
+
+def _load_files(paths):
+    """Loads a batch of files in a scan worker.
+
+    Returns the loaded AudioFiles, skipping files that failed to load.
+    """
+
+    songs = []
+    for path in paths:
+        try:
+            song = formats.MusicFile(path)
+        except Exception:
+            print_exc()
+            continue
+        if song is not None:
+            songs.append(song)
+    return songs
+
+
+def _dir_mtime(path) -> int | None:
+    """Returns the modification time of a directory, or None if it's gone"""
+
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
 class FileLibrary(Library[fsnative, AudioFile], PicklingMixin):
     """A library containing items on a local(-ish) filesystem.
 
@@ -27,9 +68,36 @@ class FileLibrary(Library[fsnative, AudioFile], PicklingMixin):
     and have a mountpoint attribute.
     """
 
+    scan_workers = 0
+    """Number of workers for loading new files while scanning.
+    If 0, files are loaded one by one in the main loop using `add_filename`"""
+
+    scan_processes = False
+    """If the scan workers should be processes instead of threads"""
+
+    scan_batch_size = 50
+    """Number of files each scan worker loads in one go"""
+
+    _path_index = None
+
     def __init__(self, name=None):
         super().__init__(name)
         self._masked = {}
+        self._dir_mtimes: dict[str, int] = {}
+
+    def destroy(self):
+        if self._path_index is not None:
+            self._path_index.destroy()
+            self._path_index = None
+        super().destroy()
+
+    @property
+    def path_index(self) -> PathIndex:
+        """The index for finding the items below a directory"""
+
+        if self._path_index is None:
+            self._path_index = PathIndex(self)
+        return self._path_index
 
     def _load_init(self, items):
         """Add many items to the library, check if the
@@ -38,6 +106,14 @@ class FileLibrary(Library[fsnative, AudioFile], PicklingMixin):
         Does not check if items are valid.
         """
 
+        # Loading doesn't emit signals
+        if self._path_index is not None:
+            self._path_index.clear()
+
+        if isinstance(items, LazyItems):
+            self._load_init_lazy(items)
+            return
+
         mounts = {}
         contents = self._contents
         masked = self._masked
@@ -65,6 +141,22 @@ class FileLibrary(Library[fsnative, AudioFile], PicklingMixin):
             else:
                 masked[mountpoint][item.key] = item
 
+    def _load_init_lazy(self, items: LazyItems):
+        """Like `_load_init`, but only loads items of unmounted mount
+        points (to mask them)"""
+
+        for mountpoint, keys in items.mountpoints().items():
+            is_mounted = ismount(mountpoint)
+            if not is_mounted:
+                # see above
+                items[keys[0]].exists()
+                is_mounted = ismount(mountpoint)
+            if not is_mounted:
+                masked = self._masked.setdefault(mountpoint, {})
+                for key in keys:
+                    masked[key] = items.pop(key)
+        super()._load_init(items)
+
     def _load_item(self, item, force=False):
         """Add an item, or refresh it if it's already in the library.
         No signals will be fired.
@@ -136,7 +228,8 @@ class FileLibrary(Library[fsnative, AudioFile], PicklingMixin):
             else:
                 removed.add(item)
 
-    def rebuild(self, paths, force=False, exclude=None, cofuncid=None):
+    def rebuild(self, paths, force=False, exclude=None, cofuncid=None,
+                quick=False):
         """Reload or remove songs if they have changed or been deleted.
 
         This generator rebuilds the library over the course of iteration.
@@ -147,11 +240,15 @@ class FileLibrary(Library[fsnative, AudioFile], PicklingMixin):
         Only items present in the library when the rebuild is started
         will be checked.
 
+        Unless `force` is set, items are checked one directory at a time
+        (see `_outdated_in_dir`). If `quick` is set, directories whose
+        mtime hasn't changed since the last rebuild are skipped entirely.
+
         If this function is copooled, set "cofuncid" to enable pause/stop
         buttons in the UI.
         """
 
-        print_d(f"Rebuilding, force is {force}", self._name)
+        print_d(f"Rebuilding, force is {force}, quick is {quick}", self._name)
 
         task = Task(_("Library"), _("Checking mount points"))
         if cofuncid:
@@ -167,10 +264,10 @@ class FileLibrary(Library[fsnative, AudioFile], PicklingMixin):
         if cofuncid:
             task.copool(cofuncid)
         changed, removed = set(), set()
-        for i, (key, item) in task.list(enumerate(sorted(self.items()))):
-            if key in self._contents and force or not item.valid():
-                self.reload(item, changed, removed)
-                # These numbers are pretty empirical. We should yield more
+
+        def flush(i):
+            nonlocal changed, removed
+            # These numbers are pretty empirical. We should yield more
             # often than we emit signals; that way the main loop stays
             # interactive and doesn't get bogged down in updates.
             if len(changed) >= 200:
@@ -179,8 +276,30 @@ class FileLibrary(Library[fsnative, AudioFile], PicklingMixin):
             if len(removed) >= 200:
                 self.emit("removed", removed)
                 removed = set()
-            if len(changed) > 20 or i % 200 == 0:
-                yield True
+            return len(changed) > 20 or i % 200 == 0
+
+        if force:
+            for i, (key, item) in task.list(enumerate(sorted(self.items()))):
+                if key in self._contents:
+                    self.reload(item, changed, removed)
+                if flush(i):
+                    yield True
+        else:
+            by_dir, others = self._group_by_dir()
+            if quick:
+                self._load_dir_mtimes()
+            for i, dirname in task.list(enumerate(sorted(by_dir))):
+                for item in self._outdated_in_dir(dirname, by_dir[dirname], quick):
+                    self.reload(item, changed, removed)
+                if flush(i):
+                    yield True
+            for i, item in enumerate(others):
+                if not item.valid():
+                    self.reload(item, changed, removed)
+                if flush(i):
+                    yield True
+            if quick:
+                self._save_dir_mtimes()
         print_d(f"Removing {len(removed)}, changing {len(changed)}).", self._name)
         if removed:
             self.emit("removed", removed)
@@ -189,6 +308,85 @@ class FileLibrary(Library[fsnative, AudioFile], PicklingMixin):
 
         yield from self.scan(paths, exclude, cofuncid)
 
+    def _group_by_dir(self) -> tuple[dict[str, dict[str, AudioFile]], list]:
+        """Returns a {directory: {basename: item}} index of all local files
+        and a list of all other items
+        """
+
+        by_dir: dict[str, dict[str, AudioFile]] = {}
+        others = []
+        for key, item in self.items():
+            if isinstance(item, AudioFile) and item.is_file:
+                dirname, basename = os.path.split(key)
+                by_dir.setdefault(dirname, {})[basename] = item
+            else:
+                others.append(item)
+        return by_dir, others
+
+    def _outdated_in_dir(self, dirname: str, items: dict[str, AudioFile],
+                         quick: bool = False) -> list[AudioFile]:
+        """Returns the items in a directory which need to be reloaded.
+
+        Lists the directory once and compares the cached `~#mtime` and
+        `~#filesize` of each item with the directory entries. If `quick` is
+        set and the directory's mtime is the same as during the last check,
+        the directory isn't listed at all. Note that modifying a file in place
+        doesn't change the mtime of its directory.
+        """
+
+        try:
+            dir_mtime = os.stat(dirname).st_mtime_ns
+            if quick and self._dir_mtimes.get(dirname) == dir_mtime:
+                return []
+            with os.scandir(dirname) as it:
+                # Item keys are normcased (see `normalize_path`)
+                entries = {os.path.normcase(entry.name): entry for entry in it}
+        except OSError:
+            # Gone or not mounted, let each item sort itself out
+            self._dir_mtimes.pop(dirname, None)
+            return list(items.values())
+
+        outdated = []
+        for name, item in items.items():
+            entry = entries.get(name)
+            try:
+                stat = entry.stat() if entry is not None else None
+            except OSError:
+                stat = None
+            if (stat is None
+                    or not item.get("~#mtime", 0)
+                    or stat.st_mtime != item["~#mtime"]
+                    or stat.st_size != item.get("~#filesize", stat.st_size)):
+                outdated.append(item)
+        self._dir_mtimes[dirname] = dir_mtime
+        return outdated
+
+    @property
+    def _dir_mtimes_filename(self) -> str | None:
+        return self.filename + ".dirs" if self.filename else None
+
+    def _load_dir_mtimes(self) -> None:
+        """Loads the directory mtimes of the last quick rebuild, if any"""
+
+        filename = self._dir_mtimes_filename
+        if self._dir_mtimes or not filename:
+            return
+        try:
+            with open(filename, "rb") as h:
+                self._dir_mtimes = pickle_loads(h.read())
+        except (OSError, PickleError):
+            self._dir_mtimes = {}
+
+    def _save_dir_mtimes(self) -> None:
+        filename = self._dir_mtimes_filename
+        if not filename:
+            return
+        try:
+            with atomic_save(filename, "wb") as h:
+                h.write(pickle_dumps(self._dir_mtimes, 2))
+        except (OSError, PickleError):
+            print_w(f"Couldn't save directory index to {filename!r}", self._name)
+
     def add_filename(self,
                      filename: str | Path,
                      add: bool = True) -> AudioFile | None:
@@ -250,6 +448,10 @@ class FileLibrary(Library[fsnative, AudioFile], PicklingMixin):
             if cofuncid:
                 task.copool(cofuncid)
 
+            if self.scan_workers > 0 and len(paths_to_load) > self.scan_batch_size:
+                yield from self._load_files_parallel(paths_to_load, task, need_added)
+                return
+
             added = []
             for real_path in task.gen(paths_to_load):
                 item = self.add_filename(real_path, False)
@@ -266,6 +468,63 @@ class FileLibrary(Library[fsnative, AudioFile], PicklingMixin):
                 added = []
                 yield True
 
+    def _create_scan_executor(self):
+        if self.scan_processes:
+            # Forking a process with GLib / GTK threads around isn't safe
+            context = multiprocessing.get_context("spawn")
+            return ProcessPoolExecutor(
+                self.scan_workers, mp_context=context,
+                initializer=_init_scan_worker, initargs=(config._filename,))
+        return ThreadPoolExecutor(self.scan_workers)
+
+    def _load_files_parallel(self, paths: list[fsnative], task: Task, need_added):
+        """Loads files in batches using a pool of scan workers and adds the
+        results as they come in, yielding while waiting for the workers.
+        """
+
+        size = self.scan_batch_size
+        batches = iter([paths[i:i + size] for i in range(0, len(paths), size)])
+        total = len(paths)
+        done = 0
+        max_pending = self.scan_workers * 2
+        print_d(f"Loading {total} files using {self.scan_workers} workers",
+                self._name)
+
+        executor = self._create_scan_executor()
+        pending: set = set()
+        added: list[AudioFile] = []
+        try:
+            while True:
+                while len(pending) < max_pending:
+                    batch = next(batches, None)
+                    if batch is None:
+                        break
+                    pending.add(executor.submit(_load_files, batch))
+                if not pending:
+                    break
+                finished, pending = wait(
+                    pending, timeout=0.01, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    try:
+                        songs = future.result()
+                    except Exception:
+                        # e.g. a worker process crashed
+                        print_exc()
+                        songs = []
+                    added.extend(songs)
+                    done += size
+                task.update(min(done, total) / total)
+                if len(added) > 100 or (added and need_added()):
+                    self.add(added)
+                    added = []
+                yield
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if added:
+            self.add(added)
+        yield True
+
     def get_content(self):
         """Return visible and masked items"""
 
@@ -280,6 +539,29 @@ class FileLibrary(Library[fsnative, AudioFile], PicklingMixin):
 
         return items
 
+    def _get_save_content(self):
+        if not (self.lazy_load and isinstance(self._contents, LazyItems)):
+            return super()._get_save_content()
+
+        items = list(self._contents.entries())
+        for masked in self._masked.values():
+            items.extend(masked.values())
+        # see get_content
+        items.sort(key=lambda item: item.key)
+        return items
+
+    def _get_saved_item(self, key):
+        item = self._contents.get(key)
+        if item is None:
+            for masked in self._masked.values():
+                if key in masked:
+                    return masked[key]
+        return item
+
+    def _has_saved_item(self, key):
+        return key in self._contents or any(
+            key in masked for masked in self._masked.values())
+
     def masked(self, item):
         """Return true if the item is in the library but masked."""
         try:
@@ -347,34 +629,31 @@ class FileLibrary(Library[fsnative, AudioFile], PicklingMixin):
                     self._name)
         if not new_path.is_dir():
             raise ValueError(f"Destination {new_path!r} is not a directory")
-        print_d(f"Checking entire library for {str(old_path)!r}", self._name)
+        print_d(f"Finding tracks below {str(old_path)!r}", self._name)
+        songs = self.path_index.items_below(str(old_path))
         missing: set[AudioFile] = set()
         changed = set()
-        total = len(self)
+        total = len(songs)
         if not total:
             return
         with Task(_("Library"), _("Moving library files")) as task:
             yield
-            for i, song in enumerate(list(self.values())):
+            for i, song in enumerate(songs):
                 task.update(i / total)
                 key = normalize_path(song.key)
-                path = Path(key)
-                if old_path in path.parents:
-                    # TODO: more Pathlib-friendly dir replacement...
-                    new_key = key.replace(str(old_path), str(new_path), 1)
-                    new_key = normalize_path(new_key, canonicalise=False)
-                    if new_key == key:
-                        print_w(f"Substitution failed for {key!r}", self._name)
-                    # We need to update ~filename and ~mountpoint
-                    song.sanitize()
-                    if write_files:
-                        song.write()
-                    if self.move_song(song, new_key):
-                        changed.add(song)
-                    else:
-                        missing.add(song)
-                elif not (i % 1000):
-                    print_d(f"Not moved, for example: {key!r}", self._name)
+                # TODO: more Pathlib-friendly dir replacement...
+                new_key = key.replace(str(old_path), str(new_path), 1)
+                new_key = normalize_path(new_key, canonicalise=False)
+                if new_key == key:
+                    print_w(f"Substitution failed for {key!r}", self._name)
+                # We need to update ~filename and ~mountpoint
+                song.sanitize()
+                if write_files:
+                    song.write()
+                if self.move_song(song, new_key):
+                    changed.add(song)
+                else:
+                    missing.add(song)
                 if not i % 100:
                     yield
             self.changed(changed)
@@ -401,25 +680,22 @@ class FileLibrary(Library[fsnative, AudioFile], PicklingMixin):
             # Continue - maybe it's already moved
         song.sanitize(new_path)
         self._contents[new_path] = song
+        if self._path_index is not None:
+            self._path_index.moved(key, new_path)
         return existed
 
     def remove_roots(self, old_roots: Iterable[str]) -> Generator[None, None, None]:
         """Remove library roots (scandirs) entirely, and all their songs"""
         old_paths = [Path(normalize_path(root, canonicalise=True)).expanduser()
                      for root in old_roots]
-        total = len(self)
         removed = set()
         print_d(f"Removing library roots {old_roots}", self._name)
         yield
         with Task(_("Library"), _("Removing library files")) as task:
-            for i, song in enumerate(list(self.values())):
-                task.update(i / total)
-                key = normalize_path(song.key)
-                song_path = Path(key)
-                if any(path in song_path.parents for path in old_paths):
-                    removed.add(song)
-                if not i % 100:
-                    yield
+            for i, path in enumerate(old_paths):
+                task.update(i / len(old_paths))
+                removed.update(self.path_index.items_below(str(path)))
+                yield
         if removed:
             self.remove(removed)
         else:
@@ -433,28 +709,62 @@ class WatchedFileLibraryMixin(FileLibrary):
     """A File Library that sets up monitors on directories at refresh
     and handles changes sensibly"""
 
+    watch_delay = 0
+    """Milliseconds to collect file events for before handling them.
+    Events for the same path in that time are merged into the last one."""
+
+    max_watches = 0
+    """Maximum number of directories to monitor (0 for no limit). Any
+    further directories are polled for changes instead."""
+
+    poll_interval = 60
+    """Seconds between checks of the polled directories"""
+
     def __init__(self, name=None):
         super().__init__(name)
         self._monitors: dict[Path, tuple[GObject.GObject, int]] = {}
+        self._polled: dict[Path, int | None] = {}
+        """Modification times of the polled directories"""
+        self._events: dict[Path, tuple[Gio.FileMonitorEvent, Path | None]] = {}
+        """Pending events and their other path, by path"""
+        self._events_id: int | None = None
+        self._poll_id: int | None = None
+        self._polling = False
         print_d(f"Initialised {self!r}")
 
     def monitor_dir(self, path: Path) -> None:
-        """Monitors a single directory"""
+        """Monitors a single directory, or polls it once there are
+        `max_watches` monitors"""
 
         # Only add one monitor per absolute path...
-        if path not in self._monitors:
-            f = Gio.File.new_for_path(str(path))
-            try:
-                monitor = f.monitor_directory(Gio.FileMonitorFlags.WATCH_MOVES, None)
-            except GLib.GError as e:
-                print_w(f"Couldn't watch {path} ({e})", self._name)
-                monitor = None
-            if not monitor:
-                return
-            handler_id = monitor.connect("changed", self.__file_changed)
-            # Don't destroy references - http://stackoverflow.com/q/4535227
-            self._monitors[path] = (monitor, handler_id)
-            print_d(f"Monitoring {path!s}", self._name)
+        if path in self._monitors or path in self._polled:
+            return
+        if self.max_watches and len(self._monitors) >= self.max_watches:
+            self.poll_dir(path)
+            return
+        f = Gio.File.new_for_path(str(path))
+        try:
+            monitor = f.monitor_directory(Gio.FileMonitorFlags.WATCH_MOVES, None)
+        except GLib.GError as e:
+            print_w(f"Couldn't watch {path} ({e})", self._name)
+            monitor = None
+        if not monitor:
+            self.poll_dir(path)
+            return
+        handler_id = monitor.connect("changed", self.__file_changed)
+        # Don't destroy references - http://stackoverflow.com/q/4535227
+        self._monitors[path] = (monitor, handler_id)
+        print_d(f"Monitoring {path!s}", self._name)
+
+    def poll_dir(self, path: Path) -> None:
+        """Checks a directory for changes every `poll_interval` seconds"""
+
+        if path in self._polled:
+            return
+        self._polled[path] = _dir_mtime(path)
+        if self._poll_id is None:
+            self._poll_id = GLib.timeout_add_seconds(
+                self.poll_interval, self.__start_poll)
 
     def __file_changed(self, _monitor, main_file: Gio.File,
                        other_file: Gio.File | None,
@@ -464,96 +774,217 @@ class WatchedFileLibraryMixin(FileLibrary):
             # Or at least, not in CI anyway.
             # So shortcut the whole thing
             return
-        try:
-            file_path = main_file.get_path()
-            if file_path is None:
-                return
-            file_path = normalize_path(file_path, True)
-            song = self.get(file_path)
-            file_path = Path(file_path)
-            other_path = (Path(normalize_path(other_file.get_path(), True))
-                          if other_file else None)
-            if event in (Event.CREATED, Event.MOVED_IN):
-                if file_path.is_dir():
-                    self.monitor_dir(file_path)
-                    copool.add(self.scan, [str(file_path)])
-                elif not song:
-                    print_d(f"Auto-adding created file: {file_path}", self._name)
-                    self.add_filename(str(file_path))
-            elif event == Event.RENAMED:
-                if not other_path:
-                    print_w(f"No destination found for rename of {file_path}",
+        file_path = main_file.get_path()
+        if file_path is None:
+            return
+        other_path = (Path(normalize_path(other_file.get_path(), True))
+                      if other_file else None)
+        self.queue_event(Path(normalize_path(file_path, True)), event,
+                         other_path)
+
+    def queue_event(self, path: Path, event: Gio.FileMonitorEvent,
+                    other_path: Path | None = None) -> None:
+        """Handles a file event after `watch_delay`, together with all
+        other events by then"""
+
+        # Only the last event for a path matters, handle it in that order
+        self._events.pop(path, None)
+        self._events[path] = (event, other_path)
+        if self._events_id is None:
+            self._events_id = GLib.timeout_add(
+                self.watch_delay, self.__handle_events)
+
+    def flush_events(self) -> None:
+        """Handles all queued file events now"""
+
+        if self._events_id is not None:
+            GLib.source_remove(self._events_id)
+        self.__handle_events()
+
+    def __handle_events(self) -> bool:
+        self._events_id = None
+        events, self._events = self._events, {}
+        added: dict[str, AudioFile] = {}
+        changed: set[AudioFile] = set()
+        removed: set[AudioFile] = set()
+        gone: set[AudioFile] = set()
+        for path, (event, other_path) in events.items():
+            try:
+                self._handle_event(path, event, other_path,
+                                   added, changed, removed, gone)
+            except Exception:
+                print_w("Failed to run file monitor callback", self._name)
+                print_exc()
+        if added:
+            self.add(added.values())
+        if changed:
+            self.emit("changed", changed)
+        if removed:
+            self.emit("removed", removed)
+        gone -= removed
+        if gone:
+            actually_gone = self.remove(gone)
+            if gone != actually_gone:
+                print_w(f"Couldn't remove all: {gone - actually_gone}",
+                        self._name)
+        print_d(f"Finished handling {len(events)} file event(s)", self._name)
+        return False
+
+    def _handle_event(self, file_path: Path, event: Gio.FileMonitorEvent,
+                      other_path: Path | None, added: dict[str, AudioFile],
+                      changed: set[AudioFile], removed: set[AudioFile],
+                      gone: set[AudioFile]) -> None:
+        """Handles a file event, collecting new songs in `added`, reloaded
+        ones in `changed` and `removed`, and ones to remove in `gone`"""
+
+        def add(path):
+            song = self.add_filename(str(path), add=False)
+            if song is not None and song not in self:
+                added[song.key] = song
+
+        def reload(song):
+            if song not in removed:
+                self.reload(song, changed, removed)
+
+        song = self.get(str(file_path))
+        if event in (Event.CREATED, Event.MOVED_IN):
+            if file_path.is_dir():
+                self.monitor_dir(file_path)
+                copool.add(self.scan, [str(file_path)])
+            elif not song:
+                print_d(f"Auto-adding created file: {file_path}", self._name)
+                add(file_path)
+            elif not song.valid():
+                # Replaced, the deletion got merged into this event
+                reload(song)
+        elif event == Event.RENAMED:
+            if not other_path:
+                print_w(f"No destination found for rename of {file_path}",
+                        self._name)
+            if song:
+                print_d(f"Moving {file_path} to {other_path}...", self._name)
+                if self.move_song(song, str(other_path)):  # type:ignore
+                    print_w(f"Song {file_path} has gone")
+            elif self.is_monitored_dir(file_path):
+                if self.librarian:
+                    print_d(f"Moving tracks from {file_path} -> {other_path}...",
                             self._name)
-                if song:
-                    print_d(f"Moving {file_path} to {other_path}...", self._name)
-                    if self.move_song(song, str(other_path)):  # type:ignore
-                        print_w(f"Song {file_path} has gone")
-                elif self.is_monitored_dir(file_path):
-                    if self.librarian:
-                        print_d(f"Moving tracks from {file_path} -> {other_path}...",
-                                self._name)
-                        copool.add(self.librarian.move_root,
-                                   str(file_path), str(other_path),
-                                   write_files=False,
-                                   priority=GLib.PRIORITY_DEFAULT)
-                    self.unmonitor_dir(file_path)
-                    if other_path:
-                        self.monitor_dir(other_path)
-                else:
-                    if other_path:
-                        print_w(f"Seems {file_path} is not a track (deleted?)",
-                                self._name)
-                        # On some (Windows?) systems CHANGED is called which can remove
-                        # before we get here, so let's try adding the new path back
-                        self.add_filename(other_path)
-
-            elif event == Event.CHANGED:
-                if song:
-                    # QL created (or knew about) this one; still check if it changed
-                    if not song.valid():
-                        self.reload(song)
-                else:
-                    print_d(f"Auto-adding new file: {file_path}", self._name)
-                    self.add_filename(file_path)
-            elif event in (Event.MOVED_OUT, Event.DELETED):
-                if song:
-                    print_d(f"...so deleting {file_path}", self._name)
-                    self.reload(song)
+                    copool.add(self.librarian.move_root,
+                               str(file_path), str(other_path),
+                               write_files=False,
+                               priority=GLib.PRIORITY_DEFAULT)
+                self.unmonitor_dir(file_path)
+                if other_path:
+                    self.monitor_dir(other_path)
+            elif other_path:
+                existing = self.get(str(other_path))
+                if existing:
+                    # Written to a temporary file, then moved over the song
+                    reload(existing)
                 else:
-                    # either not a song, or a song that was renamed by QL
-                    if self.is_monitored_dir(file_path):
-                        self.unmonitor_dir(file_path)
-
-                    # And try to remove all songs under that dir. Slowly.
-                    gone = set()
-                    for key, song in self.iteritems():
-                        if file_path in Path(key).parents:
-                            gone.add(song)
-                    if gone:
-                        print_d(f"Removing {len(gone)} contained songs in {file_path}",
-                                self._name)
-                        actually_gone = self.remove(gone)
-                        if gone != actually_gone:
-                            print_w(f"Couldn't remove all: {gone - actually_gone}",
-                                    self._name)
+                    print_w(f"Seems {file_path} is not a track (deleted?)",
+                            self._name)
+                    # On some (Windows?) systems CHANGED is called which can
+                    # remove before we get here, so let's try adding the new
+                    # path back
+                    add(other_path)
+        elif event == Event.CHANGED:
+            if song:
+                # QL created (or knew about) this one; still check if it changed
+                if not song.valid():
+                    reload(song)
             else:
-                print_d(f"Unhandled event {event} on {file_path} ({other_path})",
-                        self._name)
-                return
-        except Exception:
-            print_w("Failed to run file monitor callback", self._name)
-            print_exc()
-        print_d(f"Finished handling {event}", self._name)
+                print_d(f"Auto-adding new file: {file_path}", self._name)
+                add(file_path)
+        elif event in (Event.MOVED_OUT, Event.DELETED):
+            if song:
+                print_d(f"...so deleting {file_path}", self._name)
+                reload(song)
+            else:
+                # either not a song, or a song that was renamed by QL
+                if self.is_monitored_dir(file_path):
+                    self.unmonitor_dir(file_path)
+
+                # And try to remove all songs under that dir
+                contained = set(self.path_index.items_below(str(file_path)))
+                if contained:
+                    print_d(f"Removing {len(contained)} contained songs "
+                            f"in {file_path}", self._name)
+                    gone.update(contained)
+        else:
+            print_d(f"Unhandled event {event} on {file_path} ({other_path})",
+                    self._name)
+
+    def __start_poll(self) -> bool:
+        if not self._polled:
+            self._poll_id = None
+            return False
+        if not self._polling:
+            self._polling = True
+            copool.add(self._poll_dirs, funcid="poll_library")
+        return True
+
+    def _poll_dirs(self) -> Generator[None, None, None]:
+        """Checks the polled directories for changes, and queues events for
+        the files and directories which changed in them"""
+
+        outdated = []
+        for i, (path, old_mtime) in enumerate(list(self._polled.items())):
+            if _dir_mtime(path) != old_mtime:
+                outdated.append(path)
+            if not i % 200:
+                yield
+        self._polling = False
+        if not outdated:
+            return
+        print_d(f"{len(outdated)} polled dir(s) changed", self._name)
+
+        by_dir, _others = self._group_by_dir()
+        missing = set()
+        for path in outdated:
+            if path not in self._polled:
+                continue
+            dir_mtime = self._polled[path] = _dir_mtime(path)
+            if dir_mtime is None:
+                missing.add(path)
+                continue
+            try:
+                with os.scandir(path) as it:
+                    entries = [(entry.name, entry.is_dir()) for entry in it]
+            except OSError:
+                continue
+            for name, is_dir in entries:
+                child = path / name
+                if is_dir:
+                    if child not in self._polled and child not in self._monitors:
+                        self.queue_event(child, Event.CREATED)
+                elif (formats.filter(name)
+                      and not self.contains_filename(str(child))):
+                    self.queue_event(child, Event.CREATED)
+            items = by_dir.get(str(path), {})
+            for song in self._outdated_in_dir(str(path), items):
+                self.queue_event(Path(song.key), Event.CHANGED)
+        for path in missing:
+            if not any(parent in missing for parent in path.parents):
+                self.queue_event(path, Event.DELETED)
 
     def is_monitored_dir(self, path: Path) -> bool:
-        return path in self._monitors
+        return path in self._monitors or path in self._polled
 
     def unmonitor_dir(self, path: Path) -> None:
-        """Disconnect and remove any monitor for a directory, if found"""
-
+        """Disconnect and remove any monitor for a directory, if found.
+        Stops polling it and all directories below it."""
+
+        polled = path in self._polled
+        self._polled.pop(path, None)
+        for other in list(self._polled):
+            if path in other.parents:
+                del self._polled[other]
         monitor, handler_id = self._monitors.get(path, (None, None))
         if not monitor:
-            print_d(f"Couldn't find path {path} in active monitors", self._name)
+            if not polled:
+                print_d(f"Couldn't find path {path} in active monitors",
+                        self._name)
             return
         monitor.disconnect(handler_id)
         del self._monitors[path]
@@ -591,6 +1022,17 @@ class WatchedFileLibraryMixin(FileLibrary):
         for monitor, handler_id in self._monitors.values():
             monitor.disconnect(handler_id)
         self._monitors.clear()
+        self._polled.clear()
+        self._events.clear()
+        if self._events_id is not None:
+            GLib.source_remove(self._events_id)
+            self._events_id = None
+        if self._poll_id is not None:
+            GLib.source_remove(self._poll_id)
+            self._poll_id = None
+        if self._polling:
+            copool.remove("poll_library")
+            self._polling = False
 
     def destroy(self):
         self.stop_watching()
@@ -0,0 +1,229 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""Shadow columns of folded (see `unisearch.fold`) tag values, which
+`Query` can search for plain text instead of running the regular
+expressions `re_add_variants` creates against every song.
+"""
+
+import sys
+from bisect import bisect_right
+from collections.abc import Collection, Iterable
+
+from quodlibet import print_d
+from quodlibet.formats import AudioFile
+from quodlibet.library.index import is_indexable, tag_value
+from quodlibet.unisearch.fold import fold
+from quodlibet.util import format_size
+
+_SEPARATOR = "\0"
+"""Between the values of a column, can't be part of a search word"""
+
+
+class _Column:
+    """The folded values of a single tag"""
+
+    __slots__ = ("values", "_songs", "_texts", "_starts", "_text")
+
+    def __init__(self):
+        self.values: dict[AudioFile, str] = {}
+        """Folded text by song"""
+        self._songs: list[AudioFile] = []
+        self._texts: list[str] = []
+        self._starts: list[int] = []
+        self._text: str | None = None
+        """All values joined, None if outdated"""
+
+    def update(self, song, text):
+        self.values[song] = fold(text)
+        self._text = None
+
+    def remove(self, song):
+        if self.values.pop(song, None) is not None:
+            self._text = None
+
+    def _join(self):
+        self._songs = list(self.values)
+        self._texts = texts = list(self.values.values())
+        starts = []
+        position = 0
+        for text in texts:
+            starts.append(position)
+            position += len(text) + 1
+        self._starts = starts
+        self._text = _SEPARATOR.join(texts)
+
+    def find(self, part: str) -> set[int]:
+        """Returns the positions (in `songs`) of the songs whose folded value
+        contains `part`"""
+
+        text = self._joined()
+        starts = self._starts
+        count = len(starts)
+        found = set()
+        i = text.find(part)
+        while i != -1:
+            index = bisect_right(starts, i) - 1
+            found.add(index)
+            if index + 1 == count:
+                break
+            if len(found) > count // 32:
+                # Matches most values, checking them one by one is faster
+                texts = self._texts
+                found.update(j for j in range(index + 1, count)
+                             if part in texts[j])
+                break
+            i = text.find(part, starts[index + 1])
+        return found
+
+    def _joined(self) -> str:
+        if self._text is None:
+            self._join()
+        assert self._text is not None
+        return self._text
+
+    def lookup(self, parts: list[str]) -> set[AudioFile]:
+        # Start with the part found the least often, and only check the
+        # values of those songs for the others
+        count = self._joined().count
+        first, *others = sorted(set(parts), key=count)
+        positions = self.find(first)
+        texts = self._texts
+        for part in others:
+            if not positions:
+                break
+            positions = {i for i in positions if part in texts[i]}
+        songs = self._songs
+        return {songs[i] for i in positions}
+
+    def memory_usage(self) -> int:
+        size = sys.getsizeof(self.values) + sys.getsizeof(self._starts)
+        size += sum(sys.getsizeof(value) for value in self.values.values())
+        if self._text is not None:
+            size += sys.getsizeof(self._text) + sys.getsizeof(self._songs)
+            size += sys.getsizeof(self._texts)
+        return size
+
+
+class FoldedText:
+    """Keeps a case and diacritic insensitive copy of the tag values `Tag`
+    query nodes search, up to date through the library's signals.
+
+    Like a `TagIndex` it returns the candidate songs for parts of the text
+    a query searches for, but by searching all values of a tag joined
+    into one string instead of keeping an index of their words.
+    Tags are added the first time they are looked up.
+    """
+
+    def __init__(self, library):
+        self._library = library
+        self._columns: dict[str, _Column] = {}
+        self._order: dict[AudioFile, int] = {}
+        self._next = 0
+        self._sigs = [
+            library.connect("added", self.__added),
+            library.connect("changed", self.__changed),
+            library.connect("removed", self.__removed),
+        ]
+
+    def destroy(self):
+        for sig in self._sigs:
+            self._library.disconnect(sig)
+        self._sigs = []
+        self.clear()
+
+    def clear(self):
+        """Drop all columns"""
+
+        self._columns.clear()
+        self._order.clear()
+
+    @property
+    def tags(self) -> list[str]:
+        """The tags with a column so far"""
+
+        return list(self._columns)
+
+    def _sync(self):
+        # Catch up with changes still waiting to be signalled
+        self._library.flush_signals()
+        # Loading a library doesn't emit signals, start over in that case
+        if len(self._order) != len(self._library):
+            self.clear()
+        if not self._order:
+            for song in self._library.values():
+                self._order[song] = self._next
+                self._next += 1
+
+    def _get_column(self, name: str) -> _Column | None:
+        column = self._columns.get(name)
+        if column is None:
+            if not is_indexable(name):
+                return None
+            column = _Column()
+            for song in self._order:
+                column.update(song, tag_value(song, name))
+            self._columns[name] = column
+            print_d(f"Folded {len(column.values)} values of {name!r}, using "
+                    f"{format_size(column.memory_usage())}",
+                    self._library._name)
+        return column
+
+    def lookup(self, name: str, parts: Iterable[str]) -> set[AudioFile] | None:
+        """Returns all songs where the folded value of tag `name` contains
+        all of the (folded) `parts`, or None if `name` can't be cached.
+        """
+
+        self._sync()
+        column = self._get_column(name)
+        if column is None:
+            return None
+        parts = list(parts)
+        if not parts:
+            return set(self._order)
+        return column.lookup(parts)
+
+    def ordered(self, songs: Collection[AudioFile]) -> list[AudioFile]:
+        """Returns `songs` in the order they were added to the library"""
+
+        self._sync()
+        if len(songs) > len(self._order) // 4:
+            # Cheaper than sorting for many songs
+            return [song for song in self._order if song in songs]
+        return sorted(songs, key=self._order.__getitem__)
+
+    def memory_usage(self) -> dict[str, int]:
+        """Returns the approximate size of the columns in bytes by tag"""
+
+        return {name: column.memory_usage()
+                for name, column in self._columns.items()}
+
+    def __add(self, songs):
+        for song in songs:
+            self._order[song] = self._next
+            self._next += 1
+        for name, column in self._columns.items():
+            for song in songs:
+                column.update(song, tag_value(song, name))
+
+    def __added(self, library, songs):
+        if self._order:
+            self.__add([s for s in songs if s not in self._order])
+
+    def __changed(self, library, songs):
+        if not self._columns:
+            return
+        songs = [s for s in songs if s in self._order]
+        for name, column in self._columns.items():
+            for song in songs:
+                column.update(song, tag_value(song, name))
+
+    def __removed(self, library, songs):
+        if not self._order:
+            return
+        for song in songs:
+            if self._order.pop(song, None) is not None:
+                for column in self._columns.values():
+                    column.remove(song)
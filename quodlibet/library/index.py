@@ -0,0 +1,238 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""An inverted index of the words in song tags, used by `Query` to find
+candidate songs without searching through the whole library.
+"""
+
+import sys
+from collections.abc import Collection, Iterable
+
+from quodlibet import print_d
+from quodlibet.formats import FILESYSTEM_TAGS, AudioFile
+from quodlibet.formats._audio import VOLATILE_TAGS
+from quodlibet.unisearch.fold import fold_words
+from quodlibet.util import tagsplit, format_size
+from senf import fsn2text, fsnative
+
+
+def tag_value(song: AudioFile, name: str) -> str:
+    """The text a `Tag` query node searches for the tag `name`"""
+
+    if name[:1] == "~":
+        if name in FILESYSTEM_TAGS:
+            return fsn2text(song(name, fsnative()))
+        return song(name)
+    value = song.get(name)
+    if value is None:
+        if name in ("filename", "mountpoint"):
+            return fsn2text(song.get("~" + name, fsnative()))
+        return song.get("~" + name, "")
+    return value
+
+
+def is_indexable(name: str) -> bool:
+    if name.startswith("~#"):
+        return False
+    return not any(tag in VOLATILE_TAGS or "~" + tag in VOLATILE_TAGS
+                   for tag in tagsplit(name))
+
+
+class _TagWords:
+    """The words of a single tag"""
+
+    __slots__ = ("songs", "words")
+
+    def __init__(self):
+        self.songs: dict[str, AudioFile | set[AudioFile]] = {}
+        """Songs by word. Most words only occur in a single song, which is
+        stored without a set to save memory."""
+        self.words: dict[AudioFile, tuple[str, ...]] = {}
+        """Words by song, to find them again once the song has changed"""
+
+    def add(self, song, text):
+        words = tuple(sys.intern(word) for word in set(fold_words(text)))
+        if not words:
+            return
+        songs = self.songs
+        for word in words:
+            entry = songs.get(word)
+            if entry is None:
+                songs[word] = song
+            elif isinstance(entry, set):
+                entry.add(song)
+            else:
+                songs[word] = {entry, song}
+        self.words[song] = words
+
+    def remove(self, song):
+        songs = self.songs
+        for word in self.words.pop(song, ()):
+            entry = songs[word]
+            if not isinstance(entry, set):
+                del songs[word]
+            else:
+                entry.discard(song)
+                if len(entry) == 1:
+                    songs[word] = entry.pop()
+
+    def lookup(self, parts: Iterable[str]) -> set[AudioFile]:
+        """Songs with words containing each of `parts`"""
+
+        parts = set(parts)
+        matches: dict[str, list] = {part: [] for part in parts}
+        for word, entry in self.songs.items():
+            for part in parts:
+                if part in word:
+                    matches[part].append(entry)
+
+        # start with the rarest part, then check the words of the
+        # remaining songs for the others
+        def count(entries):
+            return sum(len(e) if isinstance(e, set) else 1 for e in entries)
+
+        rarest = min(parts, key=lambda part: count(matches[part]))
+        result = set()
+        for entry in matches[rarest]:
+            if isinstance(entry, set):
+                result |= entry
+            else:
+                result.add(entry)
+        words = self.words
+        for part in parts - {rarest}:
+            if not result:
+                break
+            result = {song for song in result
+                      if any(part in word for word in words[song])}
+        return result
+
+    def memory_usage(self) -> int:
+        size = sys.getsizeof(self.songs) + sys.getsizeof(self.words)
+        for word, entry in self.songs.items():
+            size += sys.getsizeof(word)
+            if isinstance(entry, set):
+                size += sys.getsizeof(entry)
+        for words in self.words.values():
+            size += sys.getsizeof(words)
+        return size
+
+
+class TagIndex:
+    """Maps folded words (see `unisearch.fold`) of tag values to the songs
+    containing them, kept up to date through the library's signals.
+
+    Tags are indexed the first time they are looked up. Songs modified
+    without a 'changed' signal are only re-indexed after the next one.
+    """
+
+    def __init__(self, library):
+        self._library = library
+        self._tags: dict[str, _TagWords] = {}
+        self._order: dict[AudioFile, int] = {}
+        self._next = 0
+        self._sigs = [
+            library.connect("added", self.__added),
+            library.connect("changed", self.__changed),
+            library.connect("removed", self.__removed),
+        ]
+
+    def destroy(self):
+        for sig in self._sigs:
+            self._library.disconnect(sig)
+        self._sigs = []
+        self.clear()
+
+    def clear(self):
+        """Drop all indexed tags"""
+
+        self._tags.clear()
+        self._order.clear()
+
+    @property
+    def tags(self) -> list[str]:
+        """The tags indexed so far"""
+
+        return list(self._tags)
+
+    def _sync(self):
+        # Catch up with changes still waiting to be signalled
+        self._library.flush_signals()
+        # Loading a library doesn't emit signals, start over in that case
+        if len(self._order) != len(self._library):
+            self.clear()
+        if not self._order:
+            for song in self._library.values():
+                self._order[song] = self._next
+                self._next += 1
+
+    def _get_tag(self, name: str) -> _TagWords | None:
+        words = self._tags.get(name)
+        if words is None:
+            if not is_indexable(name):
+                return None
+            words = _TagWords()
+            for song in self._order:
+                words.add(song, tag_value(song, name))
+            self._tags[name] = words
+            print_d(f"Indexed {len(words.songs)} words of {name!r}, using "
+                    f"{format_size(words.memory_usage())}",
+                    self._library._name)
+        return words
+
+    def lookup(self, name: str, parts: Iterable[str]) -> set[AudioFile] | None:
+        """Returns all songs where the value of tag `name` has words
+        containing all of the (folded) word `parts`, or None if `name` can't
+        be indexed.
+        """
+
+        self._sync()
+        words = self._get_tag(name)
+        if words is None:
+            return None
+        parts = list(parts)
+        if not parts:
+            return set(self._order)
+        return words.lookup(parts)
+
+    def ordered(self, songs: Collection[AudioFile]) -> list[AudioFile]:
+        """Returns `songs` in the order they were added to the library"""
+
+        self._sync()
+        return sorted(songs, key=self._order.__getitem__)
+
+    def memory_usage(self) -> dict[str, int]:
+        """Returns the approximate size of the index in bytes by tag"""
+
+        return {name: words.memory_usage()
+                for name, words in self._tags.items()}
+
+    def __add(self, songs):
+        for song in songs:
+            self._order[song] = self._next
+            self._next += 1
+        for name, words in self._tags.items():
+            for song in songs:
+                words.add(song, tag_value(song, name))
+
+    def __added(self, library, songs):
+        if self._order:
+            self.__add([s for s in songs if s not in self._order])
+
+    def __changed(self, library, songs):
+        if not self._tags:
+            return
+        songs = [s for s in songs if s in self._order]
+        for name, words in self._tags.items():
+            for song in songs:
+                words.remove(song)
+                words.add(song, tag_value(song, name))
+
+    def __removed(self, library, songs):
+        if not self._order:
+            return
+        for song in songs:
+            if self._order.pop(song, None) is not None:
+                for words in self._tags.values():
+                    words.remove(song)
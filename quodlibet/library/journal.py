@@ -0,0 +1,415 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""Append-only persistence for libraries.
+
+The on-disk store consists of a base snapshot, which is the same pickled
+item list `PicklingMixin` writes (so existing `songs` files are valid
+snapshots), and a journal file next to it containing records of items
+that were added or changed and keys that were removed since the snapshot
+was written.
+
+The journal header identifies the snapshot it belongs to, so a journal
+left behind by an interrupted compaction or written by an older version
+is never replayed on top of the wrong snapshot.
+"""
+
+import os
+import pickle
+import struct
+import threading
+import zlib
+from collections.abc import Iterable
+
+from quodlibet import util
+from quodlibet.formats import (load_audio_files, dump_audio_files,
+                               SerializationError)
+from quodlibet.library.base import PicklingMixin, _load_items
+from quodlibet.library.lazy import LazyItems
+from quodlibet.util.atomic import atomic_save
+from quodlibet.util.dprint import print_d, print_w
+from quodlibet.util.path import mkdir
+from quodlibet.util.picklehelper import pickle_dumps, pickle_loads
+from quodlibet.util.thread import call_async_background, Cancellable
+
+JOURNAL_SUFFIX = ".journal"
+
+_MAGIC = b"QLJ1"
+_HEADER = struct.Struct("<4sQQ")
+_RECORD = struct.Struct("<cII")
+
+_PUT = b"P"
+_DELETE = b"D"
+
+# Held while replacing a snapshot, so a background compaction can't
+# overwrite a newer snapshot written in the meantime
+_snapshot_lock = threading.Lock()
+
+
+def journal_path(filename):
+    """The path of the journal belonging to the snapshot `filename`"""
+
+    return filename + JOURNAL_SUFFIX
+
+
+def snapshot_id(filename):
+    """Returns a (size, mtime_ns) tuple identifying the current state
+    of the snapshot file or None if it doesn't exist.
+    """
+
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def _pack_header(snapshot):
+    size, mtime_ns = snapshot
+    return _HEADER.pack(_MAGIC, size, mtime_ns)
+
+
+def _pack_record(op, payload):
+    return _RECORD.pack(op, len(payload), zlib.crc32(payload)) + payload
+
+
+def read_journal(filename, snapshot):
+    """Reads all complete records of a journal.
+
+    Returns a list of (op, payload) tuples, or None if the journal doesn't
+    exist or doesn't belong to the given snapshot. A truncated or corrupt
+    record (e.g. from a crash while appending) ends the journal.
+    """
+
+    try:
+        with open(filename, "rb") as fileobj:
+            data = fileobj.read()
+    except OSError:
+        return None
+
+    if snapshot is None or data[:_HEADER.size] != _pack_header(snapshot):
+        return None
+
+    records = []
+    offset = _HEADER.size
+    while offset + _RECORD.size <= len(data):
+        op, length, crc = _RECORD.unpack_from(data, offset)
+        start = offset + _RECORD.size
+        payload = data[start:start + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            print_w(f"Ignoring truncated journal record at offset {offset}")
+            break
+        records.append((op, payload))
+        offset = start + length
+    return records
+
+
+def replay_journal(items, records):
+    """Applies journal records to a list of items, or to `LazyItems`
+    in place.
+
+    Returns a new list of items or the `LazyItems`.
+    """
+
+    lazy = isinstance(items, LazyItems)
+    contents = items if lazy else {item.key: item for item in items}
+    for op, payload in records:
+        try:
+            if op == _PUT:
+                for item in load_audio_files(payload):
+                    contents[item.key] = item
+            elif op == _DELETE:
+                for key in pickle_loads(payload):
+                    contents.pop(key, None)
+            else:
+                print_w(f"Unknown journal record type {op!r}")
+        except (SerializationError, pickle.UnpicklingError):
+            util.print_exc()
+    return contents if lazy else list(contents.values())
+
+
+def _get_keys(items) -> list:
+    if isinstance(items, LazyItems):
+        return list(items.keys())
+    return [item.key for item in items]
+
+
+class JournalingMixin(PicklingMixin):
+    """Like `PicklingMixin` but saves by appending the items that were
+    added, changed or removed since the last save to a journal instead of
+    rewriting everything.
+
+    Changes are tracked through the library's own signals. Once the
+    journal grows too large compared to the snapshot it gets folded into
+    a new snapshot in a background thread.
+
+    Items modified without a 'changed' signal only get persisted
+    on the next compaction.
+    """
+
+    use_journal = True
+    """If False, `save` always writes a full snapshot (and drops the journal)"""
+
+    journal_compact_ratio = 0.5
+    """Compact once the journal exceeds this fraction of the snapshot size"""
+
+    journal_compact_min = 4 * 1024 * 1024
+    """...but never for journals smaller than this many bytes"""
+
+    _journal_snapshot = None
+    _journal_size = 0
+    _journal_compaction = None
+    _journal_sigs = None
+    _journal_lazy = False
+
+    def load(self, filename):
+        """Load a library from a snapshot and replay its journal.
+
+        Loading does not cause added, changed, or removed signals.
+        """
+
+        self.filename = filename
+        print_d(f"Loading contents of {filename!r}.", self._name)
+
+        snapshot = snapshot_id(filename)
+        items = _load_items(filename)
+        if not items:
+            # Missing or broken, make sure the next save writes everything
+            snapshot = None
+
+        jfilename = journal_path(filename)
+        records = read_journal(jfilename, snapshot)
+        if records is None:
+            if os.path.exists(jfilename):
+                print_w(f"Discarding journal {jfilename!r} which doesn't "
+                        f"match the library snapshot", self._name)
+                self._remove_journal(jfilename)
+        elif records:
+            print_d(f"Replaying {len(records)} journal record(s)", self._name)
+            items = replay_journal(items, records)
+
+        keys = _get_keys(items)
+        self._journal_lazy = isinstance(items, LazyItems)
+        self._load_init(items)
+        size = os.path.getsize(jfilename) if records is not None else 0
+        self._journal_start(snapshot, keys, size)
+
+        print_d(f"Done loading contents of {filename!r}", self._name)
+
+    def _journal_start(self, snapshot, keys: Iterable, size: int):
+        """Start tracking changes relative to what is on disk"""
+
+        if self._journal_sigs is None:
+            self._journal_sigs = [
+                self.connect("added", self.__journal_added),
+                self.connect("changed", self.__journal_changed),
+                self.connect("removed", self.__journal_removed),
+            ]
+        self._journal_snapshot = snapshot
+        self._journal_size = size
+        self._journal_keys = set(keys)
+        self._journal_pending = set()
+        self._journal_added = set()
+        self._journal_removed = set()
+
+    def __journal_added(self, library, items):
+        self._journal_pending.update(items)
+        self._journal_added.update(item.key for item in items)
+
+    def __journal_changed(self, library, items):
+        self._journal_pending.update(items)
+
+    def __journal_removed(self, library, items):
+        self._journal_removed.update(item.key for item in items)
+
+    def _get_saved_item(self, key):
+        """Returns the item `_get_save_content` would include for `key`,
+        or None.
+        """
+
+        return self._contents.get(key)
+
+    def _has_saved_item(self, key) -> bool:
+        """If `_get_save_content` includes an item for `key`, without
+        loading it"""
+
+        return key in self._contents
+
+    def save(self, filename=None):
+        """Save the library to the given filename, or the default if `None`.
+
+        Unless a full save is needed this only appends to the journal.
+        """
+
+        if filename is None:
+            filename = self.filename
+
+        # the journal only knows about changes through signals
+        self.flush_signals()
+        if (not self.use_journal or filename != self.filename
+                or self._journal_lazy != self.lazy_load
+                or self._journal_snapshot is None
+                or snapshot_id(filename) != self._journal_snapshot):
+            self.compact(filename)
+            return
+
+        try:
+            self._append_journal(journal_path(filename))
+        except SerializationError:
+            util.print_exc()
+        except OSError:
+            print_w(f"Couldn't save library journal for {filename!r}",
+                    self._name)
+        else:
+            self.dirty = False
+
+        limit = max(self.journal_compact_min,
+                    self._journal_snapshot[0] * self.journal_compact_ratio)
+        if self._journal_size > limit:
+            self._compact_async(filename)
+
+    def _append_journal(self, jfilename):
+        persisted = self._journal_keys
+        get_saved = self._get_saved_item
+        has_saved = self._has_saved_item
+        put = [item for item in self._journal_pending
+               if get_saved(item.key) is item]
+        if any(item.key not in persisted
+               and item.key not in self._journal_added for item in put):
+            # Renamed without a 'removed' signal for the old key
+            removed = [key for key in persisted if not has_saved(key)]
+        else:
+            removed = [key for key in self._journal_removed
+                       if key in persisted and not has_saved(key)]
+
+        data = b""
+        if put:
+            data += _pack_record(_PUT, dump_audio_files(put))
+        if removed:
+            data += _pack_record(_DELETE, pickle_dumps(removed, 2))
+
+        if data:
+            print_d(f"Journaling {len(put)} changed and {len(removed)} "
+                    f"removed item(s)", self._name)
+            exists = os.path.exists(jfilename)
+            with open(jfilename, "ab") as fileobj:
+                if not exists or not fileobj.tell():
+                    data = _pack_header(self._journal_snapshot) + data
+                fileobj.write(data)
+                fileobj.flush()
+                os.fsync(fileobj.fileno())
+                self._journal_size = fileobj.tell()
+
+        persisted.difference_update(removed)
+        persisted.update(item.key for item in put)
+        self._journal_pending.clear()
+        self._journal_added.clear()
+        self._journal_removed.clear()
+
+    def compact(self, filename=None):
+        """Write a full snapshot and start a new, empty journal"""
+
+        if filename is None:
+            filename = self.filename
+
+        print_d(f"Saving contents to {filename!r}", self._name)
+
+        self.flush_signals()
+        if self._journal_compaction is not None:
+            self._journal_compaction.cancel()
+            self._journal_compaction = None
+
+        items = self._get_save_content()
+        try:
+            data = self._dump_content(items)
+        except SerializationError:
+            util.print_exc()
+            return
+
+        with _snapshot_lock:
+            if not self._write_snapshot(filename, data):
+                return
+            if filename == self.filename:
+                self._remove_journal(journal_path(filename))
+                snapshot = snapshot_id(filename) if self.use_journal else None
+                self._journal_start(snapshot, _get_keys(items), 0)
+                self._journal_lazy = self.lazy_load
+        self.dirty = False
+
+    def _compact_async(self, filename):
+        """Write a new snapshot in a thread and then swap in a journal
+        containing only what was appended in the meantime.
+        """
+
+        if self._journal_compaction is not None:
+            return
+
+        print_d(f"Compacting library journal ({self._journal_size} bytes)",
+                self._name)
+        cancellable = Cancellable()
+        self._journal_compaction = cancellable
+        call_async_background(
+            self._compact_in_thread, cancellable, self.__compacted,
+            args=(filename, self._get_save_content(), self._journal_size,
+                  cancellable))
+
+    def _compact_in_thread(self, filename, items, offset, cancellable):
+        """Returns (filename, snapshot, offset) or None on failure"""
+
+        try:
+            data = self._dump_content(items)
+        except Exception:
+            # The library was modified while pickling. Try again next time.
+            util.print_exc()
+            return None
+        with _snapshot_lock:
+            if cancellable.is_cancelled():
+                return None
+            if not self._write_snapshot(filename, data):
+                return None
+            return filename, snapshot_id(filename), offset
+
+    def __compacted(self, result):
+        self._journal_compaction = None
+        if result is None:
+            return
+        filename, snapshot, offset = result
+        jfilename = journal_path(filename)
+        try:
+            with open(jfilename, "rb") as fileobj:
+                fileobj.seek(offset)
+                tail = fileobj.read()
+            with atomic_save(jfilename, "wb") as fileobj:
+                fileobj.write(_pack_header(snapshot) + tail)
+        except OSError:
+            # The snapshot is newer than the journal now; the next save
+            # will write a full snapshot.
+            print_w(f"Couldn't rewrite library journal {jfilename!r}",
+                    self._name)
+            self._journal_snapshot = None
+            return
+        self._journal_snapshot = snapshot
+        self._journal_size = _HEADER.size + len(tail)
+        self._journal_lazy = self.lazy_load
+        print_d(f"Compacted library journal, {len(tail)} bytes remaining",
+                self._name)
+
+    def _write_snapshot(self, filename, data) -> bool:
+        try:
+            mkdir(os.path.dirname(filename))
+            with atomic_save(filename, "wb") as fileobj:
+                fileobj.write(data)
+        except OSError:
+            print_w(f"Couldn't save library to path {filename!r}", self._name)
+            return False
+        return True
+
+    def _remove_journal(self, jfilename):
+        try:
+            os.remove(jfilename)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            util.print_exc()
@@ -0,0 +1,457 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""An indexed library file format which can be loaded lazily.
+
+Instead of one pickled list, every item is stored as a separate record
+of its tags, followed by a table with the keys, offsets, classes and
+mount points of all records. Loading only reads the table; the file itself gets
+memory-mapped, and `LazyItems` turns records into items the first time
+they are accessed. Single tags can be read straight from a record
+without creating the item.
+
+Layout (little endian):
+
+    header:  magic, table offset (u64)
+    records: tag count (u16), size of the keys (u32), the keys separated
+             by NUL, a type (char) and end offset (u32) for every value,
+             the values
+    table:   a pickled dict (see `dump_items`)
+
+Items with more than 65534 tags or NUL in a key are pickled as a whole.
+"""
+
+import importlib
+import mmap
+import pickle
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Iterator, MutableMapping
+
+from quodlibet.formats import AudioFile, SerializationError, intern_tag
+from quodlibet.util import is_windows
+from quodlibet.util.dprint import print_w
+from quodlibet.util.picklehelper import pickle_dumps, pickle_loads
+
+_MAGIC = b"QLL1"
+_HEADER = struct.Struct("<4sQ")
+_RECORD = struct.Struct("<HI")
+_END = struct.Struct("<I")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+
+_PICKLED_RECORD = 0xFFFF
+"""Tag count of records containing a pickled dict"""
+
+_STR, _INT_TYPE, _FLOAT_TYPE, _PICKLE = b"sifp"
+
+
+def is_lazy_file(fileobj) -> bool:
+    """If the file at the current position of `fileobj` is in this format.
+    Doesn't change the position.
+    """
+
+    pos = fileobj.tell()
+    try:
+        return fileobj.read(len(_MAGIC)) == _MAGIC
+    finally:
+        fileobj.seek(pos)
+
+
+def _encode_str(text: str) -> bytes:
+    # file names can contain surrogates
+    return text.encode("utf-8", "surrogatepass")
+
+
+def _decode_str(data) -> str:
+    return str(data, "utf-8", "surrogatepass")
+
+
+def _encode_value(value) -> tuple[int, bytes]:
+    kind = type(value)
+    if kind is str:
+        return _STR, _encode_str(value)
+    elif kind is int and -2 ** 63 <= value < 2 ** 63:
+        return _INT_TYPE, _INT.pack(value)
+    elif kind is float:
+        return _FLOAT_TYPE, _FLOAT.pack(value)
+    return _PICKLE, pickle_dumps(value, 2)
+
+
+def _decode_value(kind: int, data):
+    if kind == _STR:
+        return _decode_str(data)
+    elif kind == _INT_TYPE:
+        return _INT.unpack(data)[0]
+    elif kind == _FLOAT_TYPE:
+        return _FLOAT.unpack(data)[0]
+    elif kind == _PICKLE:
+        return pickle_loads(data)
+    raise SerializationError(f"Unknown value type {kind!r}")
+
+
+def _class_name(cls: type) -> tuple[str, str]:
+    return cls.__module__, cls.__qualname__
+
+
+def _find_class(module: str, name: str) -> type | None:
+    try:
+        obj = importlib.import_module(module)
+        for part in name.split("."):
+            obj = getattr(obj, part)
+    except (ImportError, AttributeError):
+        return None
+    return obj if isinstance(obj, type) else None
+
+
+def _pack_array(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpack_array(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class _Record:
+    """A record which hasn't been loaded yet, for writing it unchanged"""
+
+    __slots__ = ("_items", "_index", "key")
+
+    def __init__(self, items: "LazyItems", index: int, key):
+        self._items = items
+        self._index = index
+        self.key = key
+
+    @property
+    def class_name(self) -> tuple[str, str]:
+        items = self._items
+        return items._class_names[items._record_classes[self._index]]
+
+    @property
+    def mountpoint(self):
+        items = self._items
+        return items._mountpoints[items._mounts[self._index]]
+
+    @property
+    def data(self) -> bytes:
+        return self._items._record(self._index)
+
+
+def _encode_item(item) -> bytes:
+    keys = []
+    kinds = bytearray()
+    ends = array("I")
+    values = []
+    end = 0
+    for key, value in dict.items(item):
+        if not isinstance(key, str):
+            raise SerializationError(f"Invalid key {key!r} in {item.key!r}")
+        try:
+            kind, value = _encode_value(value)
+        except pickle.PicklingError as e:
+            raise SerializationError(e) from e
+        keys.append(_encode_str(key))
+        kinds.append(kind)
+        end += len(value)
+        ends.append(end)
+        values.append(value)
+
+    if len(keys) >= _PICKLED_RECORD or any(b"\0" in key for key in keys):
+        try:
+            return (_RECORD.pack(_PICKLED_RECORD, 0)
+                    + pickle_dumps(dict(dict.items(item)), 2))
+        except pickle.PicklingError as e:
+            raise SerializationError(e) from e
+    keys = b"\0".join(keys)
+    return b"".join(
+        [_RECORD.pack(len(kinds), len(keys)), keys, kinds, _pack_array(ends)]
+        + values)
+
+
+def _decode_record(data: bytes) -> Iterator[tuple[bytes, object]]:
+    """Yields the (encoded) keys and values of a record"""
+
+    count, size = _RECORD.unpack_from(data)
+    if count == _PICKLED_RECORD:
+        for key, value in pickle_loads(data[_RECORD.size:]).items():
+            yield _encode_str(key), value
+        return
+    if not count:
+        return
+    pos = _RECORD.size
+    keys = data[pos:pos + size].split(b"\0")
+    pos += size
+    kinds = data[pos:pos + count]
+    pos += count
+    ends = _unpack_array("I", data[pos:pos + count * _END.size])
+    start = pos + count * _END.size
+    for key, kind, end in zip(keys, kinds, ends, strict=True):
+        end += pos + count * _END.size
+        yield key, _decode_value(kind, data[start:end])
+        start = end
+
+
+def _find_value(data: bytes, name: bytes, default):
+    """Returns the value for the (encoded) key `name` from a record"""
+
+    count, size = _RECORD.unpack_from(data)
+    if count == _PICKLED_RECORD:
+        return pickle_loads(data[_RECORD.size:]).get(_decode_str(name),
+                                                     default)
+    pos = _RECORD.size
+    if not count or name not in data[pos:pos + size]:
+        return default
+    try:
+        i = data[pos:pos + size].split(b"\0").index(name)
+    except ValueError:
+        return default
+    pos += size
+    kind = data[pos + i]
+    pos += count
+    start = _END.unpack_from(data, pos + (i - 1) * _END.size)[0] if i else 0
+    end, = _END.unpack_from(data, pos + i * _END.size)
+    pos += count * _END.size
+    return _decode_value(kind, data[pos + start:pos + end])
+
+
+def dump_items(items: Iterable) -> bytes:
+    """Serializes `AudioFile`s (or unchanged records, see
+    `LazyItems.entries`) to the indexed format.
+
+    Returns:
+        bytes
+    Raises:
+        SerializationError
+    """
+
+    chunks = []
+    offset = _HEADER.size
+    keys = []
+    offsets = array("Q")
+    lengths = array("I")
+    classes: dict[tuple[str, str], int] = {}
+    record_classes = array("H")
+    mountpoints: dict = {}
+    mounts = array("I")
+
+    for item in items:
+        if isinstance(item, _Record):
+            data = item.data
+            name = item.class_name
+            mountpoint = item.mountpoint
+        else:
+            data = _encode_item(item)
+            name = _class_name(type(item))
+            mountpoint = dict.get(item, "~mountpoint")
+        keys.append(item.key)
+        offsets.append(offset)
+        lengths.append(len(data))
+        record_classes.append(classes.setdefault(name, len(classes)))
+        mounts.append(mountpoints.setdefault(mountpoint, len(mountpoints)))
+        chunks.append(data)
+        offset += len(data)
+
+    table = {
+        "keys": keys,
+        "offsets": _pack_array(offsets),
+        "lengths": _pack_array(lengths),
+        "classes": list(classes),
+        "record_classes": _pack_array(record_classes),
+        "mountpoints": list(mountpoints),
+        "mounts": _pack_array(mounts),
+    }
+    try:
+        table_data = pickle_dumps(table, 2)
+    except pickle.PicklingError as e:
+        raise SerializationError(e) from e
+
+    return b"".join([_HEADER.pack(_MAGIC, offset)] + chunks + [table_data])
+
+
+def load_items(fileobj) -> "LazyItems":
+    """Loads the table of a file in the indexed format. The records are
+    only read once they are needed.
+
+    Raises:
+        SerializationError
+    """
+
+    if is_windows():
+        # A mapped file can't be replaced, which would break saving
+        data = fileobj.read()
+    else:
+        try:
+            data = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SerializationError(e) from e
+
+    try:
+        magic, table_offset = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or not _HEADER.size <= table_offset <= len(data):
+            raise SerializationError("Not an indexed library file")
+        table = pickle_loads(data[table_offset:])
+        items = LazyItems(data, table)
+    except (struct.error, pickle.UnpicklingError, KeyError, TypeError,
+            ValueError) as e:
+        raise SerializationError(e) from e
+
+    if any(offset + length > table_offset
+           for offset, length in zip(items._offsets, items._lengths, strict=True)):
+        raise SerializationError("Record outside of the record data")
+    return items
+
+
+class LazyItems(MutableMapping):
+    """The items of a file in the indexed format by key.
+
+    Records are only turned into items when they are first accessed (and
+    stay loaded after that), other than through `get_tag`, `entries` and
+    `mountpoints`, which read them without creating items.
+    """
+
+    def __init__(self, data, table):
+        self._data = data
+        self._offsets = _unpack_array("Q", table["offsets"])
+        self._lengths = _unpack_array("I", table["lengths"])
+        self._class_names = [tuple(name) for name in table["classes"]]
+        self._classes = [_find_class(*name) for name in self._class_names]
+        self._record_classes = _unpack_array("H", table["record_classes"])
+        self._mountpoints = table["mountpoints"]
+        self._mounts = _unpack_array("I", table["mounts"])
+
+        keys = table["keys"]
+        if not (len(keys) == len(self._offsets) == len(self._lengths)
+                == len(self._record_classes) == len(self._mounts)):
+            raise ValueError("Inconsistent table")
+
+        self._names: dict[bytes, str] = {}
+        """Decoded tag names, shared by all items"""
+
+        self._items: dict = dict(zip(keys, range(len(keys)), strict=True))
+        """Loaded items, or the record index for the others"""
+
+        missing = {i for i, cls in enumerate(self._classes) if cls is None}
+        if missing:
+            for i in missing:
+                module, name = self._class_names[i]
+                print_w(f"Skipping items of unknown type {module}.{name}")
+            record_classes = self._record_classes
+            for key, index in list(self._items.items()):
+                if record_classes[index] in missing:
+                    del self._items[key]
+            if keys and not self._items:
+                raise SerializationError(
+                    "all class lookups failed. something is wrong")
+
+    def __repr__(self):
+        return (f"<{type(self).__name__} {self.loaded_count}/{len(self)} "
+                f"loaded>")
+
+    def _record(self, index: int) -> bytes:
+        offset = self._offsets[index]
+        return self._data[offset:offset + self._lengths[index]]
+
+    def _load(self, key, index: int) -> AudioFile:
+        cls = self._classes[self._record_classes[index]]
+        # like load_audio_files, don't go through __setitem__
+        item = dict.__new__(cls)
+        names = self._names
+        share = getattr(cls, "intern_tags", False)
+        for name, value in _decode_record(self._record(index)):
+            key_name = names.get(name)
+            if key_name is None:
+                key_name = names[name] = sys.intern(_decode_str(name))
+            if share:
+                key_name, value = intern_tag(key_name, value)
+            dict.__setitem__(item, key_name, value)
+        self._items[key] = item
+        return item
+
+    def __getitem__(self, key) -> AudioFile:
+        item = self._items[key]
+        if isinstance(item, int):
+            return self._load(key, item)
+        return item
+
+    def __setitem__(self, key, item):
+        self._items[key] = item
+
+    def __delitem__(self, key):
+        del self._items[key]
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def clear(self):
+        self._items.clear()
+
+    def loaded(self) -> Iterator[AudioFile]:
+        """Yields all items which have been loaded"""
+
+        for item in self._items.values():
+            if not isinstance(item, int):
+                yield item
+
+    def is_loaded(self, key) -> bool:
+        """If the item has been created already"""
+
+        return not isinstance(self._items[key], int)
+
+    @property
+    def loaded_count(self) -> int:
+        return sum(1 for item in self.loaded())
+
+    def get_tag(self, key, tag: str, default=None):
+        """Like `self[key].get(tag, default)`, without creating the item
+        if it isn't loaded yet.
+
+        Raises:
+            KeyError: if there is no item for `key`
+        """
+
+        item = self._items[key]
+        if not isinstance(item, int):
+            return item.get(tag, default)
+
+        return _find_value(self._record(item), _encode_str(tag), default)
+
+    def entries(self) -> Iterator:
+        """Yields the loaded items and the unchanged records of all others,
+        for passing to `dump_items`.
+        """
+
+        for key, item in self._items.items():
+            if isinstance(item, int):
+                yield _Record(self, item, key)
+            else:
+                yield item
+
+    def mountpoints(self) -> dict:
+        """Returns the keys of all items by mount point"""
+
+        result: dict = {}
+        mountpoints = self._mountpoints
+        mounts = self._mounts
+        for key, item in self._items.items():
+            if isinstance(item, int):
+                mountpoint = mountpoints[mounts[item]]
+            else:
+                mountpoint = item.mountpoint
+            result.setdefault(mountpoint, []).append(key)
+        return result
@@ -16,13 +16,14 @@ from collections.abc import Iterable, Iterator, Generator
 
 from gi.repository import GObject
 
-from quodlibet.library.base import Library
+from quodlibet.library.base import Library, BatchedSignalsMixin
 from quodlibet.library.playlist import PlaylistLibrary
+from quodlibet.library.sorting import SortKeys
 from quodlibet.util.dprint import print_d, print_w
 from senf import fsnative
 
 
-class Librarian(GObject.GObject):
+class Librarian(BatchedSignalsMixin, GObject.GObject):
     """The librarian is a nice interface to all active libraries.
 
     Librarians are a kind of meta-library. When any of their
@@ -47,7 +48,7 @@ class Librarian(GObject.GObject):
         self.__signals = {}
 
     def destroy(self) -> None:
-        pass
+        self._drop_signals()
 
     def register(self, library: Library, name: str) -> None:
         """Register a library with this librarian."""
@@ -69,11 +70,6 @@ class Librarian(GObject.GObject):
             library.disconnect(signal_id)
         del(self.__signals[library])
 
-    # FIXME: We can be smarter about this -- queue a list of items
-    # and fire the signal after a short wait, to take advantage of
-    # a case where many libraries fire a signal at the same time (or
-    # one fires a signal often).
-
     def __changed(self, _library: Library, items: Iterable) -> None:
         self.emit("changed", items)
 
@@ -159,6 +155,28 @@ class Librarian(GObject.GObject):
 class SongLibrarian(Librarian):
     """A librarian for SongLibraries."""
 
+    use_sort_keys = False
+    """Whether to cache the sort keys of tag values in `sort_keys`"""
+
+    _sort_keys = None
+
+    def destroy(self) -> None:
+        super().destroy()
+        if self._sort_keys is not None:
+            self._sort_keys.destroy()
+            self._sort_keys = None
+
+    @property
+    def sort_keys(self) -> SortKeys | None:
+        """The cache of sort keys for songs of all libraries, or None if
+        disabled"""
+
+        if not self.use_sort_keys:
+            return None
+        if self._sort_keys is None:
+            self._sort_keys = SortKeys(self)
+        return self._sort_keys
+
     def tag_values(self, tag):
         """Return a set of all values for the given tag."""
         return {value for lib in self.libraries.values()
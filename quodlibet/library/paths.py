@@ -0,0 +1,129 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""A sorted index of the keys of a file library, so the songs below a
+directory can be found without looking at every song.
+"""
+
+import os
+from bisect import bisect_left
+
+from quodlibet import print_d
+
+
+class PathIndex:
+    """The sorted keys (paths) of the items in a file library, kept up to
+    date through the library's signals.
+
+    All keys below a directory share its path as prefix, so they are next
+    to each other and can be found with two binary searches. Keys of items
+    moved without a signal have to be passed to `moved`.
+    """
+
+    MAX_PENDING = 500
+    """Changes to collect before sorting all keys again instead of
+    inserting and removing them one by one"""
+
+    def __init__(self, library):
+        self._library = library
+        self._keys: list[str] | None = None
+        self._added: set[str] = set()
+        self._removed: set[str] = set()
+        self._sigs = [
+            library.connect("added", self.__added),
+            library.connect("changed", self.__added),
+            library.connect("removed", self.__removed),
+        ]
+
+    def destroy(self):
+        for sig in self._sigs:
+            self._library.disconnect(sig)
+        self._sigs = []
+        self.clear()
+
+    def clear(self):
+        """Drop the index, it gets rebuilt on the next lookup"""
+
+        self._keys = None
+        self._added.clear()
+        self._removed.clear()
+
+    def moved(self, old_key, new_key):
+        """Updates the key of an item moved without a signal"""
+
+        self.__remove_key(old_key)
+        self.__add_key(new_key)
+
+    def __add_key(self, key):
+        if self._keys is not None:
+            self._removed.discard(key)
+            self._added.add(key)
+
+    def __remove_key(self, key):
+        if self._keys is not None:
+            self._added.discard(key)
+            self._removed.add(key)
+
+    def __added(self, library, items):
+        # Also for changed items, their key might have changed
+        for item in items:
+            self.__add_key(item.key)
+
+    def __removed(self, library, items):
+        for item in items:
+            self.__remove_key(item.key)
+
+    def _sync(self):
+        # Catch up with changes still waiting to be signalled
+        self._library.flush_signals()
+        keys = self._keys
+        pending = len(self._added) + len(self._removed)
+        if keys is None or pending > self.MAX_PENDING:
+            self._keys = sorted(self._library.iterkeys())
+            self._added.clear()
+            self._removed.clear()
+            print_d(f"Indexed {len(self._keys)} paths", self._library._name)
+            return
+        for key in self._removed:
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                del keys[i]
+        for key in self._added:
+            i = bisect_left(keys, key)
+            if i == len(keys) or keys[i] != key:
+                keys.insert(i, key)
+        self._added.clear()
+        self._removed.clear()
+
+    def keys_below(self, path: str) -> list[str]:
+        """Returns the sorted keys of all items below the directory `path`,
+        which has to be normalized like the keys (see `normalize_path`)"""
+
+        self._sync()
+        keys = self._keys
+        assert keys is not None
+        prefix = os.path.join(path, "")
+        # All keys starting with the prefix sort before the prefix with the
+        # last character (the separator) replaced by the next one
+        end_prefix = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, end_prefix, start)
+        contents = self._library._contents
+        found = [key for key in keys[start:end] if key in contents]
+        if len(found) != end - start:
+            # Items moved or removed without a signal
+            keys[start:end] = found
+        return found
+
+    def items_below(self, path: str) -> list:
+        """Returns all items below the directory `path`, sorted by key"""
+
+        contents = self._library._contents
+        return [contents[key] for key in self.keys_below(path)]
+
+    def __len__(self):
+        self._sync()
+        assert self._keys is not None
+        return len(self._keys)
@@ -7,11 +7,16 @@ from typing import TypeVar
 from collections.abc import Iterable
 
 from quodlibet import util, print_d
-from quodlibet.formats import MusicFile, AudioFile
+from quodlibet.formats import MusicFile, AudioFile, tag_memory_usage
 from quodlibet.library.album import AlbumLibrary
-from quodlibet.library.base import Library, PicklingMixin, K
+from quodlibet.library.base import Library, K
 from quodlibet.library.file import WatchedFileLibraryMixin
+from quodlibet.library.folded import FoldedText
+from quodlibet.library.index import TagIndex
+from quodlibet.library.journal import JournalingMixin
+from quodlibet.library.lazy import LazyItems
 from quodlibet.library.playlist import PlaylistLibrary
+from quodlibet.library.sorting import SortKeys
 from quodlibet.query import Query
 from quodlibet.util.path import normalize_path
 from senf import fsnative
@@ -19,16 +24,63 @@ from senf import fsnative
 V = TypeVar("V", bound=AudioFile)
 
 
-class SongLibrary(Library[K, V], PicklingMixin):
+class SongLibrary(Library[K, V], JournalingMixin):
     """A library for songs.
 
     Items in this kind of library must support (roughly) the AudioFile
     interface.
     """
 
+    use_tag_index = False
+    """Whether to keep a `TagIndex` for speeding up queries"""
+
+    _tag_index = None
+
+    use_sort_keys = False
+    """Whether to cache the sort keys of tag values in `sort_keys`"""
+
+    _sort_keys = None
+
+    use_folded_text = False
+    """Whether to cache folded tag values for queries in `folded_text`"""
+
+    _folded_text = None
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+    @property
+    def tag_index(self) -> TagIndex | None:
+        """The tag index `Query.filter` uses, or None if disabled"""
+
+        if not self.use_tag_index:
+            return None
+        if self._tag_index is None:
+            self._tag_index = TagIndex(self)
+        return self._tag_index
+
+    @property
+    def sort_keys(self) -> SortKeys | None:
+        """The cache of sort keys for songs of this library, or None if
+        disabled"""
+
+        if not self.use_sort_keys:
+            return None
+        if self._sort_keys is None:
+            self._sort_keys = SortKeys(self)
+        return self._sort_keys
+
+    @property
+    def folded_text(self) -> FoldedText | None:
+        """The cache of folded tag values `Query.filter` uses, or None if
+        disabled"""
+
+        if not self.use_folded_text:
+            return None
+        if self._folded_text is None:
+            self._folded_text = FoldedText(self)
+        return self._folded_text
+
     @util.cached_property
     def albums(self):
         return AlbumLibrary(self)
@@ -45,12 +97,39 @@ class SongLibrary(Library[K, V], PicklingMixin):
             self.albums.destroy()
         if "playlists" in self.__dict__:
             self.playlists.destroy()
+        if self._tag_index is not None:
+            self._tag_index.destroy()
+            self._tag_index = None
+        if self._sort_keys is not None:
+            self._sort_keys.destroy()
+            self._sort_keys = None
+        if self._folded_text is not None:
+            self._folded_text.destroy()
+            self._folded_text = None
 
     def tag_values(self, tag):
         """Return a set of all values for the given tag."""
+
+        contents = self._contents
+        if isinstance(contents, LazyItems) and "~" not in tag and tag != "title":
+            # Same as AudioFile.list, but avoids loading the songs
+            return {value for key in contents
+                    for value in contents.get_tag(key, tag, "").split("\n")
+                    if value}
         return {value for song in self.values()
                 for value in song.list(tag)}
 
+    def tag_memory_usage(self) -> dict[str, int]:
+        """Returns the approximate memory used by each tag of the songs in
+        bytes (see `formats.tag_memory_usage`). Songs which haven't been
+        loaded yet from a lazily loaded library file aren't included.
+        """
+
+        contents = self._contents
+        if isinstance(contents, LazyItems):
+            return tag_memory_usage(contents.loaded())
+        return tag_memory_usage(contents.values())
+
     def rename(self, song, new_name, changed: set | None = None):
         """Rename a song.
 
@@ -82,14 +161,13 @@ class SongLibrary(Library[K, V], PicklingMixin):
 
         songs = self.values()
         if text != "":
-            search = Query(text, star).search
-            songs = [s for s in songs if search(s)]
+            songs = Query(text, star).filter(self)
         return songs
 
 
 class SongFileLibrary(SongLibrary, WatchedFileLibraryMixin):
     """A library containing song files.
-    Pickles contents to disk as `FileLibrary`"""
+    Persists contents to disk as a snapshot plus journal (`JournalingMixin`)"""
 
     def __init__(self, name=None, watch_dirs: Iterable[fsnative] | None = None):
         print_d(f"Initializing {type(self)}: {name!r}")
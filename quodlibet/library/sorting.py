@@ -0,0 +1,167 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""Sorting songs by several keys, and a cache of the sort keys of tag
+values so they don't have to be recomputed for every sort.
+"""
+
+import sys
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from quodlibet.formats import FILESYSTEM_TAGS, AudioFile
+from quodlibet.library.index import is_indexable
+from quodlibet.util import human_sort_key as human
+
+SortKeyFunc = Callable[[Any], Any]
+
+
+def sort_order(items: Sequence,
+               keys: Sequence[tuple[SortKeyFunc, bool]]) -> list[int]:
+    """Returns the indices of `items` in the order of `keys`, a list of
+    (key function, reverse) pairs with the most significant first.
+
+    Every key function is called once per item up front. The items are then
+    sorted by the precomputed keys with one stable sort per key, starting
+    with the least significant, which keeps the sort direction per key and
+    is faster than comparing tuples of all keys.
+    """
+
+    order = list(range(len(items)))
+    for key, reverse in reversed(keys):
+        values = [key(item) for item in items]
+        order.sort(key=values.__getitem__, reverse=reverse)
+    return order
+
+
+def _is_lower(keys, other_keys, directions) -> bool:
+    for value, other, reverse in zip(keys, other_keys, directions, strict=True):
+        if value < other:
+            return not reverse
+        if value > other:
+            return reverse
+    return False
+
+
+def merge_blocks(length: int, get: Callable[[int], Any],
+                 new_items: Sequence,
+                 keys: Sequence[tuple[SortKeyFunc, bool]]
+                 ) -> list[tuple[int, list]]:
+    """Finds where to insert `new_items` into a sequence of `length` items
+    sorted by `keys` (see `sort_order`), where `get(index)` returns an item.
+
+    Returns (index, items) pairs with increasing indices. Inserting each
+    list of items before the item at its index (or at the end) keeps the
+    sequence sorted, with new items after equal ones.
+
+    The new items are sorted once, so each one is only searched for after
+    the position of the previous one, and the keys of every item are only
+    computed once.
+    """
+
+    if not new_items:
+        return []
+    funcs = [key for key, reverse in keys]
+    directions = [reverse for key, reverse in keys]
+    new_keys = [[key(item) for key in funcs] for item in new_items]
+    order = sort_order(new_keys, [(lambda k, i=i: k[i], reverse)
+                                  for i, reverse in enumerate(directions)])
+
+    cache: dict[int, list] = {}
+
+    def keys_at(index):
+        item_keys = cache.get(index)
+        if item_keys is None:
+            item = get(index)
+            item_keys = cache[index] = [key(item) for key in funcs]
+        return item_keys
+
+    blocks: list[tuple[int, list]] = []
+    low = 0
+    for index in order:
+        item_keys = new_keys[index]
+        high = length
+        while low < high:
+            mid = (low + high) // 2
+            if _is_lower(item_keys, keys_at(mid), directions):
+                high = mid
+            else:
+                low = mid + 1
+        if blocks and blocks[-1][0] == low:
+            blocks[-1][1].append(new_items[index])
+        else:
+            blocks.append((low, [new_items[index]]))
+    return blocks
+
+
+class SortKeys:
+    """Caches the `human_sort_key`s of the tag values of songs, kept up to
+    date through the 'changed' and 'removed' signals of a library or
+    librarian.
+
+    Only songs in the library get cached, and only tags which can't
+    change without the song changing (see `is_indexable`).
+    """
+
+    def __init__(self, library):
+        self._library = library
+        self._tags: dict[str, dict[AudioFile, Any]] = {}
+        self._sigs = [
+            library.connect("changed", self.__forget),
+            library.connect("removed", self.__forget),
+        ]
+
+    def destroy(self):
+        for sig in self._sigs:
+            self._library.disconnect(sig)
+        self._sigs = []
+        self.clear()
+
+    def clear(self):
+        """Drop all cached sort keys"""
+
+        self._tags.clear()
+
+    def key_func(self, tag) -> SortKeyFunc:
+        """Like `AudioFile.sort_by_func`, but returns cached sort keys"""
+
+        if (not isinstance(tag, str) or tag == "artistsort"
+                or tag in FILESYSTEM_TAGS or not is_indexable(tag)):
+            return AudioFile.sort_by_func(tag)
+
+        # Catch up with changes still waiting to be signalled
+        self._library.flush_signals()
+        cache = self._tags.get(tag)
+        if cache is None:
+            cache = self._tags[tag] = {}
+        library = self._library
+
+        def key(song):
+            try:
+                return cache[song]
+            except KeyError:
+                value = human(song(tag))
+                if song in library:
+                    cache[song] = value
+                return value
+
+        return key
+
+    def memory_usage(self) -> dict[str, int]:
+        """Returns the approximate size of the cache in bytes by tag"""
+
+        usage = {}
+        for tag, cache in self._tags.items():
+            size = sys.getsizeof(cache)
+            for value in cache.values():
+                size += sys.getsizeof(value)
+                size += sum(sys.getsizeof(part) for part in value)
+            usage[tag] = size
+        return usage
+
+    def __forget(self, library, songs):
+        for cache in self._tags.values():
+            for song in songs:
+                cache.pop(song, None)
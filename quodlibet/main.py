@@ -107,6 +107,14 @@ def main(argv=None):
     from quodlibet.util.cover import CoverManager
     app.cover_manager = CoverManager()
     app.cover_manager.init_plugins()
+    cover_cache_size = config.getint("albumart", "cache_size")
+    if cover_cache_size > 0:
+        app.cover_manager.load_cache(
+            os.path.join(quodlibet.get_cache_dir(), "covers.json"),
+            cover_cache_size)
+    memory_cache_size = config.getint("albumart", "memory_cache_size")
+    if memory_cache_size > 0:
+        app.cover_manager.enable_pixbuf_cache(memory_cache_size * 1024 ** 2)
 
     from quodlibet.plugins.playlist import PLAYLIST_HANDLER
     PLAYLIST_HANDLER.init_plugins()
@@ -209,6 +217,7 @@ def main(argv=None):
     tracker.destroy()
     quodlibet.library.save()
     quodlibet.library.destroy()
+    app.cover_manager.save_cache()
     config.save()
 
     session_client.close()
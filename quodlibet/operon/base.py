@@ -5,10 +5,16 @@
 # the Free Software Foundation; either version 2 of the License, or
 # (at your option) any later version.
 
+import os
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from optparse import OptionParser
 
+from senf import bytes2fsn, fsn2text
+
 from quodlibet import _
+from quodlibet import formats
 from quodlibet.formats import MusicFile, AudioFileError
 from quodlibet.util import print_
 
@@ -55,6 +61,21 @@ class Command:
     def verbose(self, value):
         self.__options.verbose = bool(value)
 
+    @property
+    def jobs(self) -> int:
+        """The number of files to process at once"""
+
+        return max(getattr(self.__options, "jobs", None) or 1, 1)
+
+    @property
+    def batch(self) -> bool:
+        """Whether files get processed one by one (see `iter_songs`)"""
+
+        options = self.__options
+        return bool(getattr(options, "jobs", None)
+                    or getattr(options, "recursive", False)
+                    or getattr(options, "files_from", None))
+
     def log(self, text):
         """Print output if --verbose was passed"""
 
@@ -76,10 +97,127 @@ class Command:
         self.log("Saving songs...")
 
         for song in songs:
+            self.write_song(song)
+
+    def write_song(self, song):
+        """Save a song. Raises CommandError in case it fails"""
+
+        try:
+            song.write()
+        except AudioFileError as e:
+            raise CommandError(e) from e
+
+    def read_paths(self):
+        """Returns the paths listed in the --files-from file (or stdin for
+        '-'), one per line"""
+
+        name = getattr(self.__options, "files_from", None)
+        if not name:
+            return []
+        try:
+            if name == "-":
+                data = sys.stdin.buffer.read()
+            else:
+                with open(name, "rb") as h:
+                    data = h.read()
+        except OSError as e:
+            raise CommandError(e) from e
+        return [bytes2fsn(line, "utf-8")
+                for line in data.splitlines() if line.strip()]
+
+    def _expand_paths(self, paths):
+        if not getattr(self.__options, "recursive", False):
+            yield from paths
+            return
+        for path in paths:
+            if not os.path.isdir(path):
+                yield path
+                continue
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if formats.filter(name):
+                        yield os.path.join(root, name)
+
+    def process_songs(self, paths, process, write=None):
+        """Like `iter_songs`, but returns a list of the results"""
+
+        return list(self.iter_songs(paths, process, write))
+
+    def iter_songs(self, paths, process, write=None, keep_going=False):
+        """Loads the songs at `paths` and yields what `process(song)`
+        returns for each of them, in order. If given, `write(song)` gets
+        called for the songs `process` returned a true value for.
+
+        By default all songs are processed before any gets written, and the
+        first error stops the command. In batch mode, or with `keep_going`,
+        each file is loaded, processed and written on its own (by `jobs`
+        threads at once), files failing are skipped and listed at the end.
+        """
+
+        if not self.batch and not keep_going:
+            songs = []
+            for path in paths:
+                song = self.load_song(path)
+                result = process(song)
+                if write is not None and result:
+                    songs.append(song)
+                yield result
+            if songs:
+                self.log("Saving songs...")
+            for song in songs:
+                try:
+                    write(song)
+                except AudioFileError as e:
+                    raise CommandError(e) from e
+            return
+
+        def run(path):
             try:
-                song.write()
-            except AudioFileError as e:
-                raise CommandError(e) from e
+                song = self.load_song(path)
+                result = process(song)
+                if write is not None and result:
+                    write(song)
+            except (CommandError, AudioFileError) as e:
+                return None, e
+            return result, None
+
+        failed = []
+        total = 0
+        for path, (result, error) in self.__map(run, paths):
+            total += 1
+            if error is None:
+                yield result
+            else:
+                failed.append((path, error))
+
+        if failed:
+            for path, error in failed:
+                print_(f"{fsn2text(path)}: {error}", file=sys.stderr)
+            raise CommandError(
+                _("{failed} of {total} files failed").format(
+                    failed=len(failed), total=total))
+
+    def __map(self, function, paths):
+        # Yields (path, function(path)) in order, with a bounded number of
+        # pending files so huge lists don't get queued up all at once
+        paths = self._expand_paths(paths)
+        jobs = self.jobs
+        if jobs == 1:
+            for path in paths:
+                yield path, function(path)
+            return
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            pending: deque = deque()
+            for path in paths:
+                pending.append((path, executor.submit(function, path)))
+                if len(pending) >= jobs * 4:
+                    path, future = pending.popleft()
+                    yield path, future.result()
+            while pending:
+                path, future = pending.popleft()
+                yield path, future.result()
 
     def _execute(self, options, args):
         """Override to execute something"""
@@ -98,4 +236,4 @@ class Command:
         """Execute the command"""
 
         options, args = self.__parser.parse_args(args)
-        self._execute(options, args)
+        self._execute(options, args + self.read_paths())
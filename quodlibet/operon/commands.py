@@ -10,6 +10,7 @@
 # FillTracknumberCommand
 
 import ast
+import io
 import os
 import re
 import shutil
@@ -20,7 +21,7 @@ from senf import fsn2text, text2fsn
 
 from quodlibet import _
 from quodlibet import util
-from quodlibet.formats import EmbeddedImage, AudioFileError
+from quodlibet.formats import EmbeddedImage
 from quodlibet.util.path import mtime
 from quodlibet.pattern import Pattern, Error as PatternError
 from quodlibet.util.tags import USER_TAGS, sortkey, MACHINE_TAGS
@@ -316,10 +317,7 @@ class SetCommand(Command):
         value = fsn2text(args[1])
         paths = args[2:]
 
-        songs = []
-        for path in paths:
-            song = self.load_song(path)
-
+        def set_tag(song):
             if not song.can_change(tag):
                 vars = {"tag": tag, "format": type(song).format,
                         "file": song("~filename")}
@@ -330,10 +328,10 @@ class SetCommand(Command):
             if tag in song:
                 del song[tag]
             song.add(tag, value)
-            songs.append(song)
+            return True
 
-        if not options.dry_run:
-            self.save_songs(songs)
+        write = None if options.dry_run else self.write_song
+        self.process_songs(paths, set_tag, write)
 
 
 @Command.register
@@ -366,10 +364,7 @@ class ClearCommand(Command):
         if options.dry_run:
             self.verbose = True
 
-        songs = []
-        for path in paths:
-            song = self.load_song(path)
-
+        def clear(song):
             tags = []
             realkeys = song.realkeys()
             if options.all:
@@ -387,14 +382,14 @@ class ClearCommand(Command):
                 if not song.can_change(tag):
                     raise CommandError(
                         _("Can't remove {tagname} from {filename}").format(
-                            tagname=repr(tag), filename=repr(path)))
+                            tagname=repr(tag),
+                            filename=repr(song["~filename"])))
                 del song[tag]
 
-            if tags:
-                songs.append(song)
+            return bool(tags)
 
-        if not options.dry_run:
-            self.save_songs(songs)
+        write = None if options.dry_run else self.write_song
+        self.process_songs(paths, clear, write)
 
 
 @Command.register
@@ -430,21 +425,18 @@ class RemoveCommand(Command):
             def match(v):
                 return v == value
 
-        songs = []
-        for path in paths:
-            song = self.load_song(path)
-
+        def remove(song):
             if tag not in song:
-                continue
+                return False
 
             for v in song.list(tag):
                 if match(v):
                     self.log(f"Remove {v!r} from {tag!r}")
                     song.remove(tag, v)
-            songs.append(song)
+            return True
 
-        if not options.dry_run:
-            self.save_songs(songs)
+        write = None if options.dry_run else self.write_song
+        self.process_songs(paths, remove, write)
 
 
 @Command.register
@@ -461,18 +453,15 @@ class AddCommand(Command):
         value = fsn2text(args[1])
         paths = args[2:]
 
-        songs = []
-        for path in paths:
-            song = self.load_song(path)
-
+        def add(song):
             if not song.can_change(tag):
                 raise CommandError(_("Can not set %r") % tag)
 
             self.log(f"Add {value!r} to {tag!r}")
             song.add(tag, value)
-            songs.append(song)
+            return True
 
-        self.save_songs(songs)
+        self.process_songs(paths, add, self.write_song)
 
 
 @Command.register
@@ -521,6 +510,17 @@ class InfoCommand(Command):
             print_terse_table(tags, nicks, order)
 
 
+def _check_images_supported(song):
+    if not song.can_change_images:
+        raise CommandError(
+            _("Image editing not supported for %(file_name)s "
+              "(%(file_format)s)") % {
+              "file_name": song("~filename"),
+              "file_format": song("~format")
+            })
+    return True
+
+
 @Command.register
 class ImageSetCommand(Command):
     NAME = "image-set"
@@ -539,22 +539,19 @@ class ImageSetCommand(Command):
         if not image:
             raise CommandError(_("Failed to load image file: %r") % image_path)
 
-        songs = [self.load_song(p) for p in paths]
+        try:
+            data = image.read()
+        except OSError as e:
+            raise CommandError(e) from e
 
-        for song in songs:
-            if not song.can_change_images:
-                raise CommandError(
-                    _("Image editing not supported for %(file_name)s "
-                      "(%(file_format)s)") % {
-                      "file_name": song("~filename"),
-                      "file_format": song("~format")
-                    })
+        def set_image(song):
+            # Songs might get written at the same time, so don't share
+            # the image file between them
+            song.set_image(EmbeddedImage(
+                io.BytesIO(data), image.mime_type, image.width, image.height,
+                image.color_depth, image.type))
 
-        for song in songs:
-            try:
-                song.set_image(image)
-            except AudioFileError as e:
-                raise CommandError(e) from e
+        self.process_songs(paths, _check_images_supported, set_image)
 
 
 @Command.register
@@ -568,22 +565,11 @@ class ImageClearCommand(Command):
             raise CommandError(_("Not enough arguments"))
 
         paths = args
-        songs = [self.load_song(p) for p in paths]
 
-        for song in songs:
-            if not song.can_change_images:
-                raise CommandError(
-                    _("Image editing not supported for %(file_name)s "
-                      "(%(file_format)s)") % {
-                      "file_name": song("~filename"),
-                      "file_format": song("~format")
-                    })
+        def clear_images(song):
+            song.clear_images()
 
-        for song in songs:
-            try:
-                song.clear_images()
-            except AudioFileError as e:
-                raise CommandError(e) from e
+        self.process_songs(paths, _check_images_supported, clear_images)
 
 
 @Command.register
@@ -614,8 +600,9 @@ class ImageExtractCommand(Command):
             self.verbose = True
 
         paths = args
-        for path in paths:
-            song = self.load_song(path)
+
+        def extract(song):
+            path = song["~filename"]
 
             # get the primary one or all of them
             if options.primary:
@@ -627,7 +614,7 @@ class ImageExtractCommand(Command):
             self.log(f"Images for {path!r}: {images!r}")
 
             if not images:
-                continue
+                return
 
             # get the basename from the song without the extension
             basename = os.path.basename(path)
@@ -654,8 +641,13 @@ class ImageExtractCommand(Command):
 
                 self.log("Saving image %r" % filename)
                 if not options.dry_run:
-                    with open(filename, "wb") as h:
-                        shutil.copyfileobj(image.file, h)
+                    try:
+                        with open(filename, "wb") as h:
+                            shutil.copyfileobj(image.file, h)
+                    except OSError as e:
+                        raise CommandError(e) from e
+
+        self.process_songs(paths, extract)
 
 
 # @Command.register
@@ -693,39 +685,36 @@ class FillCommand(Command):
 
         pattern = TagsFromPattern(pattern_text)
 
-        songs = []
-        for path in paths:
-            song = self.load_song(path)
+        def fill(song):
             for header in pattern.headers:
                 if not song.can_change(header):
                     raise CommandError(_("Can not set %r") % header)
-            songs.append(song)
+            if options.dry_run:
+                return self.__preview_row(pattern, song)
+            self.__apply(pattern, song)
+            return True
 
+        write = None if options.dry_run else self.write_song
+        results = self.process_songs(paths, fill, write)
         if options.dry_run:
-            self.__preview(pattern, songs)
-        else:
-            self.__apply(pattern, songs)
-
-    def __apply(self, pattern, songs):
-        for song in songs:
-            match = pattern.match(song)
-            self.log("{!r}: {!r}".format(song("~basename"), match))
-            for header in pattern.headers:
-                if header in match:
-                    value = match[header]
-                    song[header] = value
-
-        self.save_songs(songs)
-
-    def __preview(self, pattern, songs):
-        rows = []
-        for song in songs:
-            match = pattern.match(song)
-            row = [fsn2text(song("~basename"))]
-            for header in pattern.headers:
-                row.append(match.get(header, ""))
-            rows.append(row)
-
+            self.__preview(pattern, results)
+
+    def __apply(self, pattern, song):
+        match = pattern.match(song)
+        self.log("{!r}: {!r}".format(song("~basename"), match))
+        for header in pattern.headers:
+            if header in match:
+                value = match[header]
+                song[header] = value
+
+    def __preview_row(self, pattern, song):
+        match = pattern.match(song)
+        row = [fsn2text(song("~basename"))]
+        for header in pattern.headers:
+            row.append(match.get(header, ""))
+        return row
+
+    def __preview(self, pattern, rows):
         headers = [_("File")] + pattern.headers
         nicks = ["file"] + pattern.headers
         print_table(rows, headers, nicks, nicks)
@@ -776,15 +765,8 @@ class PrintCommand(Command):
             raise CommandError(f"Invalid pattern: {pattern!r}") from e
 
         paths = args
-        error = False
-        for path in paths:
-            try:
-                util.print_(pattern % self.load_song(path))
-            except CommandError:
-                error = True
-
-        if error:
-            raise CommandError("One or more files failed to load.")
+        for text in self.iter_songs(paths, pattern.format, keep_going=True):
+            util.print_(text)
 
 
 @Command.register
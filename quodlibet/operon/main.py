@@ -46,8 +46,11 @@ def main(argv=None):
     main_cmd = os.path.basename(argv[0])
 
     # the main optparser
-    usage = "%s [--version] [--help] [--verbose] <command> [<args>]" % main_cmd
+    usage = (f"{main_cmd} [--version] [--help] [--verbose] [--jobs=<n>] "
+             "[--recursive] [--files-from=<file>] <command> [<args>]")
     parser = OptionParser(usage=usage)
+    # stop at the command, the rest are its options and arguments
+    parser.disable_interspersed_args()
 
     parser.remove_option("--help")
     parser.add_option("-h", "--help", action="store_true")
@@ -55,26 +58,26 @@ def main(argv=None):
                       help="print version")
     parser.add_option("-v", "--verbose", action="store_true",
                       help="verbose output")
+    parser.add_option("-j", "--jobs", action="store", type="int",
+                      metavar="N",
+                      help="process files one by one, this many at once, "
+                           "and list the ones failing at the end")
+    parser.add_option("-r", "--recursive", action="store_true",
+                      help="process the files below directories passed "
+                           "as files, one by one")
+    parser.add_option("--files-from", action="store", type="string",
+                      metavar="FILE",
+                      help="also process the files listed in FILE (one per "
+                           "line, '-' for stdin), one by one")
 
     # no args, print help (might change in the future)
     if len(argv) <= 1:
         _print_help(main_cmd, parser, file=sys.stderr)
         return 1
 
-    # collect options for the main command and get the command offset
-    offset = -1
-    pre_command = []
-    for i, a in enumerate(argv):
-        if i == 0:
-            continue
-        elif a.startswith("-"):
-            pre_command.append(a)
-        else:
-            offset = i
-            break
-
-    # parse the global options
-    options = parser.parse_args(pre_command)[0]
+    # parse the global options, the command follows them
+    options, rest = parser.parse_args(argv[1:])
+    offset = len(argv) - len(rest) if rest else -1
 
     # --help somewhere
     if options.help:
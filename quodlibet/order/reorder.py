@@ -7,7 +7,7 @@
 
 import random
 
-from quodlibet import _
+from quodlibet import _, print_d
 from quodlibet.order import Order, OrderRemembered
 
 
@@ -17,45 +17,258 @@ class Reorder(Order):
     pass
 
 
-class OrderShuffle(Reorder, OrderRemembered):
-    name = "random"
-    display_name = _("Random")
-    accelerated_name = _("_Random")
+class _WeightTree:
+    """A Fenwick tree of non-negative integer weights.
+
+    Changing or appending a weight and finding the index at which the
+    running total of weights passes a value are all O(log n).
+    """
+
+    def __init__(self, weights=()):
+        self._weights = list(weights)
+        n = len(self._weights)
+        tree = [0] + self._weights
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def __len__(self):
+        return len(self._weights)
+
+    def __getitem__(self, index):
+        return self._weights[index]
+
+    def __setitem__(self, index, weight):
+        delta = weight - self._weights[index]
+        if not delta:
+            return
+        self._weights[index] = weight
+        tree = self._tree
+        n = len(self._weights)
+        i = index + 1
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, i):
+        """The sum of the first `i` weights"""
+
+        tree = self._tree
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def append(self, weight):
+        self._weights.append(weight)
+        i = len(self._weights)
+        self._tree.append(weight + self._prefix(i - 1) - self._prefix(i - (i & -i)))
+
+    @property
+    def total(self):
+        return self._prefix(len(self._weights))
+
+    def find(self, value):
+        """Returns the first index where the running total exceeds `value`,
+        which has to be in [0, total)
+        """
+
+        tree = self._tree
+        n = len(self._weights)
+        index = 0
+        step = 1 << n.bit_length()
+        while step:
+            next_ = index + step
+            if next_ <= n and tree[next_] <= value:
+                index = next_
+                value -= tree[next_]
+            step >>= 1
+        return index
+
+    def choice(self):
+        """Returns a random index with probability proportional to its weight
+        or None if all weights are zero"""
+
+        total = self.total
+        if total <= 0:
+            return None
+        return self.find(random.randrange(total))
+
+
+class _RemainingOrder(Reorder, OrderRemembered):
+    """Base class for orders picking a random row that hasn't been played.
+
+    The rows are weighted (unplayed rows by 1, see `weight` for more) in
+    `_WeightTree`s, which get updated as rows are played or appended, so
+    picking a row doesn't depend on the size of the playlist. Other changes
+    to the playlist make it rebuild them once on the next pick.
+    """
+
+    weighted = False
+    """Whether to pick rows proportional to `weight` instead of uniformly"""
+
+    def __init__(self):
+        super().__init__()
+        self._playlist = None
+        self._sigs = []
+        self._counts = None
+        self._scores = None
+        self._appended = 0
+
+    def weight(self, song) -> int:
+        """The relative (integer) chance of `song` getting picked"""
+
+        return 1
 
     def next(self, playlist, iter):
         super().next(playlist, iter)
-        remaining = self.remaining(playlist)
+        self._update(playlist)
+        if iter is not None:
+            self._mark(playlist, iter, True)
 
-        if not remaining:
+        index = None
+        if self._scores is not None:
+            index = self._scores.choice()
+        if index is None:
+            # When all scores are zero, fall back to unweighted shuffle
+            index = self._counts.choice()
+        if index is None:
             self.reset(playlist)
             return None
-
-        index = random.choice(list(remaining))
         return playlist.get_iter((index,))
 
+    def previous(self, playlist, iter):
+        iter = super().previous(playlist, iter)
+        if iter is not None:
+            self._update(playlist)
+            self._mark(playlist, iter, False)
+        return iter
+
+    def set(self, playlist, iter):
+        iter = super().set(playlist, iter)
+        if iter is not None:
+            self._update(playlist)
+            self._mark(playlist, iter, True)
+        return iter
+
+    def reset(self, playlist):
+        super().reset(playlist)
+        self._counts = None
+
+    def _mark(self, playlist, iter, played):
+        path = playlist.get_path(iter)
+        if path is None:
+            return
+        index = path.get_indices()[0]
+        self._counts[index] = 0 if played else 1
+        if self._scores is not None:
+            self._scores[index] = (
+                0 if played else self.weight(playlist.get_value(iter)))
+
+    def _update(self, playlist):
+        """Makes sure the weights match the playlist rows"""
+
+        if playlist is not self._playlist:
+            self._attach(playlist)
+        counts = self._counts
+        if counts is not None and self._appended:
+            scores = self._scores
+            for index in range(len(counts), len(counts) + self._appended):
+                counts.append(1)
+                if scores is not None:
+                    song = playlist.get_value(playlist.get_iter((index,)))
+                    scores.append(self.weight(song))
+            self._appended = 0
+        if counts is None or len(counts) != len(playlist):
+            self._rebuild(playlist)
+
+    def _rebuild(self, playlist):
+        print_d(f"Played {len(self._played)} of {len(playlist)} song(s)")
+        played = set()
+        for iter in self._played:
+            path = playlist.get_path(iter)
+            if path is not None:
+                played.add(path.get_indices()[0])
+        self._counts = _WeightTree(
+            0 if i in played else 1 for i in range(len(playlist)))
+        if self.weighted:
+            self._scores = _WeightTree(
+                0 if i in played else self.weight(song)
+                for i, song in enumerate(playlist.itervalues()))
+        self._appended = 0
+
+    def _attach(self, playlist):
+        self._detach()
+        self._playlist = playlist
+        self._sigs = [
+            playlist.connect("row-inserted", self.__row_inserted),
+            playlist.connect("row-deleted", self.__rows_moved),
+            playlist.connect("rows-reordered", self.__rows_moved),
+        ]
+        if self.weighted:
+            self._sigs.append(
+                playlist.connect("row-changed", self.__row_changed))
+
+    def _detach(self):
+        if self._playlist is not None:
+            for sig in self._sigs:
+                self._playlist.disconnect(sig)
+        self._playlist = None
+        self._sigs = []
+        self._counts = self._scores = None
+        self._appended = 0
+
+    def _in_use(self, playlist):
+        order = getattr(playlist, "order", None)
+        while order is not None:
+            if order is self:
+                return True
+            order = getattr(order, "wrapped", None)
+        return False
+
+    def __row_inserted(self, playlist, path, iter):
+        if not self._in_use(playlist):
+            # replaced by another order, don't keep the playlist busy
+            self._detach()
+            return
+        counts = self._counts
+        if (counts is not None
+                and path.get_indices()[0] == len(counts) + self._appended):
+            self._appended += 1
+        else:
+            self._counts = None
+
+    def __rows_moved(self, playlist, path, *args):
+        if not self._in_use(playlist):
+            self._detach()
+            return
+        self._counts = None
 
-class OrderWeighted(Reorder, OrderRemembered):
+    def __row_changed(self, playlist, path, iter):
+        counts = self._counts
+        if counts is None:
+            return
+        index = path.get_indices()[0]
+        if index < len(counts) and counts[index]:
+            self._scores[index] = self.weight(playlist.get_value(iter))
+
+
+class OrderShuffle(_RemainingOrder):
+    name = "random"
+    display_name = _("Random")
+    accelerated_name = _("_Random")
+
+
+class OrderWeighted(_RemainingOrder):
     name = "weighted"
     display_name = _("Prefer higher rated")
     accelerated_name = _("Prefer _higher rated")
 
-    def next(self, playlist, iter):
-        super().next(playlist, iter)
-        remaining = self.remaining(playlist)
-
-        # Don't try to search through an empty / played playlist.
-        if not remaining:
-            self.reset(playlist)
-            return None
+    weighted = True
 
-        total_score = sum([song("~#rating") for song in remaining.values()])
-        if total_score == 0:
-            # When all songs are rated zero, fall back to unweighted shuffle
-            return playlist.get_iter((random.choice(list(remaining)),))
-        choice = random.random() * total_score
-        current = 0.0
-        for i, song in remaining.items():
-            current += song("~#rating")
-            if current >= choice:
-                return playlist.get_iter([i])
-        raise ValueError
+    def weight(self, song):
+        # ratings are floats, scale them so weights stay exact integers
+        return max(0, round(song("~#rating") * 1000))
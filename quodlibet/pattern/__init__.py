@@ -5,7 +5,8 @@
 
 from ._pattern import (Pattern, FileFromPattern, XMLFromPattern,
                        XMLFromMarkupPattern, Error,
-                       ArbitraryExtensionFileFromPattern, URLFromPattern)
+                       ArbitraryExtensionFileFromPattern, URLFromPattern,
+                       format_many, format_cache, FormatCache)
 
 
 URLFromPattern
@@ -15,3 +16,6 @@ Pattern
 XMLFromMarkupPattern
 XMLFromPattern
 Error
+format_many
+format_cache
+FormatCache
@@ -19,10 +19,11 @@ from urllib.parse import quote_plus
 
 from senf import fsnative
 
-from quodlibet import util
+from quodlibet import config, util
 from quodlibet.query import Query
 from quodlibet.util.path import strip_win32_incompat_from_path, limit_path
-from quodlibet.formats._audio import decode_value, FILESYSTEM_TAGS
+from quodlibet.formats._audio import (decode_value, FILESYSTEM_TAGS,
+                                      VOLATILE_TAGS)
 
 # Token types.
 (OPEN, CLOSE, TEXT, COND, EOF, DISJ) = range(6)
@@ -269,18 +270,37 @@ class PatternFormatter:
             return values
 
     def format(self, song):
-        value = "".join(self.__func(self.SongProxy(song, self._format)))
+        return self._format_song(song, song)
+
+    def _format_song(self, song, lookups):
+        value = "".join(self.__func(self.SongProxy(lookups, self._format)))
         if self._post:
             return self._post(value, song)
         return value
 
+    def format_many(self, songs):
+        """Like `format` for each of `songs`, using `format_cache`"""
+
+        return [values[0] for values in
+                _format_many([(self, self._format_song)], songs)]
+
     def format_list(self, song):
         """Formats the output of a list pattern, generating all the
         combinations always returns pairs of display and sort values. The
         returned set will never be empty (e.g. for an empty pattern).
         """
+        return self._format_list_song(song, song)
+
+    def format_list_many(self, songs):
+        """Like `format_list` for each of `songs`, using `format_cache`"""
+
+        key = (self, "list")
+        return [values[0] for values in
+                _format_many([(key, self._format_list_song)], songs)]
+
+    def _format_list_song(self, song, lookups):
         vals = [("", "")]
-        for val in self.__list_func(self.SongProxy(song, self._format)):
+        for val in self.__list_func(self.SongProxy(lookups, self._format)):
             if not val:
                 continue
             if isinstance(val, list): # list of strings or pairs
@@ -419,6 +439,182 @@ def Pattern(string, formatter_cls=PatternFormatter, max_cache_size=100,
     return cache[(formatter_cls, string)]
 
 
+_volatile_keys: dict[str, bool] = {}
+
+
+def _is_volatile(key):
+    try:
+        return _volatile_keys[key]
+    except KeyError:
+        volatile = _volatile_keys[key] = any(
+            tag in VOLATILE_TAGS or "~" + tag in VOLATILE_TAGS
+            for tag in util.tagsplit(key))
+        return volatile
+
+
+class _SongLookups:
+    """Wraps a song, remembering the tag values looked up while formatting
+    it, so other patterns don't have to look them up again.
+
+    `volatile` gets set once a tag in `VOLATILE_TAGS` is looked up.
+    """
+
+    def __init__(self, song):
+        self.__song = song
+        self.__values = {}
+        self.volatile = False
+
+    def __lookup(self, kind, func, key):
+        if _is_volatile(key):
+            self.volatile = True
+        try:
+            return self.__values[(kind, key)]
+        except KeyError:
+            value = self.__values[(kind, key)] = func(key)
+            return value
+
+    def __call__(self, key, *args):
+        if args:
+            if _is_volatile(key):
+                self.volatile = True
+            return self.__song(key, *args)
+        return self.__lookup("call", self.__song, key)
+
+    def get(self, key, default=None):
+        if _is_volatile(key):
+            self.volatile = True
+        return self.__song.get(key, default)
+
+    def comma(self, key):
+        return self.__lookup("comma", self.__song.comma, key)
+
+    def list_separate(self, key):
+        return self.__lookup("list", self.__song.list_separate, key)
+
+
+class FormatCache:
+    """Keeps the results of formatting songs with patterns, for the up to
+    `max_size` songs formatted last, until the songs change.
+
+    Results are only kept while attached to a library (or librarian), whose
+    `changed` and `removed` signals drop the results of those songs.
+    Results using tags in `VOLATILE_TAGS` aren't kept, and all get dropped
+    once the rating or duration display settings change. Not thread-safe.
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._songs: OrderedDict = OrderedDict()
+        """Results by formatter key by song"""
+        self._library = None
+        self._sigs: list[int] = []
+        self._settings: tuple | None = None
+
+    def __len__(self):
+        return len(self._songs)
+
+    @property
+    def enabled(self):
+        return self._library is not None and self.max_size > 0
+
+    def attach(self, library):
+        """Keep results until the songs change in `library`"""
+
+        self.detach()
+        self._library = library
+        self._sigs = [
+            library.connect("changed", self.__changed),
+            library.connect("removed", self.__changed),
+        ]
+
+    def detach(self):
+        """Drop all results and stop keeping new ones"""
+
+        if self._library is not None:
+            for sig in self._sigs:
+                self._library.disconnect(sig)
+        self._library = None
+        self._sigs = []
+        self.invalidate()
+
+    def check_settings(self):
+        """Drops all results if the settings changed since the last call"""
+
+        ratings = config.RATINGS
+        settings = (ratings.number, ratings.default, ratings.full_symbol,
+                    ratings.blank_symbol, config.DURATION.format)
+        if settings != self._settings:
+            self.invalidate()
+            self._settings = settings
+
+    def results(self, song):
+        """Returns the (mutable) results for `song` by formatter key"""
+
+        results = self._songs.get(song)
+        if results is None:
+            results = self._songs[song] = {}
+            while len(self._songs) > self.max_size:
+                self._songs.popitem(last=False)
+        else:
+            self._songs.move_to_end(song)
+        return results
+
+    def invalidate(self, songs=None):
+        """Forgets the results for `songs`, or all"""
+
+        if songs is None:
+            self._songs.clear()
+        else:
+            for song in songs:
+                self._songs.pop(song, None)
+
+    def __changed(self, library, songs):
+        self.invalidate(songs)
+
+
+format_cache = FormatCache()
+"""The cache `format_many` uses, attached to the librarian on start"""
+
+
+def _format_many(funcs, songs):
+    formatted = []
+    if not format_cache.enabled:
+        for song in songs:
+            lookups = _SongLookups(song)
+            formatted.append(tuple(func(song, lookups) for key, func in funcs))
+        return formatted
+
+    format_cache.check_settings()
+    for song in songs:
+        results = format_cache.results(song)
+        values = []
+        lookups = None
+        for key, func in funcs:
+            try:
+                value = results[key]
+            except KeyError:
+                if lookups is None:
+                    lookups = _SongLookups(song)
+                lookups.volatile = False
+                value = func(song, lookups)
+                if not lookups.volatile:
+                    results[key] = value
+            values.append(value)
+        formatted.append(tuple(values))
+    return formatted
+
+
+def format_many(patterns, songs):
+    """Formats each of `songs` with all of `patterns` (see `Pattern`) in one
+    pass, looking up each tag only once per song.
+
+    Returns a tuple of the results of `patterns` per song. Results are kept
+    in `format_cache` until the songs change.
+    """
+
+    return _format_many([(p, p._format_song) for p in patterns], songs)
+
+
 def _number(key, value):
     if key == "tracknumber":
         parts = value.split("/")
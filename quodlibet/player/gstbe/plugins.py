@@ -40,10 +40,11 @@ class GStreamerPluginHandler(PluginHandler):
         return self.__elements[plugin]
 
     def plugin_handle(self, plugin):
-        if not issubclass(plugin.cls, GStreamerPlugin):
+        if not plugin.is_subclass(GStreamerPlugin):
             return False
 
-        plugin.cls._handler = self
+        # set on the base class, so plugins not imported yet get it too
+        GStreamerPlugin._handler = self
         return True
 
     def plugin_enable(self, plugin):
@@ -5,27 +5,32 @@
 # the Free Software Foundation; either version 2 of the License, or
 # (at your option) any later version.
 
+import os
+import sys
 from typing import Optional
 from collections.abc import Iterable
 
 from quodlibet import _
 from quodlibet import config
+from quodlibet import const
 from quodlibet import util
 from quodlibet.qltk.ccb import ConfigCheckButton
 from quodlibet.util import escape
 from quodlibet.util.config import ConfigProxy
 from quodlibet.util.dprint import print_d
-from quodlibet.util.modulescanner import ModuleScanner
+from quodlibet.util.modulescanner import ModuleScanner, ModuleManifest
 
 
-def init(folders=None, disable_plugins=False):
+def init(folders=None, disable_plugins=False, manifest=None):
     """folders: list of paths to look for plugins
     disable_plugins: disables all plugins, but does not forget which
     plugins are enabled.
+    manifest: a file describing the plugins, so only enabled plugins
+    need to be imported.
     """
     if disable_plugins:
         folders = []
-    manager = PluginManager.instance = PluginManager(folders)
+    manager = PluginManager.instance = PluginManager(folders, manifest)
     return manager
 
 
@@ -93,35 +98,79 @@ def migrate_old_config():
         config.set("plugins", "active_plugins", "\n".join(active))
 
 
-def list_plugins(module):
-    """Return all objects of the module that satisfy the basic
-    plugin needs: id, name and don't start with '_'
-
-    If '__all__' is defined, only plugins in '__all__' will be loaded.
-    """
-
+def _list_plugin_attrs(module):
     try:
-        objs = [getattr(module, attr) for attr in module.__all__]
+        attrs = list(module.__all__)
     except AttributeError:
-        objs = [getattr(module, attr) for attr in vars(module)
-                if not attr.startswith("_")]
+        attrs = [attr for attr in vars(module) if not attr.startswith("_")]
 
     ok = []
-    for obj in objs:
+    for attr in attrs:
+        obj = getattr(module, attr)
         if hasattr(obj, "PLUGIN_ID"):
             if not hasattr(obj, "PLUGIN_NAME"):
                 obj.PLUGIN_NAME = obj.PLUGIN_ID
-            ok.append(obj)
+            ok.append((attr, obj))
 
     return ok
 
 
+def list_plugins(module):
+    """Return all objects of the module that satisfy the basic
+    plugin needs: id, name and don't start with '_'
+
+    If '__all__' is defined, only plugins in '__all__' will be loaded.
+    """
+
+    return [obj for attr, obj in _list_plugin_attrs(module)]
+
+
+def _class_name(cls):
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def describe_plugins(module):
+    """Returns what a `LazyPlugin` needs to know about the plugins of
+    `module` without importing it, for the module manifest"""
+
+    infos = []
+    for attr, obj in _list_plugin_attrs(module):
+        plugin = Plugin(obj)
+        bases = getattr(obj, "__mro__", [type(obj)])
+        infos.append({
+            "attr": attr,
+            "id": plugin.id,
+            "name": plugin.name,
+            "description": plugin.description,
+            "description_markup": plugin.description_markup,
+            "tags": list(plugin.tags),
+            "icon": plugin.icon,
+            "can_enable": plugin.can_enable,
+            "instance": bool(getattr(obj, "PLUGIN_INSTANCE", False)),
+            "bases": [_class_name(cls) for cls in bases],
+        })
+    return infos
+
+
+def manifest_key():
+    """Changes whenever cached plugin descriptions might be outdated"""
+
+    version = ".".join(map(str, sys.version_info[:2]))
+    languages = os.environ.get("LANGUAGE", "") or os.environ.get("LANG", "")
+    return f"{const.VERSION} {version} {languages}"
+
+
 class PluginModule:
 
     def __init__(self, name, module):
+        """`module` is a `quodlibet.util.modulescanner.Module`, if it
+        wasn't imported yet its plugins get imported on demand"""
+
         self.name = name
-        self.module = module
-        self.plugins = [Plugin(cls) for cls in list_plugins(module)]
+        if module.loaded or module.info is None:
+            self.plugins = [Plugin(cls) for cls in list_plugins(module.module)]
+        else:
+            self.plugins = [LazyPlugin(module, info) for info in module.info]
 
 
 class Plugin:
@@ -168,6 +217,17 @@ class Plugin:
     def icon(self):
         return getattr(self.cls, "PLUGIN_ICON", None)
 
+    def load(self):
+        """Makes sure `cls` is available, returns False if importing the
+        plugin failed"""
+
+        return True
+
+    def is_subclass(self, base):
+        """Like `issubclass(self.cls, base)`"""
+
+        return issubclass(self.cls, base)
+
     def get_instance(self):
         """A singleton"""
 
@@ -185,6 +245,73 @@ class Plugin:
         return self.instance
 
 
+class LazyPlugin(Plugin):
+    """A plugin described by the module manifest. Its module only gets
+    imported once `cls` is needed, e.g. when it gets enabled."""
+
+    def __init__(self, module, info):
+        self.handlers = []
+        self.instance = None
+        self._module = module
+        self._info = info
+        self._cls = None
+
+    @property
+    def cls(self):
+        if self._cls is None:
+            cls = getattr(self._module.module, self._info["attr"])
+            if not hasattr(cls, "PLUGIN_NAME"):
+                cls.PLUGIN_NAME = cls.PLUGIN_ID
+            self._cls = cls
+        return self._cls
+
+    @property
+    def can_enable(self):
+        return self._info["can_enable"]
+
+    @property
+    def id(self):
+        return self._info["id"]
+
+    @property
+    def name(self):
+        return self._info["name"]
+
+    @property
+    def description(self):
+        return self._info["description"]
+
+    @property
+    def description_markup(self):
+        return self._info["description_markup"]
+
+    @property
+    def tags(self):
+        return self._info["tags"]
+
+    @property
+    def icon(self):
+        return self._info["icon"]
+
+    def load(self):
+        try:
+            self.cls
+        except Exception:
+            util.print_exc()
+            return False
+        return True
+
+    def is_subclass(self, base):
+        if self._cls is not None:
+            return issubclass(self._cls, base)
+        return _class_name(base) in self._info["bases"]
+
+    def get_instance(self):
+        if not self._info["instance"]:
+            return
+        return super().get_instance()
+
+
 class PluginHandler:
     """A plugin handler can choose to handle plugins, as well as control
     their enabled state."""
@@ -238,9 +365,12 @@ class PluginManager:
     instance: Optional["PluginManager"] = None
     """Default instance"""
 
-    def __init__(self, folders=None):
+    def __init__(self, folders=None, manifest=None):
         """folders is a list of paths that will be scanned for plugins.
         Plugins in later paths will be preferred if they share a name.
+
+        If a manifest filename is given, plugins described in it get
+        imported only when needed.
         """
 
         super().__init__()
@@ -248,7 +378,10 @@ class PluginManager:
         if folders is None:
             folders = []
 
-        self.__scanner = ModuleScanner(folders)
+        if manifest is not None:
+            manifest = ModuleManifest(
+                manifest, describe_plugins, manifest_key())
+        self.__scanner = ModuleScanner(folders, manifest)
         self.__modules = {}     # name: PluginModule
         self.__handlers = []    # handler list
         self.__enabled = set()  # (possibly) enabled plugin IDs
@@ -281,8 +414,7 @@ class PluginManager:
         self.__enabled.update(reload_ids)
 
         for name in added:
-            new_module = self.__scanner.modules[name]
-            self.__add_module(name, new_module.module)
+            self.__add_module(name, self.__scanner.modules[name])
 
         print_d("Rescanning done.")
 
@@ -361,6 +493,8 @@ class PluginManager:
                     util.print_exc()
         else:
             print_d("Enable %r" % plugin.id)
+            if not plugin.load():
+                return
             obj = plugin.get_instance()
             if obj and hasattr(obj, "enabled"):
                 try:
@@ -49,11 +49,31 @@ class CoverSourcePlugin(GObject.Object):
     embedded = False
     """Whether the source is an embedded one"""
 
+    cacheable = False
+    """Whether `cover` only depends on the song, the files in the
+    directories `cache_dirs` returns and the settings `cache_config`
+    returns, so results can be cached until one of them changes"""
+
     def __init__(self, song, cancellable=None):
         self.song = song
         self.cancellable = cancellable
         super().__init__()
 
+    @classmethod
+    def cache_dirs(cls, song):
+        """Returns the existing directories `cover` looks in for `song`,
+        starting with the song's own directory. Only used if `cacheable`.
+        """
+
+        return [song("~dirname")]
+
+    @classmethod
+    def cache_config(cls):
+        """Returns a text of the settings `cover` depends on. Only used if
+        `cacheable`."""
+
+        return ""
+
     @classmethod
     def group_by(cls, song):
         """Returns a hashable for a song, for grouping songs in groups where
@@ -150,7 +150,7 @@ class EventPluginHandler(PluginHandler):
             check_wrapper_changed(librarian, songs)
 
     def plugin_handle(self, plugin):
-        return issubclass(plugin.cls, EventPlugin)
+        return plugin.is_subclass(EventPlugin)
 
     def plugin_enable(self, plugin):
         self.__plugins[plugin.cls] = plugin.get_instance()
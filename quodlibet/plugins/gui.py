@@ -37,7 +37,7 @@ class UserInterfacePluginHandler(PluginHandler):
         self.__sidebars = {}
 
     def plugin_handle(self, plugin):
-        return issubclass(plugin.cls, UserInterfacePlugin)
+        return plugin.is_subclass(UserInterfacePlugin)
 
     def plugin_enable(self, plugin):
         self.__plugins[plugin.cls] = pl_obj = plugin.get_instance()
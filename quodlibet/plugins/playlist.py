@@ -195,7 +195,7 @@ class PlaylistPluginHandler(PluginHandler):
                     browser.changed(pl)
 
     def plugin_handle(self, plugin):
-        return issubclass(plugin.cls, PlaylistPlugin)
+        return plugin.is_subclass(PlaylistPlugin)
 
     def plugin_enable(self, plugin):
         self.__plugins.append(plugin.cls)
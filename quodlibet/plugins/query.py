@@ -89,7 +89,7 @@ class QueryPluginHandler(PluginHandler):
         self.plugins = {}
 
     def plugin_handle(self, plugin):
-        return issubclass(plugin.cls, QueryPlugin)
+        return plugin.is_subclass(QueryPlugin)
 
     def plugin_enable(self, plugin):
         self.plugins[plugin.cls.key or plugin.name] = plugin.cls()
@@ -71,7 +71,7 @@ class EditingPluginHandler(GObject.GObject, PluginHandler):
         return list(self.__plugins)
 
     def plugin_handle(self, plugin):
-        return issubclass(plugin.cls, self.Kind)
+        return plugin.is_subclass(self.Kind)
 
     def plugin_enable(self, plugin):
         self.__plugins.append(plugin.cls)
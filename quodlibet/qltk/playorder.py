@@ -77,7 +77,7 @@ class PluggableOrders(Orders, PluginManager):
             print_w("No plugin manager found")
 
     def plugin_handle(self, plugin):
-        return issubclass(plugin.cls, self.base_cls)
+        return plugin.is_subclass(self.base_cls)
 
     def plugin_enable(self, plugin):
         plugin_cls = plugin.cls
@@ -48,7 +48,7 @@ PLUGIN_CATEGORIES = {
 def category_of(plugin: Plugin) -> str:
     try:
         return next(cat for cat, cls in PLUGIN_CATEGORIES.items()
-                    if issubclass(plugin.cls, cls))
+                    if plugin.is_subclass(cls))
     except StopIteration:
         return _("Unknown")
 
@@ -344,7 +344,7 @@ class PluginPreferencesContainer(Gtk.VBox):
         if frame.get_child():
             frame.get_child().destroy()
 
-        if plugin is None:
+        if plugin is None or not plugin.load():
             frame.hide()
         else:
             instance_or_cls = plugin.get_instance() or plugin.cls
@@ -484,7 +484,7 @@ class PluginWindow(UniqueWindow, PersistentWindowMixin):
         entry, state_combo, type_combo = data
 
         plugin_type = type_combo.get_active_type()
-        if not issubclass(plugin.cls, plugin_type):
+        if not plugin.is_subclass(plugin_type):
             return False
 
         tag_row = state_combo.get_active_row()
@@ -422,6 +422,7 @@ class SongList(AllTreeView, SongListDnDMixin, DragScroll, util.InstanceTracker):
         self._sort_sequence: list[str] = []
         self.set_column_headers(self.headers)
         librarian = library.librarian or library
+        self.__sort_keys = getattr(librarian, "sort_keys", None)
 
         connect_destroy(librarian, "changed", self.__song_updated)
         connect_destroy(librarian, "removed", self.__song_removed, player)
@@ -788,12 +789,13 @@ class SongList(AllTreeView, SongListDnDMixin, DragScroll, util.InstanceTracker):
         """Returns mapping from new position to position in given list of songs
         when sorted based on the column sort orders"""
 
+        # quodlibet.library imports this module
+        from quodlibet.library.sorting import sort_order
+
         orders = self.get_sort_orders()
         if orders:
-            song_order = list(range(len(songs)))
-            for key, reverse in self.__get_song_sort_key_func(orders):
-                song_order.sort(key=lambda i: key(songs[i]), reverse=reverse)
-            return song_order
+            keys = self.__get_song_sort_key_func(orders)
+            return sort_order(songs, keys[::-1])
         else:
             return None
 
@@ -820,6 +822,8 @@ class SongList(AllTreeView, SongListDnDMixin, DragScroll, util.InstanceTracker):
 
             if tag == "":
                 key_func.append((lambda s: s.sort_key, reverse))
+            elif self.__sort_keys is not None:
+                key_func.append((self.__sort_keys.key_func(tag), reverse))
             else:
                 sort_func = AudioFile.sort_by_func(tag)
                 key_func.append((sort_func, reverse))
@@ -840,9 +844,16 @@ class SongList(AllTreeView, SongListDnDMixin, DragScroll, util.InstanceTracker):
             model.append_many(songs)
             return
 
-        for song in songs:
-            insert_iter = self.__find_song_position(song)
-            model.insert_before(insert_iter, row=[song])
+        from quodlibet.library.sorting import merge_blocks
+
+        def get(index):
+            return model.get_value(model.iter_nth_child(None, index))
+
+        keys = self.__get_song_sort_key_func(self.get_sort_orders())[::-1]
+        inserted = 0
+        for position, block in merge_blocks(len(model), get, list(songs), keys):
+            model.insert_many(position + inserted, block)
+            inserted += len(block)
 
     def set_songs(self, songs: list[AudioFile], sorted: bool = False,
                   scroll: bool = True, scroll_select: bool = False):
@@ -251,7 +251,7 @@ class SongsMenuPluginHandler(PluginHandler):
             check_wrapper_changed(library, filter(None, songs))
 
     def plugin_handle(self, plugin):
-        return issubclass(plugin.cls, SongsMenuPlugin)
+        return plugin.is_subclass(SongsMenuPlugin)
 
     def plugin_enable(self, plugin):
         self.__plugins.append(plugin.cls)
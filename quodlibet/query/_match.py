@@ -12,15 +12,19 @@
 from __future__ import annotations
 
 import operator
+import sre_constants
+import sre_parse
 import time
+import unicodedata
 from enum import auto, Enum
 from numbers import Real
-from typing import TypeVar
-from collections.abc import Iterable
+from typing import Any, TypeVar
+from collections.abc import Callable, Iterable
 
 from quodlibet.formats import FILESYSTEM_TAGS, TIME_TAGS
 from quodlibet.formats._audio import SIZE_TAGS, DURATION_TAGS
-from quodlibet.unisearch import compile
+from quodlibet.unisearch import compile_regex
+from quodlibet.unisearch.fold import fold_words
 from quodlibet.util import parse_date
 from senf import fsn2text, fsnative
 
@@ -35,6 +39,40 @@ class ParseError(Error):
     pass
 
 
+class Compiler:
+    """Generates the source of a single Python function from a query tree.
+
+    Nodes contribute expressions (see `Node._compile`) which get combined
+    into one function, so searching doesn't need a method call per node.
+    Objects the expressions need (regexes, fallback functions...) are
+    passed in as globals of the generated function.
+    """
+
+    def __init__(self):
+        self._globals: dict[str, Any] = {
+            "fsn2text": fsn2text,
+            "fs_default": fsnative(),
+            "normalize": unicodedata.normalize,
+            "time": time.time,
+            "round": round,
+        }
+
+    def const(self, value: Any) -> str:
+        """Returns a name under which `value` is available to expressions"""
+
+        name = "_c%d" % len(self._globals)
+        self._globals[name] = value
+        return name
+
+    def compile(self, node: Node) -> Callable[[Any], bool]:
+        expr = node._compile(self, "data")
+        source = ("def search(data):\n"
+                  "    return True if %s else False\n" % expr)
+        namespace = dict(self._globals)
+        exec(compile(source, "<query>", "exec"), namespace)
+        return namespace["search"]
+
+
 class Node:
 
     def search(self, data: T) -> bool:
@@ -43,6 +81,35 @@ class Node:
     def filter(self, sequence: Iterable[T]) -> list[T]:
         return [s for s in sequence if self.search(s)]
 
+    def compile(self) -> Callable[[T], bool]:
+        """Returns a function behaving like `search`, but (usually) faster
+        as the whole tree is evaluated in one specialised function.
+        """
+
+        return Compiler().compile(self)
+
+    def _compile(self, compiler: Compiler, data: str) -> str:
+        """Returns a Python expression evaluating this node for the object
+        the expression `data` refers to.
+
+        The default just calls `search`.
+        """
+
+        return f"{compiler.const(self.search)}({data})"
+
+    def candidates(self, index) -> set[T] | None:
+        """Returns a set of songs from `index` (a `library.index.TagIndex`)
+        containing at least all matching ones, or None if the index can't
+        narrow them down.
+        """
+
+        return None
+
+    def _value_candidates(self, index, name: str) -> set[T] | None:
+        """Like `candidates`, for a node matching the value of tag `name`"""
+
+        return None
+
     def _unpack(self) -> Node:
         return self
 
@@ -60,6 +127,28 @@ class Node:
         return True
 
 
+def _literal_words(pattern: str) -> list[str]:
+    """Returns the folded words of the literal text any match of `pattern`
+    has to contain.
+    """
+
+    pattern = unicodedata.normalize("NFC", pattern)
+    try:
+        parsed = sre_parse.parse(pattern)
+    except sre_constants.error:
+        return []
+
+    words = []
+    literal = ""
+    for op, av in list(parsed) + [(None, None)]:
+        if op == sre_constants.LITERAL:
+            literal += chr(av)
+        elif literal:
+            words.extend(fold_words(literal))
+            literal = ""
+    return words
+
+
 class Regex(Node):
 
     def __init__(self, pattern: str, mod_string: str):
@@ -70,12 +159,32 @@ class Regex(Node):
         dot_all = "s" in self.mod_string
         asym = "d" in self.mod_string
         try:
-            re = compile(self.pattern, ignore_case, dot_all, asym)
-            self.search = re  # type: ignore
+            self._re = compile_regex(self.pattern, ignore_case, dot_all, asym)
         except ValueError as e:
             raise ParseError(
                 "The regular expression /%s/ is invalid." % self.pattern) from e
 
+        reg_search = self._re.search
+        normalize = unicodedata.normalize
+
+        def search(text):
+            return bool(reg_search(normalize("NFC", text)))
+
+        self.search = search  # type: ignore
+        self._words = _literal_words(self.pattern)
+
+    def compile(self):
+        return self.search
+
+    def _value_candidates(self, index, name):
+        if not self._words:
+            return None
+        return index.lookup(name, self._words)
+
+    def _compile(self, compiler, data):
+        search = compiler.const(self._re.search)
+        return f"({search}(normalize('NFC', {data})) is not None)"
+
     def __repr__(self):
         return f"<Regex pattern={self.pattern} mod={self.mod_string}>"
 
@@ -89,6 +198,9 @@ class True_(Node):
     def filter(self, sequence):
         return list(sequence)
 
+    def _compile(self, compiler, data):
+        return "True"
+
     def __repr__(self):
         return "<True>"
 
@@ -109,6 +221,12 @@ class False_(Node):
     def filter(self, sequence):
         return []
 
+    def _compile(self, compiler, data):
+        return "False"
+
+    def candidates(self, index):
+        return set()
+
     def __repr__(self):
         return "<False>"
 
@@ -132,6 +250,29 @@ class Union(Node):
                 return True
         return False
 
+    def _compile(self, compiler, data):
+        if not self.res:
+            return "False"
+        return "(%s)" % " or ".join(r._compile(compiler, data) for r in self.res)
+
+    def candidates(self, index):
+        result = set()
+        for r in self.res:
+            songs = r.candidates(index)
+            if songs is None:
+                return None
+            result |= songs
+        return result
+
+    def _value_candidates(self, index, name):
+        result = set()
+        for r in self.res:
+            songs = r._value_candidates(index, name)
+            if songs is None:
+                return None
+            result |= songs
+        return result
+
     def __repr__(self):
         return "<Union %r>" % self.res
 
@@ -174,6 +315,27 @@ class Inter(Node):
             current = list(current)
         return current
 
+    def _compile(self, compiler, data):
+        if not self.res:
+            return "True"
+        return "(%s)" % " and ".join(r._compile(compiler, data) for r in self.res)
+
+    def candidates(self, index):
+        result = None
+        for r in self.res:
+            songs = r.candidates(index)
+            if songs is not None:
+                result = songs if result is None else result & songs
+        return result
+
+    def _value_candidates(self, index, name):
+        result = None
+        for r in self.res:
+            songs = r._value_candidates(index, name)
+            if songs is not None:
+                result = songs if result is None else result & songs
+        return result
+
     def __repr__(self):
         return "<Inter %r>" % self.res
 
@@ -204,6 +366,9 @@ class Neg(Node):
     def search(self, data):
         return not self.res.search(data)
 
+    def _compile(self, compiler, data):
+        return f"(not {self.res._compile(compiler, data)})"
+
     def __repr__(self):
         return "<Neg %r>" % self.res
 
@@ -254,6 +419,30 @@ class Numcmp(Node):
             return self._op(val, val2)
         return False
 
+    _op_symbols = {
+        operator.lt: "<",
+        operator.le: "<=",
+        operator.gt: ">",
+        operator.ge: ">=",
+        operator.eq: "==",
+        operator.ne: "!=",
+    }
+
+    def _compile(self, compiler, data):
+        # Inline the common case of comparing a (non-date) tag to a number
+        expr, expr2 = self._expr, self._expr2
+        if (type(expr) is not NumexprTag or expr.use_date()
+                or type(expr2) is not NumexprNumber):
+            return super()._compile(compiler, data)
+        value = f"_n := {data}({expr._ftag!r}, None)"
+        if expr._base_ftag in TIME_TAGS:
+            num = "round(time() - _n, 2)"
+        else:
+            num = "round(_n, 2)"
+        number = compiler.const(expr2._value)
+        op = self._op_symbols[self._op]
+        return f"(({value}) is not None and {num} {op} {number})"
+
     def __repr__(self):
         return "<Numcmp expr={!r}, op={!r}, expr2={!r}>".format(
             self._expr, self._op.__name__, self._expr2)
@@ -587,6 +776,38 @@ class Tag(Node):
 
         return False
 
+    def _compile(self, compiler, data):
+        values = []
+        for name in self._names:
+            if name in ("filename", "mountpoint"):
+                fallback = f"fsn2text({data}.get({'~' + name!r}, fs_default))"
+            else:
+                fallback = f"{data}.get({'~' + name!r}, '')"
+            values.append(f"(_v if (_v := {data}.get({name!r})) is not None "
+                          f"else {fallback})")
+        for name in self.__intern:
+            values.append(f"{data}({name!r})")
+        for name in self.__fs:
+            values.append(f"fsn2text({data}({name!r}, fs_default))")
+
+        if not values:
+            return "False"
+        if isinstance(self.res, Regex):
+            tests = [self.res._compile(compiler, value) for value in values]
+        else:
+            search = compiler.const(self.res.compile())
+            tests = [f"{search}({value})" for value in values]
+        return "(%s)" % " or ".join(tests)
+
+    def candidates(self, index):
+        result = set()
+        for name in self._names + self.__intern + self.__fs:
+            songs = self.res._value_candidates(index, name)
+            if songs is None:
+                return None
+            result |= songs
+        return result
+
     def __repr__(self):
         names = self._names + self.__intern
         return (f"<Tag names={names!r}, res={self.res!r}>")
@@ -49,6 +49,10 @@ class Query(Node):
     string: str | None = None
     """The original string which was used to create this query"""
 
+    compiled: bool = True
+    """Whether `search` and `filter` use a compiled version of the query
+    (see `Node.compile`) instead of walking the parsed tree"""
+
     def __init__(self, string: str, star: Iterable[str] | None = None):
         """Parses the query string and returns a match object.
 
@@ -115,13 +119,48 @@ class Query(Node):
     def __repr__(self) -> str:
         return f"<Query string={self.string!r} type={self.type!r} star={self.star!r}>"
 
+    @property
+    def _use_compiled(self) -> bool:
+        return self.compiled and not isinstance(self._match, match.True_ | False_)
+
     @cached_property
     def search(self):
-        return self._match.search
+        if not self._use_compiled:
+            return self._match.search
+        return self._match.compile()
 
     @cached_property
     def filter(self):
-        return self._match.filter
+        """Returns the matching items of a sequence. For a library with a
+        `tag_index` (or else `folded_text`) only the candidates it gives are
+        searched.
+        """
+
+        if not self._use_compiled:
+            match_filter = self._match.filter
+        else:
+            search = self.search
+
+            def match_filter(sequence):
+                return [s for s in sequence if search(s)]
+
+        def filter(sequence):
+            index = getattr(sequence, "tag_index", None)
+            if index is None:
+                index = getattr(sequence, "folded_text", None)
+            if index is not None:
+                candidates = self._match.candidates(index)
+                if candidates is not None:
+                    sequence = index.ordered(candidates)
+            return match_filter(sequence)
+
+        return filter
+
+    def compile(self):
+        return self._match.compile()
+
+    def candidates(self, index):
+        return self._match.candidates(index)
 
     @property
     def valid(self) -> bool:
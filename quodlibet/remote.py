@@ -10,7 +10,8 @@ import os
 
 from senf import path2fsn, fsn2bytes, bytes2fsn, fsnative
 
-from quodlibet.util import fifo, print_w
+from quodlibet.util import fifo, print_w, copool
+from quodlibet import util
 from quodlibet import get_user_dir
 try:
     from quodlibet.util import winpipe
@@ -154,11 +155,28 @@ class QuodLibetUnixRemote(RemoteBase):
             response = self._cmd_registry.handle_line(self._app, command)
             if path is not None:
                 path = bytes2fsn(path, None)
+                if response is not None and not isinstance(response, fsnative):
+                    copool.add(self._send_chunks, path, response, funcid=path)
+                    continue
                 with open(path, "wb") as h:
                     if response is not None:
                         assert isinstance(response, fsnative)
                         h.write(fsn2bytes(response, None))
 
+    def _send_chunks(self, path, chunks):
+        """Writes the chunks of a streamed response, one per iteration"""
+
+        try:
+            with open(path, "wb") as h:
+                for chunk in chunks:
+                    h.write(fsn2bytes(chunk, None))
+                    h.flush()
+                    yield True
+        except OSError as e:
+            print_w(f"Couldn't send response: {e!r}")
+        except Exception:
+            util.print_exc()
+
 
 Remote: type[RemoteBase]
 
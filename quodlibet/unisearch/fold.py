@@ -0,0 +1,77 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""
+Folding of text for search indices.
+
+fold(u"Björk – Jóga") => u"bjork - joga"
+
+Folding merges everything a search pattern can't tell apart: case,
+combining marks and the variants `re_add_variants` makes ASCII characters
+match. If a literal pattern matches some text, the folded literal is
+contained in the folded text, so an index of folded words can be used to
+narrow down what needs to be searched.
+"""
+
+import re
+import sys
+import unicodedata
+
+from quodlibet.util import cached_func
+
+from .db import get_replacement_mapping
+
+_WORD = re.compile(r"\w+")
+
+
+@cached_func
+def _get_fold_tables() -> tuple[dict[int, str], dict[int, str]]:
+    """Returns translation tables for before and after case folding"""
+
+    marks = {i: "" for i in range(sys.maxunicode + 1)
+             if unicodedata.category(chr(i)) == "Mn"}
+    before: dict[int, str] = {}
+    after: dict[int, str] = dict(marks)
+    # Python's case insensitive matching treats these as equal
+    after[ord("ı")] = "i"
+
+    def _fold(text):
+        return text.translate(before).casefold().translate(after)
+
+    variants: dict[str, set[str]] = {}
+    for key, values in get_replacement_mapping().items():
+        for value in values:
+            variants.setdefault(value, set()).add(key)
+
+    # keys can be variants themselves (æ -> ǣ, ae -> æ), so repeat
+    # until every variant folds the same as the key(s) it matches
+    changed = True
+    while changed:
+        changed = False
+        for value, keys in variants.items():
+            folded = min(_fold(k) for k in keys)
+            if _fold(value) == folded:
+                continue
+            changed = True
+            before[ord(value)] = folded
+            lower = value.casefold().translate(marks)
+            if len(lower) == 1:
+                after[ord(lower)] = folded
+
+    return before, after
+
+
+def fold(text: str) -> str:
+    """Returns a case and diacritic insensitive version of `text`"""
+
+    before, after = _get_fold_tables()
+    text = unicodedata.normalize("NFC", text)
+    return text.translate(before).casefold().translate(after)
+
+
+def fold_words(text: str) -> list[str]:
+    """Returns the words of the folded `text`"""
+
+    return _WORD.findall(fold(text))
@@ -270,17 +270,12 @@ def re_add_variants(text: str) -> str:
     return re_replace_literals(text, get_replacement_mapping())
 
 
-def compile(pattern: str, ignore_case: bool = True, dot_all: bool = False,
-            asym: bool = False) -> Callable[[str], bool]:
-    """
-    Args:
-        pattern (str): a unicode regex
-        ignore_case (bool): if case shouuld be ignored when matching
-        dot_all (bool): if "." should match newlines
-        asym (bool): if ascii should match similar looking unicode chars
-    Returns:
-        A callable which will return True if the pattern is contained in
-        the passed text.
+def compile_regex(pattern: str, ignore_case: bool = True, dot_all: bool = False,
+                  asym: bool = False) -> re.Pattern:
+    """Like `compile`, but returns the regular expression object.
+
+    The text to search has to be NFC normalized by the caller.
+
     Raises:
         ValueError: In case the regex is invalid
     """
@@ -305,9 +300,27 @@ def compile(pattern: str, ignore_case: bool = True, dot_all: bool = False,
         mods |= re.DOTALL
 
     try:
-        reg = re.compile(pattern, mods)
+        return re.compile(pattern, mods)
     except re.error as e:
         raise ValueError(e) from e
+
+
+def compile(pattern: str, ignore_case: bool = True, dot_all: bool = False,
+            asym: bool = False) -> Callable[[str], bool]:
+    """
+    Args:
+        pattern (str): a unicode regex
+        ignore_case (bool): if case shouuld be ignored when matching
+        dot_all (bool): if "." should match newlines
+        asym (bool): if ascii should match similar looking unicode chars
+    Returns:
+        A callable which will return True if the pattern is contained in
+        the passed text.
+    Raises:
+        ValueError: In case the regex is invalid
+    """
+
+    reg = compile_regex(pattern, ignore_case, dot_all, asym)
     normalize = unicodedata.normalize
 
     def search(text: str):
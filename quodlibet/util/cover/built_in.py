@@ -62,6 +62,8 @@ class FilesystemCover(CoverSourcePlugin):
                     "alongside the song.")
     DEBUG = False
 
+    cacheable = True
+
     cover_subdirs = {"scan", "scans", "images", "covers", "artwork"}
     cover_exts = {"jpg", "jpeg", "png", "gif"}
 
@@ -79,6 +81,24 @@ class FilesystemCover(CoverSourcePlugin):
         # in the common case this means we only search once per album
         return song("~dirname"), song.album_key
 
+    @classmethod
+    def cache_dirs(cls, song):
+        base = song("~dirname")
+        try:
+            entries = os.listdir(base)
+        except OSError:
+            entries = []
+        return [base] + sorted(
+            os.path.join(base, entry) for entry in entries
+            if entry.lower() in cls.cover_subdirs
+            and os.path.isdir(os.path.join(base, entry)))
+
+    @classmethod
+    def cache_config(cls):
+        if not config.getboolean("albumart", "force_filename"):
+            return ""
+        return "filename=" + config.get("albumart", "filename")
+
     @property
     def name(self):
         return "Filesystem"
@@ -0,0 +1,209 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""A persistent cache of the covers local cover sources found, and an
+in-memory cache of scaled covers"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from quodlibet import print_d, print_w
+from quodlibet.util.atomic import atomic_save
+from quodlibet.util.path import mkdir, mtime
+
+
+class CoverCache:
+    """Remembers the cover file (or that there is none) a cover source found
+    for a group of songs, until the modification time of one of the
+    directories it looked in (see `CoverSourcePlugin.cache_dirs`) or its
+    settings change.
+
+    Once there are more than `max_size` entries, the least recently used
+    ones get dropped. Thread-safe.
+    """
+
+    def __init__(self, filename=None, max_size=10000):
+        self.filename = filename
+        self.max_size = max_size
+        self._entries: OrderedDict[
+            str, tuple[list[tuple[str, float]], str | None]] = OrderedDict()
+        """([(directory, mtime), ...], cover path or None) by group key,
+        starting with the songs' directory"""
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(source, song):
+        return (f"{source.__name__}\0{source.cache_config()}\0"
+                f"{source.group_by(song)!r}")
+
+    def lookup(self, source, song):
+        """Returns (True, path or None) if there is a cached result of
+        `source` for the group of `song`, or (False, None)
+        """
+
+        key = self._key(source, song)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        # New sub directories change the first one, so checking the ones
+        # existing when storing is enough
+        dirs, path = entry
+        if any(mtime(dirname) != dir_mtime for dirname, dir_mtime in dirs):
+            with self._lock:
+                self._entries.pop(key, None)
+                self._dirty = True
+            return False, None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        # Files in cover sub directories can go away without the
+        # directory changing
+        if path is not None and not os.path.isfile(path):
+            with self._lock:
+                self._entries.pop(key, None)
+                self._dirty = True
+            return False, None
+        return True, path
+
+    def store(self, source, song, path):
+        """Remembers the cover `path` (or None for no cover) `source`
+        found for the group of `song`"""
+
+        dirs = [(dirname, mtime(dirname))
+                for dirname in source.cache_dirs(song)]
+        if not all(dir_mtime for _dirname, dir_mtime in dirs):
+            return
+        key = self._key(source, song)
+        with self._lock:
+            self._entries[key] = (dirs, path)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def invalidate(self, songs=None):
+        """Forgets the results for the directories of `songs`, or all"""
+
+        with self._lock:
+            if songs is None:
+                self._entries.clear()
+            else:
+                dirs = {song("~dirname") for song in songs}
+                for key, entry in list(self._entries.items()):
+                    if entry[0][0][0] in dirs:
+                        del self._entries[key]
+            self._dirty = True
+
+    def load(self):
+        if self.filename is None or not os.path.exists(self.filename):
+            return
+        try:
+            with open(self.filename, encoding="utf-8") as fileobj:
+                entries = json.load(fileobj)
+            loaded = OrderedDict(
+                (key, ([(d, float(d_mtime)) for d, d_mtime in dirs], path))
+                for key, dirs, path in entries)
+        except (OSError, ValueError, TypeError) as e:
+            print_w(f"Couldn't load cover cache {self.filename!r}: {e!r}")
+            return
+        with self._lock:
+            self._entries = loaded
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._dirty = False
+        print_d(f"Loaded {len(loaded)} cached cover(s)")
+
+    def save(self):
+        if self.filename is None or not self._dirty:
+            return
+        with self._lock:
+            entries = [[key, dirs, path]
+                       for key, (dirs, path) in self._entries.items()]
+            self._dirty = False
+        try:
+            mkdir(os.path.dirname(self.filename))
+            with atomic_save(self.filename, "wb") as fileobj:
+                fileobj.write(json.dumps(entries).encode("utf-8"))
+        except OSError as e:
+            print_w(f"Couldn't save cover cache {self.filename!r}: {e!r}")
+
+
+class PixbufCache:
+    """Keeps scaled cover pixbufs (or that there is no cover) by key, up to
+    about `max_bytes` of memory, dropping the least recently used ones.
+
+    `hits` and `misses` count the lookups. Not thread-safe.
+    """
+
+    ENTRY_SIZE = 256
+    """Approximate memory used per entry besides the pixel data"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        """(pixbuf or None, size in bytes) by key"""
+        self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """The approximate memory used by all entries in bytes"""
+
+        return self._size
+
+    def lookup(self, key):
+        """Returns (True, pixbuf or None) if there is a cached result for
+        `key`, or (False, None)"""
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return True, entry[0]
+
+    def store(self, key, pixbuf):
+        """Remembers `pixbuf`, or None for no cover, for `key`"""
+
+        size = self.ENTRY_SIZE
+        if pixbuf is not None:
+            size += pixbuf.get_byte_length()
+        if size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (pixbuf, size)
+        self._size += size
+        while self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, song_keys=None):
+        """Forgets the pixbufs of keys starting with a set of song keys
+        sharing any with `song_keys`, or all"""
+
+        if song_keys is None:
+            self._entries.clear()
+            self._size = 0
+            return
+        song_keys = set(song_keys)
+        for key in list(self._entries):
+            if not song_keys.isdisjoint(key[0]):
+                self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
@@ -6,6 +6,8 @@
 # the Free Software Foundation; either version 2 of the License, or
 # (at your option) any later version.
 
+from collections import deque
+from functools import partial
 from itertools import chain
 
 from gi.repository import GObject
@@ -15,8 +17,9 @@ from quodlibet.formats import AudioFile
 from quodlibet.plugins import PluginManager, PluginHandler
 from quodlibet.qltk.notif import Task
 from quodlibet.util.cover import built_in
-from quodlibet.util import print_d
-from quodlibet.util.thread import call_async
+from quodlibet.util.cover.cache import CoverCache, PixbufCache
+from quodlibet.util import print_d, print_exc
+from quodlibet.util.thread import call_async, Cancellable
 from quodlibet.util.thumbnails import get_thumbnail_from_file
 from quodlibet.plugins.cover import CoverSourcePlugin
 
@@ -32,7 +35,7 @@ class CoverPluginHandler(PluginHandler):
             self.built_in = set()
 
     def plugin_handle(self, plugin):
-        return issubclass(plugin.cls, CoverSourcePlugin)
+        return plugin.is_subclass(CoverSourcePlugin)
 
     def plugin_enable(self, plugin):
         self.providers.add(plugin)
@@ -50,6 +53,24 @@ class CoverPluginHandler(PluginHandler):
         yield from sorted(sources, reverse=True, key=lambda x: x.priority())
 
 
+class _CoverRequest:
+    """Songs to find a cover for and scale it, in a thread, for all
+    callers asking for the same songs and size at the same time"""
+
+    def __init__(self, key, songs, size):
+        self.key = key
+        self.songs = songs
+        self.size = size
+        self.waiters = []
+        """(cancellable or None, callback) pairs"""
+        self.outdated = False
+        """If the cover changed since, so the result shouldn't be cached"""
+
+    def is_cancelled(self):
+        return all(cancel is not None and cancel.is_cancelled()
+                   for cancel, callback in self.waiters)
+
+
 class CoverManager(GObject.Object):
 
     __gsignals__ = {
@@ -65,9 +86,36 @@ class CoverManager(GObject.Object):
 
     plugin_handler = None
 
+    max_resolving = 4
+    """How many covers `get_pixbuf_many_async` looks for in threads at once"""
+
     def __init__(self, use_built_in=True):
         super().__init__()
         self.plugin_handler = CoverPluginHandler(use_built_in)
+        self._requests = {}
+        self._queue = deque()
+        self._resolving = 0
+        self.cache = None
+        """The `CoverCache` for cacheable sources, if enabled"""
+        self.pixbufs = None
+        """The `PixbufCache` for `get_pixbuf_many_async`, if enabled"""
+
+    def load_cache(self, filename, max_size):
+        """Enables caching the results of cacheable cover sources,
+        persisted in `filename`"""
+
+        self.cache = CoverCache(filename, max_size)
+        self.cache.load()
+
+    def enable_pixbuf_cache(self, max_bytes):
+        """Keeps up to `max_bytes` of the pixbufs `get_pixbuf_many_async`
+        returned in memory, shared by all callers"""
+
+        self.pixbufs = PixbufCache(max_bytes)
+
+    def save_cache(self):
+        if self.cache is not None:
+            self.cache.save()
 
     def init_plugins(self):
         """Register the cover sources plugin handler with the global
@@ -89,6 +137,14 @@ class CoverManager(GObject.Object):
         to re-fetch the cover and do a display update.
         """
 
+        if self.cache is not None:
+            self.cache.invalidate(songs)
+        if self.pixbufs is not None:
+            keys = {song.key for song in songs}
+            self.pixbufs.invalidate(keys)
+            for key, request in self._requests.items():
+                if not keys.isdisjoint(key[0]):
+                    request.outdated = True
         self.emit("cover-changed", songs)
 
     def acquire_cover(self, callback, cancellable, song):
@@ -164,10 +220,27 @@ class CoverManager(GObject.Object):
             # the same result for the same set of songs
             for _key, group in sorted(groups.items()):
                 song = sorted(group, key=lambda s: s.key)[0]
-                cover = plugin(song).cover
+                cover = self._get_source_cover(plugin, song)
                 if cover:
                     return cover
 
+    def _get_source_cover(self, plugin, song):
+        cache = self.cache
+        if cache is None or not plugin.cacheable:
+            return plugin(song).cover
+
+        found, path = cache.lookup(plugin, song)
+        if found:
+            if path is None:
+                return None
+            try:
+                return open(path, "rb")
+            except OSError:
+                pass
+        cover = plugin(song).cover
+        cache.store(plugin, song, cover.name if cover else None)
+        return cover
+
     def get_cover(self, song):
         """Returns a cover file object for one song or None.
 
@@ -208,15 +281,75 @@ class CoverManager(GObject.Object):
         """Async variant; callback gets called with a pixbuf or not called
         in case of an error. cancel is a Gio.Cancellable.
 
+        Finding the cover and scaling it both happen in a thread, for at
+        most `max_resolving` requests at once. Requests for the same songs
+        and size while one is pending share its result.
+
+        With the pixbuf cache enabled, cached results get returned right
+        away, with the callback called before this returns.
+
         The callback will be called in the main loop.
         """
 
-        fileobj = self.get_cover_many(songs)
-        if fileobj is None:
-            return
-
-        call_async(get_thumbnail_from_file, cancel, callback,
-                   args=(fileobj, (width, height)))
+        songs = list(songs)
+        key = (frozenset(song.key for song in songs), width, height)
+        if self.pixbufs is not None:
+            found, pixbuf = self.pixbufs.lookup(key)
+            if found:
+                if pixbuf is not None and (
+                        cancel is None or not cancel.is_cancelled()):
+                    callback(pixbuf)
+                return
+        request = self._requests.get(key)
+        if request is None:
+            request = _CoverRequest(key, songs, (width, height))
+            self._requests[key] = request
+            self._queue.append(request)
+        request.waiters.append((cancel, callback))
+        self._resolve_next()
+
+    def _resolve_next(self):
+        while self._resolving < self.max_resolving and self._queue:
+            request = self._queue.popleft()
+            if request.is_cancelled():
+                del self._requests[request.key]
+                continue
+            self._resolving += 1
+            # Cancelled requests are handled here, so the slot always
+            # gets freed again in _resolved()
+            call_async(self._resolve, Cancellable(),
+                       partial(self._resolved, request), args=(request,))
+
+    def _resolve(self, request):
+        """Returns if a cover was found and its pixbuf, or None if cancelled.
+        Runs in a thread."""
+
+        try:
+            if request.is_cancelled():
+                return None
+            fileobj = self.get_cover_many(request.songs)
+            if fileobj is None:
+                return False, None
+            if request.is_cancelled():
+                return None
+            return True, get_thumbnail_from_file(fileobj, request.size)
+        except Exception:
+            print_exc()
+            return None
+
+    def _resolved(self, request, result):
+        self._resolving -= 1
+        if self._requests.get(request.key) is request:
+            del self._requests[request.key]
+        if (result is not None and self.pixbufs is not None
+                and not request.outdated):
+            self.pixbufs.store(request.key, result[1])
+        if result is not None and result[0]:
+            pixbuf = result[1]
+            for cancel, callback in request.waiters:
+                if cancel is None or not cancel.is_cancelled():
+                    callback(pixbuf)
+        self._resolve_next()
 
     def search_cover(self, cancellable, songs):
         """Search for all the covers applicable to `songs` across all providers
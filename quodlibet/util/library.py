@@ -108,7 +108,8 @@ def scan_library(library, force):
 
     paths = get_scan_dirs()
     exclude = get_exclude_dirs()
-    copool.add(library.rebuild, paths, force, exclude,
+    quick = config.getboolean("library", "quick_refresh")
+    copool.add(library.rebuild, paths, force, exclude, quick=quick,
                cofuncid="library", funcid="library")
 
 
@@ -5,28 +5,54 @@
 # the Free Software Foundation; either version 2 of the License, or
 # (at your option) any later version.
 
+import os
 import sys
+import json
 import importlib
 
 from os.path import dirname
 from traceback import format_exception
 
-from quodlibet.util.path import mtime
+from quodlibet.util.atomic import atomic_save
+from quodlibet.util.path import mtime, mkdir
 from quodlibet.util.importhelper import get_importables, load_module
-from quodlibet.util import print_d
+from quodlibet.util import print_d, print_w
 
 
 class Module:
+    """A scanned module. If created with a `load` function instead of the
+    module, it gets imported on the first access of `module`, and `info`
+    holds what the manifest knows about it until then.
+    """
 
-    def __init__(self, name, module, deps, path):
+    def __init__(self, name, module, deps, path, info=None, load=None):
         self.name = name
-        self.module = module
+        self._module = module
+        self._load = load
         self.path = path
+        self.info = info
 
         self.deps = {}
         for dep in deps:
             self.deps[dep] = mtime(dep)
 
+    @property
+    def loaded(self):
+        """If the module is imported"""
+
+        return self._module is not None
+
+    @property
+    def module(self):
+        """The imported module, imports it if needed.
+
+        Raises an exception if importing fails.
+        """
+
+        if self._module is None:
+            self._module = self._load()
+        return self._module
+
     def has_changed(self, dep_paths):
         if set(self.deps.keys()) != set(dep_paths):
             return True
@@ -49,6 +75,94 @@ class ModuleImportError:
         self.traceback = traceback
 
 
+class ModuleManifest:
+    """A persistent description of modules (as returned by `describe`)
+    so they don't have to be imported to find out what they contain.
+
+    Entries are only used if the modification times of all files of the
+    module and `key` (e.g. the application version) are still the same.
+    """
+
+    def __init__(self, filename, describe, key=""):
+        self.filename = filename
+        self.describe = describe
+        self.key = key
+        self._entries = {}
+        """(path, {dependency path: mtime}, description) by module name"""
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, name, path, deps):
+        """Returns the description of the module, or None if there is none
+        or the module has changed"""
+
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        old_path, old_deps, info = entry
+        if old_path != path or set(old_deps) != set(deps):
+            return None
+        for dep, old_mtime in old_deps.items():
+            if mtime(dep) != old_mtime:
+                return None
+        return info
+
+    def store(self, module):
+        """Describes the imported `module` (a `Module`) and returns the
+        description, or None if that failed"""
+
+        try:
+            info = self.describe(module.module)
+            json.dumps(info)
+        except Exception as e:
+            print_w(f"Couldn't describe module {module.name!r}: {e!r}")
+            self.forget(module.name)
+            return None
+        self._entries[module.name] = (module.path, module.deps, info)
+        self._dirty = True
+        return info
+
+    def names(self):
+        return list(self._entries)
+
+    def forget(self, name):
+        if self._entries.pop(name, None) is not None:
+            self._dirty = True
+
+    def load(self):
+        if not os.path.exists(self.filename):
+            return
+        try:
+            with open(self.filename, encoding="utf-8") as fileobj:
+                data = json.load(fileobj)
+            if data["key"] != self.key:
+                print_d("Module manifest outdated")
+                return
+            entries = {name: (path, dict(deps), info)
+                       for name, (path, deps, info)
+                       in data["modules"].items()}
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            print_w(f"Couldn't load module manifest {self.filename!r}: {e!r}")
+            return
+        self._entries = entries
+        self._dirty = False
+
+    def save(self):
+        if not self._dirty:
+            return
+        data = {"key": self.key, "modules": self._entries}
+        try:
+            mkdir(os.path.dirname(self.filename))
+            with atomic_save(self.filename, "wb") as fileobj:
+                fileobj.write(json.dumps(data).encode("utf-8"))
+        except OSError as e:
+            print_w(f"Couldn't save module manifest {self.filename!r}: {e!r}")
+            return
+        self._dirty = False
+
+
 class ModuleScanner:
     """
     Handles plugin modules. Takes a list of directories and searches
@@ -61,11 +175,16 @@ class ModuleScanner:
     failures - A dict of Name: (Exception, Text) for all modules that failed
     modules - A dict of Name: Module for all successfully loaded modules
 
+    With a `ModuleManifest`, modules described in it don't get imported
+    until their `module` is accessed.
     """
-    def __init__(self, folders):
+    def __init__(self, folders, manifest=None):
         self.__folders = folders
         self.__modules = {}  # name: module
         self.__failures = {}  # name: exception
+        self.__manifest = manifest
+        if manifest is not None:
+            manifest.load()
 
     @property
     def failures(self):
@@ -120,22 +239,26 @@ class ModuleScanner:
 
         self.__failures.clear()
 
+        manifest = self.__manifest
+        lazy = 0
+
         # add new ones
         for (name, (path, deps)) in info.items():
             if name in self.__modules:
                 continue
 
+            if manifest is not None:
+                module_info = manifest.lookup(name, path, deps)
+                if module_info is not None:
+                    added.append(name)
+                    lazy += 1
+                    self.__modules[name] = Module(
+                        name, None, deps, path, info=module_info,
+                        load=lambda n=name, p=path: self.__load_lazy(n, p))
+                    continue
+
             try:
-                # add a real module, so that pickle works
-                # https://github.com/quodlibet/quodlibet/issues/1093
-                parent = "quodlibet.fake"
-                if parent not in sys.modules:
-                    spec = importlib.machinery.ModuleSpec(
-                        parent, None, is_package=True)
-                    sys.modules[parent] = importlib.util.module_from_spec(spec)
-                vars(sys.modules["quodlibet"])["fake"] = sys.modules[parent]
-
-                mod = load_module(name, parent + ".plugins", dirname(path))
+                mod = self.__load(name, path)
                 if mod is None:
                     continue
             except Exception as err:
@@ -143,9 +266,44 @@ class ModuleScanner:
                 self.__failures[name] = ModuleImportError(name, err, text)
             else:
                 added.append(name)
-                self.__modules[name] = Module(name, mod, deps, path)
+                module = self.__modules[name] = Module(name, mod, deps, path)
+                if manifest is not None:
+                    module.info = manifest.store(module)
 
-        print_d("Rescanning done: %d added, %d removed, %d error(s)" %
-                (len(added), len(removed), len(self.__failures)))
+        if manifest is not None:
+            for name in set(manifest.names()) - set(info):
+                manifest.forget(name)
+            manifest.save()
+
+        print_d("Rescanning done: %d added (%d not imported), %d removed, "
+                "%d error(s)" % (len(added), lazy, len(removed),
+                                 len(self.__failures)))
 
         return removed, added
+
+    def __load(self, name, path):
+        # add a real module, so that pickle works
+        # https://github.com/quodlibet/quodlibet/issues/1093
+        parent = "quodlibet.fake"
+        if parent not in sys.modules:
+            spec = importlib.machinery.ModuleSpec(
+                parent, None, is_package=True)
+            sys.modules[parent] = importlib.util.module_from_spec(spec)
+        vars(sys.modules["quodlibet"])["fake"] = sys.modules[parent]
+
+        return load_module(name, parent + ".plugins", dirname(path))
+
+    def __load_lazy(self, name, path):
+        print_d(f"Importing {name!r}")
+        try:
+            mod = self.__load(name, path)
+            if mod is None:
+                raise ImportError(f"Module {name!r} not found in {path!r}")
+        except Exception as err:
+            text = format_exception(*sys.exc_info())
+            self.__failures[name] = ModuleImportError(name, err, text)
+            # the manifest was wrong, import it on the next start again
+            self.__manifest.forget(name)
+            self.__manifest.save()
+            raise
+        return mod
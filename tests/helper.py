@@ -18,6 +18,7 @@ from pathlib import Path
 
 from gi.repository import Gtk, Gdk
 
+from quodlibet.formats import AudioFile
 from quodlibet.util.i18n import GlibTranslations
 from senf import fsnative
 
@@ -32,6 +33,16 @@ def dummy_path(path):
     return path
 
 
+def make_song(num, dirname="/dir", **tags):
+    """Returns an `AudioFile` for the (non-existing) file
+    `<dirname>/file_<num>.mp3` with the given tags.
+    """
+
+    song = AudioFile({"~filename": fsnative(f"{dirname}/file_{num}.mp3")})
+    song.update(tags)
+    return song
+
+
 @contextlib.contextmanager
 def locale_numeric_conv(
         decimal_point=".", grouping=None, thousands_sep=","):
@@ -13,6 +13,7 @@ from senf import fsnative
 from gi.repository import Gtk
 
 from quodlibet.formats import AudioFile
+from quodlibet.library import SongLibrary
 from quodlibet import app
 from quodlibet import config
 from tests.plugin import PluginTestCase, init_fake_app, destroy_fake_app
@@ -63,6 +64,112 @@ class TMPDServer(PluginTestCase):
         self.assertEqual(getline("date", "2009-03-04"), "Date: 2009")
 
 
+def make_song(path, **tags):
+    song = AudioFile({"~filename": fsnative(path), "~#length": 60})
+    song.update(tags)
+    return song
+
+
+def make_songs():
+    return [
+        make_song("/music/b/one.ogg", artist="Björk", album="Homogenic",
+                  title="Jóga", albumartist="Björk"),
+        make_song("/music/b/two.ogg", artist="Björk\nMark Bell",
+                  album="Homogenic", title="Pluto", albumartist="Björk"),
+        make_song("/music/c/sub/three.ogg", artist="Cream",
+                  album="Disraeli Gears", title="Sunshine"),
+        make_song("/other/four.ogg", artist="Can", title="Vitamin C"),
+    ]
+
+
+@skipIf(os.name == "nt", "mpd server not supported under Windows")
+class TMPDDatabase(PluginTestCase):
+
+    def setUp(self):
+        self.mod = self.modules["mpd_server"]
+        self.songs = make_songs()
+        self.library = SongLibrary()
+        self.library.add(self.songs)
+        self.db = self.mod.database.MPDDatabase(
+            self.library, ["artist", "album", "title"])
+
+    def tearDown(self):
+        self.db.destroy()
+        self.library.destroy()
+
+    def test_values(self):
+        self.assertEqual(self.db.values("artist"),
+                         ["Björk", "Can", "Cream", "Mark Bell"])
+        self.assertEqual(self.db.values("album"),
+                         ["Disraeli Gears", "Homogenic"])
+
+    def test_find(self):
+        s = self.songs
+        self.assertEqual(self.db.find([("artist", "Björk")]), s[:2])
+        self.assertEqual(self.db.find([("artist", "björk")]), [])
+        self.assertEqual(
+            self.db.find([("artist", "Björk"), ("title", "Pluto")]), s[1:2])
+        self.assertEqual(self.db.find([("any", "Homogenic")]), s[:2])
+        self.assertEqual(self.db.find([("base", "music/c")]), s[2:3])
+        self.assertEqual(
+            self.db.find([("~filename", s[3]("~filename"))]), s[3:])
+
+    def test_search(self):
+        s = self.songs
+        self.assertEqual(self.db.find([("artist", "BJÖ")], exact=False),
+                         s[:2])
+        self.assertEqual(self.db.find([("any", "HOMO")], exact=False),
+                         s[:2])
+        self.assertEqual(self.db.find([("any", "four")], exact=False),
+                         s[3:])
+        self.assertEqual(
+            self.db.find([("any", "sun"), ("base", "music")], exact=False),
+            s[2:3])
+
+    def test_song_values(self):
+        s = self.songs
+        values = self.db.song_values("artist")
+        self.assertEqual(values[s[0]], ["Björk", "Mark Bell"])
+        self.assertEqual(values[s[2]], ["Cream"])
+
+    def test_list_values(self):
+        self.assertEqual(self.db.list_values("album", [("artist", "Björk")]),
+                         [("", "Homogenic")])
+        self.assertEqual(
+            self.db.list_values("album", group="albumartist"),
+            [("", "Disraeli Gears"), ("Björk", "Homogenic")])
+
+    def test_lsinfo(self):
+        s = self.songs
+        self.assertEqual(self.db.lsinfo(""), (["music", "other"], []))
+        self.assertEqual(self.db.lsinfo("music"), (["music/b", "music/c"], []))
+        self.assertEqual(self.db.lsinfo("/music/b"), ([], s[:2]))
+        self.assertIsNone(self.db.lsinfo("nope"))
+        self.assertEqual(self.db.songs_below("music"), s[:3])
+        self.assertEqual([path for path, songs in self.db.walk("")],
+                         ["", "music", "music/b", "music/c", "music/c/sub",
+                          "other"])
+
+    def test_updates(self):
+        s = self.songs
+        self.assertEqual(self.db.values("artist")[0], "Björk")
+        self.assertEqual(self.db.lsinfo("other"), ([], s[3:]))
+        s[0]["artist"] = "Bjork"
+        self.library.changed([s[0]])
+        self.assertEqual(self.db.find([("artist", "Björk")]), s[1:2])
+        self.assertEqual(self.db.values("artist")[0], "Bjork")
+        # Changed tags don't change directories
+        self.assertIsNotNone(self.db._dirs)
+        new = make_song("/other/five.ogg", artist="Can")
+        self.library.add([new])
+        self.assertEqual(self.db.find([("artist", "Can")]), [new, s[3]])
+        self.assertEqual(self.db.lsinfo("other"), ([], [new, s[3]]))
+        self.library.remove([s[3], new])
+        self.assertEqual(self.db.find([("artist", "Can")]), [])
+        self.assertNotIn("Can", self.db.values("artist"))
+        self.assertIsNone(self.db.lsinfo("other"))
+
+
 @skipIf(os.name == "nt", "mpd server not supported under Windows")
 class TMPDCommands(PluginTestCase):
 
@@ -126,3 +233,45 @@ class TMPDCommands(PluginTestCase):
     def test_idle_close(self):
         for cmd in ["idle", "noidle", "close"]:
             self._cmd(cmd.encode("ascii") + b"\n")
+
+    def _cmd_all(self, data):
+        self.s.send(data)
+        response = b""
+        while not response.endswith((b"OK\n", b"\n\n")) and (
+                b"ACK" not in response):
+            while Gtk.events_pending():
+                Gtk.main_iteration_do(True)
+            response += self.s.recv(99999)
+        return response
+
+    def test_database(self):
+        app.library.add(make_songs())
+
+        response = self._cmd_all(b"list artist\n")
+        self.assertEqual(response, b"Artist: Bj\xc3\xb6rk\nArtist: Can\n"
+                                   b"Artist: Cream\nArtist: Mark Bell\nOK\n")
+        response = self._cmd_all(b'find album "Disraeli Gears"\n')
+        assert b"file: /music/c/sub/three.ogg\n" in response
+        assert b"Title: Sunshine\n" in response
+        response = self._cmd_all(b"search title U\n")
+        self.assertEqual(response.count(b"file: "), 2)
+        response = self._cmd_all(b"count artist Cream\n")
+        self.assertEqual(response, b"songs: 1\nplaytime: 60\nOK\n")
+        response = self._cmd_all(b"lsinfo music\n")
+        assert response.startswith(
+            b"directory: music/b\ndirectory: music/c\nOK")
+        response = self._cmd_all(b"lsinfo nope\n")
+        assert response.startswith(b"ACK [50] {lsinfo}")
+        response = self._cmd_all(b"listall nope\n")
+        assert response.startswith(b"ACK [50] {listall}")
+        response = self._cmd_all(b"find foo bar\n")
+        assert response.startswith(b"ACK [2] {find}")
+
+    def test_listallinfo_streamed(self):
+        songs = [make_song(f"/music/{i:05d}.ogg", title="x" * 100)
+                 for i in range(2000)]
+        app.library.add(songs)
+        response = self._cmd_all(b"listallinfo\n")
+        self.assertEqual(response.count(b"file: "), 2000)
+        assert response.endswith(b"OK\n")
+        assert len(response) > self.conn.WRITE_SIZE
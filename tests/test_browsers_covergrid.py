@@ -8,7 +8,7 @@
 # (at your option) any later version.
 
 
-from quodlibet.browsers.covergrid.main import CoverGrid
+from quodlibet.browsers.covergrid.main import CoverGrid, _get_prefetch_range
 from senf import fsnative
 
 from . import TestCase, run_gtk_loop
@@ -152,3 +152,15 @@ class TCoverGridBrowser(TestCase):
         pattern_text = self.bar.display_pattern_text
         self.assertEqual(pattern_text, DEFAULT_PATTERN_TEXT)
         self.assertTrue("<album>" in pattern_text)
+
+
+class TPrefetchRange(TestCase):
+
+    def test_range(self):
+        # rows 1 and 2 visible, three items per row
+        self.assertEqual(_get_prefetch_range(120, 250, 100, 3, 0), (3, 9))
+        self.assertEqual(_get_prefetch_range(120, 250, 100, 3, 2), (0, 15))
+
+    def test_top(self):
+        self.assertEqual(_get_prefetch_range(0, 50, 100, 4, 1), (0, 8))
+        self.assertEqual(_get_prefetch_range(-10, 50, 100, 4, 0), (0, 4))
@@ -520,6 +520,52 @@ class TPaneModel(TestCase):
             m.remove_songs([song], True)
             self._verify_model(m)
 
+    def test_remove_songs_only_affected_rows(self):
+        conf = PaneConfig("artist")
+        m = PaneModel(conf)
+        m.add_songs(SONGS)
+        changed = []
+        m.connect("row-changed", lambda m, path, iter_: changed.append(
+            m[path][0].key))
+        m.remove_songs([SONGS[2]], True)
+        self.assertEqual(changed, ["piman"])
+        self.assertEqual(len(m), len(SONGS) + 1 - 1)
+        self.assertEqual(m.get_songs([0]), set(SONGS) - {SONGS[2]})
+
+    def test_remove_empty_later(self):
+        conf = PaneConfig("artist")
+        m = PaneModel(conf)
+        m.add_songs(SONGS)
+        length = len(m)
+        # what the browser does for changed songs
+        m.remove_songs([SONGS[1]], False)
+        self.assertEqual(len(m), length)
+        m.remove_songs([], True)
+        self.assertEqual(len(m), length - 1)
+        self._verify_model(m)
+
+    def test_remove_refilled(self):
+        conf = PaneConfig("artist")
+        m = PaneModel(conf)
+        m.add_songs(SONGS)
+        length = len(m)
+        m.remove_songs([SONGS[1]], False)
+        m.add_songs([SONGS[1]])
+        m.remove_songs([], True)
+        self.assertEqual(len(m), length)
+        self.assertEqual(m.get_songs([2]), {SONGS[1]})
+
+    def test_clear(self):
+        conf = PaneConfig("artist")
+        m = PaneModel(conf)
+        m.add_songs(SONGS)
+        m.clear()
+        m.add_songs(SONGS[:2])
+        self.assertEqual(m.get_songs([0]), set(SONGS[:2]))
+        m.remove_songs(SONGS[:1], True)
+        self.assertEqual(len(m), 1)
+        self._verify_model(m)
+
     def test_matches(self):
         conf = PaneConfig("artist")
         m = PaneModel(conf)
@@ -533,6 +579,11 @@ class TPaneModel(TestCase):
         self._verify_model(m)
         self.assertTrue(m.matches([len(m) - 1], UNKNOWN_ARTIST))
 
+        # not in the model
+        other = AudioFile(dict(SONGS[1]))
+        self.assertTrue(m.matches([2], other))
+        self.assertFalse(m.matches([1], other))
+
 
 class TPanedPreferences(TestCase):
 
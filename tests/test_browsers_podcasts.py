@@ -2,15 +2,20 @@
 # it under the terms of the GNU General Public License as published by
 # the Free Software Foundation; either version 2 of the License, or
 # (at your option) any later version.
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from collections.abc import Generator
+
 from _pytest.fixtures import fixture
 from gi.repository import Gtk
 
 import quodlibet.config
-from quodlibet.browsers.podcasts import Podcasts, AddFeedDialog, Feed
+from quodlibet.browsers.podcasts import (Podcasts, AddFeedDialog, Feed,
+                                         FeedRefresher)
 from quodlibet.library import SongLibrary
 from quodlibet.util.config import Config
 from senf import fsn2uri
-from tests import TestCase, get_data_path
+from tests import TestCase, get_data_path, run_gtk_loop
 
 TEST_URL = "https://a@b:foo.example.com?bar=baz&quxx#anchor"
 
@@ -85,3 +90,107 @@ def test_menu_items_can_be_clicked(config: Config, podcasts: Podcasts):
     assert menu
     for item in menu.get_children():
         item.emit("activate")
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """Serves the test podcast at any path (audio for /audio, a truncated
+    response for /incomplete), and answers conditional requests for it"""
+
+    ETAG = '"v1"'
+    requests: list[tuple[str, str | None]] = []
+
+    def do_GET(self) -> None:
+        etag = self.headers.get("If-None-Match")
+        self.requests.append((self.path, etag))
+        if self.path == "/incomplete":
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", "1000")
+            self.end_headers()
+            self.wfile.write(b"<rss")
+            return
+        if self.path == "/audio":
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.end_headers()
+            return
+        if etag == self.ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        with open(get_data_path("valid_podcast.xml"), "rb") as h:
+            content = h.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("ETag", self.ETAG)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@fixture
+def feed_server() -> Generator[str, None, None]:
+    FeedHandler.requests = []
+    server = ThreadingHTTPServer(("localhost", 0), FeedHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port:d}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_feed_conditional_get(config, feed_server):
+    feed = Feed(feed_server + "/feed")
+    assert feed.parse()
+    assert len(feed) == 2
+    assert feed.etag == FeedHandler.ETAG
+    assert not feed.parse()
+    assert len(feed) == 2
+    assert feed.get_age() < 60
+    assert FeedHandler.requests == [("/feed", None),
+                                    ("/feed", FeedHandler.ETAG)]
+
+
+def test_feed_audio_stream(config, feed_server):
+    feed = Feed(feed_server + "/audio")
+    assert not feed.parse()
+    assert feed.etag is None
+
+
+def refresh(refresher, feeds, rebuild=False):
+    results = []
+    refresher.refresh(feeds, results.append, rebuild=rebuild).join()
+    run_gtk_loop()
+    assert len(results) == 1
+    return results[0]
+
+
+def test_refresher(config, feed_server):
+    feeds = [Feed(f"{feed_server}/{i}") for i in range(5)]
+    feeds.append(Feed(feed_server + "/audio"))
+    refresher = FeedRefresher(max_connections=3)
+    changed = refresh(refresher, feeds)
+    # Feeds are lists, so compare identities
+    assert list(map(id, changed)) == list(map(id, feeds[:5]))
+    assert all(len(feed) == 2 for feed in feeds[:5])
+
+    FeedHandler.requests = []
+    assert refresh(refresher, feeds[:5]) == []
+    assert sorted(FeedHandler.requests) == [
+        (f"/{i}", FeedHandler.ETAG) for i in range(5)]
+
+    FeedHandler.requests = []
+    assert list(map(id, refresh(refresher, feeds[:1], rebuild=True))) == [
+        id(feeds[0])]
+    assert FeedHandler.requests == [("/0", None)]
+    assert len(feeds[0]) == 2
+
+
+def test_refresher_errors(config, feed_server):
+    feeds = [Feed(feed_server + "/0"), Feed(feed_server + "/incomplete"),
+             Feed("http://[broken"), Feed(feed_server + "/1")]
+    changed = refresh(FeedRefresher(max_connections=2), feeds)
+    assert list(map(id, changed)) == [id(feeds[0]), id(feeds[3])]
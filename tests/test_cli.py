@@ -5,6 +5,9 @@
 # the Free Software Foundation; either version 2 of the License, or
 # (at your option) any later version.
 
+import json
+from unittest import mock
+
 from .helper import capture_output
 from quodlibet import cli
 from tests import TestCase
@@ -22,3 +25,18 @@ class Tcli(TestCase):
         with self.assertRaises(SystemExit):
             with capture_output():
                 cli.process_arguments(["myprog", "--wrong-thing"])
+
+    def test_print_query_offset_limit(self):
+        with mock.patch.object(cli, "control") as control:
+            cli.process_arguments(["myprog", "--print-query=foo",
+                                   "--query-offset=10", "--query-limit=5"])
+        command, args = control.call_args[0]
+        self.assertEqual(command, "print-query")
+        self.assertEqual(json.loads(args), {
+            "query": "foo", "pattern": None, "offset": 10, "limit": 5})
+
+    def test_print_query_invalid_limit(self):
+        with self.assertRaises(SystemExit):
+            with capture_output():
+                cli.process_arguments(["myprog", "--print-query=foo",
+                                       "--query-limit=-1"])
@@ -14,6 +14,7 @@ from gi.repository import Gtk
 from quodlibet import config
 from quodlibet import app
 
+from quodlibet import commands
 from quodlibet.commands import registry
 
 
@@ -30,6 +31,14 @@ class TCommandBase(TestCase):
         command = fsnative(str(command))
         return registry.handle_line(app, command)
 
+    def _send_all(self, command):
+        """Like `_send`, but joins the chunks of streamed responses"""
+
+        response = self._send(command)
+        if response is None or isinstance(response, fsnative):
+            return response
+        return "".join(response)
+
 
 class TCommands(TCommandBase):
     def test_query(self):
@@ -134,42 +143,103 @@ class TCommandWithPattern(TCommandBase):
                     "one,two\\, please,slash\\\\.mp3,4.0-four")
 
     def test_old_syntax(self):
-        assert self._send("print-query two ") == "two, please\n"
+        assert self._send_all("print-query two ") == "two, please\n"
 
     def test_old_syntax_that_is_a_valid_json(self):
-        assert self._send('print-query "one"') == "one\n"
-        assert self._send("print-query 4.0") == "4.0-four\n"
-        assert self._send("print-query true") == "\n"
+        assert self._send_all('print-query "one"') == "one\n"
+        assert self._send_all("print-query 4.0") == "4.0-four\n"
+        assert self._send_all("print-query true") == "\n"
 
     def test_new_syntax(self):
-        assert self._send(
+        assert self._send_all(
             'print-query {"query": "two", "pattern": null}'
         ) == "two, please\n"
-        assert self._send(
+        assert self._send_all(
             'print-query {"query": "two", "pattern": "asdf"}'
         ) == "asdf\n"
-        assert self._send(
+        assert self._send_all(
             'print-query {"query": "slash", "pattern": "<title>"}'
         ) == "SLASH\\.MP3\n"
 
     def test_query_is_valid_json(self):
-        assert self._send(
+        assert self._send_all(
             'print-query {"query": "\\"one\\"", "pattern": "<title>"}'
         ) == "ONE\n"
-        assert self._send(
+        assert self._send_all(
             'print-query {"query": "4.0", "pattern": "<title>"}'
         ) == "4.0-FOUR\n"
 
     def test_query_is_not_a_string(self):
         # Query is valid json, but not came from the CLI. (It's not a string.)
-        assert self._send(
+        assert self._send_all(
             'print-query {"query": 4.0, "pattern": "<title>"}'
         ) == "\n"
-        assert self._send(
+        assert self._send_all(
             'print-query {"query": true, "pattern": "<title>"}'
         ) == "\n"
 
     def test_invalid_args(self):
-        assert self._send(
+        assert self._send_all(
             'print-query {"query": "slash", "unknown": "<title>"}'
         ) == "\n"
+
+    def test_offset_limit(self):
+        all_titles = self._send_all(
+            'print-query {"query": "", "pattern": "<title>"}').splitlines()
+        self.assertEqual(len(all_titles), 4)
+        assert self._send_all(
+            'print-query {"query": "", "pattern": "<title>", "limit": 2}'
+        ).splitlines() == all_titles[:2]
+        assert self._send_all(
+            'print-query {"query": "", "pattern": "<title>", '
+            '"offset": 3, "limit": 2}'
+        ).splitlines() == all_titles[3:]
+        assert self._send_all(
+            'print-query {"query": "", "pattern": null, "offset": 9}'
+        ) == "\n"
+        for invalid in ["-1", '"1"', "true", "1.5"]:
+            assert self._send_all(
+                'print-query {"query": "", "pattern": null, '
+                f'"offset": {invalid}}}') == "\n"
+            assert self._send(
+                'stream-query {"query": "", "pattern": null, '
+                f'"limit": {invalid}}}') is None
+
+    def test_stream_query(self):
+        chunks = self._send(
+            'stream-query {"query": "", "pattern": "<~filename>"}')
+        self.assertEqual("".join(chunks), self._send_all(
+            'print-query {"query": "", "pattern": null}'))
+
+    def test_stream_query_chunks(self):
+        orig = commands.QUERY_CHUNK_SIZE
+        commands.QUERY_CHUNK_SIZE = 1
+        try:
+            chunks = list(self._send(
+                'stream-query {"query": "|(one, four, two)", '
+                '"pattern": "<title>", "offset": 1, "limit": 1}'))
+            self.assertEqual(len([c for c in chunks if c]), 1)
+            assert "".join(chunks) in {"ONE\n", "TWO, PLEASE\n",
+                                       "4.0-FOUR\n"}
+            chunks = list(self._send(
+                'stream-query {"query": "", "pattern": "<title>"}'))
+            self.assertEqual(len(chunks), 4)
+        finally:
+            commands.QUERY_CHUNK_SIZE = orig
+
+    def test_print_query_chunks(self):
+        orig = commands.QUERY_CHUNK_SIZE
+        commands.QUERY_CHUNK_SIZE = 1
+        try:
+            chunks = list(self._send(
+                'print-query {"query": "", "pattern": "<title>"}'))
+            self.assertEqual(len(chunks), 4)
+            chunks = list(self._send(
+                'print-query {"query": "nothing", "pattern": "<title>"}'))
+            self.assertEqual(chunks, [""] * 4 + ["\n"])
+        finally:
+            commands.QUERY_CHUNK_SIZE = orig
+
+    def test_stream_query_invalid(self):
+        assert self._send(
+            'stream-query {"query": 4.0, "pattern": "<title>"}') is None
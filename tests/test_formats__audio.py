@@ -13,6 +13,8 @@ from tempfile import mkstemp, mkdtemp
 from quodlibet import config, app
 from quodlibet.formats import AudioFile, types as format_types, AudioFileError
 from quodlibet.formats import decode_value, MusicFile, FILESYSTEM_TAGS
+from quodlibet.formats import load_audio_files, dump_audio_files
+from quodlibet.formats import tag_memory_usage, clear_shared_values
 from quodlibet.formats._audio import NUMERIC_ZERO_DEFAULT, TIME_TAGS
 from quodlibet.util.environment import is_windows
 from quodlibet.util.path import (normalize_path, mkdir, get_home_dir, unquote,
@@ -1185,3 +1187,53 @@ class Treplay_gain(TestCase):
         for t in TIME_TAGS:
             assert af(t) == now, "Numeric dates broken"
             assert af(t.replace("~#", "~")) == format_date(now), "Human date broken"
+
+
+class TInternTags(TestCase):
+
+    def setUp(self):
+        AudioFile.intern_tags = True
+
+    def tearDown(self):
+        AudioFile.intern_tags = False
+
+    def song(self, num):
+        return AudioFile({"~filename": fsnative("/dir/%d.mp3" % num),
+                          "artist": "".join(["Art", "ist"]),
+                          "title": "".join(["Tit", "le"]), "~#track": num})
+
+    def test_setitem(self):
+        a, b = self.song(1), self.song(2)
+        self.assertEqual(a["artist"], "Artist")
+        assert a["artist"] is b["artist"]
+        assert a["title"] is not b["title"]
+        a_keys = {k: k for k in a}
+        assert all(k is a_keys[k] for k in b)
+
+    def test_disabled(self):
+        AudioFile.intern_tags = False
+        a, b = self.song(1), self.song(2)
+        assert a["artist"] is not b["artist"]
+
+    def test_clear_shared_values(self):
+        a = self.song(1)
+        clear_shared_values()
+        b, c = self.song(2), self.song(3)
+        assert a["artist"] is not b["artist"]
+        assert b["artist"] is c["artist"]
+
+    def test_load(self):
+        a, b = load_audio_files(dump_audio_files([self.song(1), self.song(2)]))
+        assert a["artist"] is b["artist"]
+        self.assertEqual(dict(a), dict(self.song(1)))
+        self.assertEqual(a.to_dump(), self.song(1).to_dump())
+
+    def test_tag_memory_usage(self):
+        songs = [self.song(i) for i in range(10)]
+        usage = tag_memory_usage(songs)
+        self.assertEqual(sorted(usage), ["artist", "title", "~#track",
+                                         "~filename"])
+        assert usage["artist"] < usage["title"]
+        AudioFile.intern_tags = False
+        assert tag_memory_usage(self.song(i) for i in range(10))["artist"] > \
+            usage["artist"]
@@ -148,6 +148,44 @@ class TAlbumLibrarySignals(TestCase):
         self.assertEqual(self.received,
                              ["added", "a_added", "changed", "a_changed"])
 
+    def test_change_key(self):
+        songs = [AlbumSong(1, "a1"), AlbumSong(2, "a1"), AlbumSong(4, "a2")]
+        self.lib.add(songs)
+        songs[0]["album"] = songs[0]["labelid"] = "a2"
+        self.lib.changed(songs[:1])
+        self.assertEqual(self.received,
+                         ["added", "a_added", "changed", "a_changed"])
+        self.assertEqual(self.albums[songs[2].album_key].songs,
+                         {songs[0], songs[2]})
+        self.assertEqual(self.albums[songs[1].album_key].songs, {songs[1]})
+
+        del self.received[:]
+        songs[1]["album"] = songs[1]["labelid"] = "a3"
+        self.lib.changed(songs[1:2])
+        self.assertEqual(self.received,
+                         ["changed", "a_removed", "a_added"])
+        self.assertEqual(len(self.albums), 2)
+        self.assertEqual(self.albums[songs[1].album_key].songs, {songs[1]})
+
+    def test_change_key_back(self):
+        songs = [AlbumSong(1, "a1"), AlbumSong(4, "a2")]
+        self.lib.add(songs)
+        album = self.albums[songs[0].album_key]
+        songs[0]["album"] = songs[0]["labelid"] = "a2"
+        songs[1]["album"] = songs[1]["labelid"] = "a1"
+        self.lib.changed(songs)
+        self.assertEqual(self.received,
+                         ["added", "a_added", "changed", "a_changed"])
+        self.assertEqual(album.songs, {songs[1]})
+
+    def test_remove_changed_without_signal(self):
+        songs = [AlbumSong(1, "a1"), AlbumSong(2, "a1")]
+        self.lib.add(songs)
+        songs[0]["album"] = songs[0]["labelid"] = "a2"
+        self.lib.remove(songs[:1])
+        self.assertEqual(len(self.albums), 1)
+        self.assertEqual(self.albums[songs[1].album_key].songs, {songs[1]})
+
     def tearDown(self):
         for s in self._asigs:
             self.albums.disconnect(s)
@@ -12,7 +12,7 @@ import pytest as pytest
 
 from quodlibet import config, app, print_d
 from quodlibet.library import SongFileLibrary
-from quodlibet.library.file import FileLibrary
+from quodlibet.library.file import Event, FileLibrary
 from quodlibet.util.library import get_exclude_dirs
 from quodlibet.util.path import normalize_path
 from senf import text2fsn
@@ -268,6 +268,63 @@ class TWatchedFileLibrary(TLibrary):
             assert str(new_path) in self.library, msg
             assert not self.removed, "A file was removed"
 
+    def test_events_merged(self):
+        self.library.watch_delay = 60000
+        with temp_filename(dir=self.temp_path, suffix=".mp3", as_path=True) as path:
+            shutil.copy(Path(get_data_path("silence-44-s.mp3")), path)
+            self.library.queue_event(path, Event.CREATED)
+            self.library.queue_event(path, Event.CHANGED)
+            assert len(self.library._events) == 1
+            sleep(0.2)
+            run_gtk_loop()
+            assert str(path) not in self.library, "Handled events too early"
+            self.library.flush_events()
+            assert str(path) in self.library
+            assert len(self.added) == 1
+
+    def test_replaced_song_reloaded(self):
+        self.library.watch_delay = 60000
+        with temp_filename(dir=self.temp_path, suffix=".mp3", as_path=True) as path:
+            shutil.copy(Path(get_data_path("silence-44-s.mp3")), path)
+            self.library.queue_event(path, Event.CREATED)
+            self.library.flush_events()
+            song = self.library[str(path)]
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 10))
+            self.library.queue_event(path, Event.DELETED)
+            self.library.queue_event(path, Event.CREATED)
+            self.library.flush_events()
+            assert song in self.changed
+            assert song.valid()
+
+    def test_polled(self):
+        library = self.library
+        library.max_watches = len(library._monitors)
+        sub = self.temp_path / "polled"
+        sub.mkdir()
+
+        def changed():
+            stat = os.stat(sub)
+            os.utime(sub, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 10))
+            for _i in library._poll_dirs():
+                pass
+            library.flush_events()
+
+        try:
+            library.monitor_dir(sub)
+            assert sub in library._polled
+            assert sub not in library._monitors
+            path = sub / "song.mp3"
+            shutil.copy(Path(get_data_path("silence-44-s.mp3")), path)
+            changed()
+            assert str(path) in library, f"{path} wasn't added [{self.fns}]"
+            path.unlink()
+            changed()
+            assert str(path) not in library
+            assert {Path(af("~filename")) for af in self.removed} == {path}
+        finally:
+            shutil.rmtree(sub)
+
     @property
     def fns(self) -> str:
         return ", ".join(s("~filename") for s in self.library)
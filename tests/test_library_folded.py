@@ -0,0 +1,127 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+import time
+from unittest import skip
+
+from quodlibet import config
+from quodlibet.library import SongLibrary
+from quodlibet.library.folded import FoldedText
+from quodlibet.query import Query
+from tests import TestCase
+from tests.test_library_index import QUERIES, make_songs, song
+
+
+class TFoldedText(TestCase):
+
+    def setUp(self):
+        config.init()
+        self.library = SongLibrary()
+        self.library.use_folded_text = True
+        self.songs = make_songs()
+        self.library.add(self.songs)
+
+    def tearDown(self):
+        self.library.destroy()
+        config.quit()
+
+    def assertQueriesMatch(self):
+        for text in QUERIES:
+            query = Query(text)
+            expected = [s for s in self.library.values() if query.search(s)]
+            self.assertEqual(query.filter(self.library), expected, msg=text)
+
+    def test_same_results(self):
+        self.assertQueriesMatch()
+        self.library.use_tag_index = True
+        self.assertQueriesMatch()
+
+    def test_lookup(self):
+        folded = self.library.folded_text
+        self.assertEqual(folded.lookup("artist", ["bjork"]), {self.songs[0]})
+        self.assertEqual(folded.lookup("artist", ["lemmy", "motor"]),
+                         {self.songs[3]})
+        self.assertEqual(folded.lookup("artist", ["lemmy", "bjork"]), set())
+        self.assertEqual(folded.lookup("artist", []), set(self.songs))
+        self.assertIsNone(folded.lookup("~lyrics", ["bjork"]))
+        self.assertEqual(folded.tags, ["artist"])
+
+    def test_ordered(self):
+        folded = self.library.folded_text
+        songs = list(self.library.values())
+        self.assertEqual(folded.ordered(set(songs)), songs)
+        self.assertEqual(folded.ordered({songs[2], songs[0]}),
+                         [songs[0], songs[2]])
+
+    def test_cached(self):
+        folded = self.library.folded_text
+        Query("bjork").filter(self.library)
+        self.assertEqual(sorted(folded.memory_usage()),
+                         ["album", "artist", "title"])
+        column = folded._columns["artist"]
+        self.assertEqual(column.values[self.songs[0]], "bjork")
+        self.assertEqual(column.values[self.songs[3]], "motorhead\nlemmy")
+
+    def test_updates(self):
+        self.assertQueriesMatch()
+        new = song(7, artist="Black Sabbath", title="Paranoid")
+        self.library.add([new])
+        self.assertQueriesMatch()
+        self.songs[0]["title"] = "Black Jóga"
+        self.library.changed([self.songs[0]])
+        self.assertQueriesMatch()
+        self.library.remove([self.songs[1], new])
+        self.assertQueriesMatch()
+
+    def test_same_query_changed(self):
+        query = Query("paranoid")
+        self.assertEqual(query.filter(self.library), [])
+        self.songs[0]["title"] = "Paranoid"
+        self.library.changed([self.songs[0]])
+        self.assertEqual(query.filter(self.library), [self.songs[0]])
+
+    def test_batched_signals(self):
+        self.library.batch_signals = True
+        self.assertQueriesMatch()
+        self.songs[0]["title"] = "Black Jóga"
+        self.library.changed([self.songs[0]])
+        self.assertQueriesMatch()
+
+    def test_disabled(self):
+        self.library.use_folded_text = False
+        self.assertIsNone(self.library.folded_text)
+        self.assertQueriesMatch()
+
+    def test_destroy(self):
+        folded = FoldedText(self.library)
+        folded.lookup("title", ["joga"])
+        folded.destroy()
+        self.assertEqual(folded.tags, [])
+        self.library.add([song(7, title="Joga")])
+        self.assertEqual(folded.tags, [])
+
+    @skip("Enable for benchmarking queries with and without folded text")
+    def test_performance(self):
+        words = ["love", "black", "night", "björk", "dream", "sun", "rain"]
+        self.library.add([song(
+            i, artist="Artist %d %s" % (i % 5000, words[i % 7]),
+            album="Album %d" % (i % 20000),
+            title="Title %d %s %s" % (i, words[i % 5], words[i % 3]))
+            for i in range(8, 200000)])
+        queries = ["black", "bjork night", "artist=dream", "artist 123",
+                   "zzz", 'title="Title 1234 sun love"']
+        for text in queries:
+            query = Query(text)
+            query.filter(self.library)
+            t = time.time()
+            folded = query.filter(self.library)
+            with_folded = time.time() - t
+            t = time.time()
+            expanded = query.filter(list(self.library.values()))
+            assert folded == expanded
+            print("%-30r %6.1f ms folded text, %6.1f ms expanded regex" % (
+                text, with_folded * 1000, (time.time() - t) * 1000))
+        for tag, size in self.library.folded_text.memory_usage().items():
+            print("%-8s %6.1f MB" % (tag, size / 1024 ** 2))
@@ -0,0 +1,176 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+import time
+from unittest import skip
+
+from quodlibet import config
+from quodlibet.library import SongLibrary
+from quodlibet.library.index import TagIndex, is_indexable
+from quodlibet.query import Query
+from tests import TestCase
+from tests.helper import make_song
+
+
+def song(num, **kwargs):
+    return make_song(num, f"/dir{num % 3}", **{"~#length": num}, **kwargs)
+
+
+def make_songs():
+    return [
+        song(0, artist="Björk", title="Jóga", album="Homogenic"),
+        song(1, artist="AC/DC", title="Back in Black", album="Back in Black"),
+        song(2, artist="Sigur Rós", title="Hoppípolla", album="Takk...",
+             genre="Post-Rock"),
+        song(3, artist="Motörhead\nLemmy", title="Ace of Spades",
+             performer="Lemmy"),
+        song(4, artist="Æon Flux", title="STRASSE", version="Live"),
+        song(5, title="untitled"),
+        song(6, artist="The Black Keys", title="Lonely Boy", album="El Camino"),
+    ]
+
+
+QUERIES = [
+    "", "black", "bLaCk", "lack", "bjork", "jo", "Sigur Ros", "ac/dc",
+    "ac dc", "dc/", "hoppipolla", "aeon", "strasse", "straße", "lemmy",
+    "!black", "&(black, keys)", "|(joga, spades)", "artist=black",
+    "artist=Black", "artist=/^the/", "artist=/b.*k/", "artist=/^mot/",
+    'title="Back in Black"', 'title="back"', "title='Back in Black'c",
+    "title=|(joga, boy)", "title=&(back, black)", "title=!black",
+    "genre=rock", "genre=post-rock", "version=live", "~people=lemmy",
+    "~title~version=live", "~filename=dir1", "~dirname=/dir2",
+    "#(length > 3)", "&(#(length > 3), black)", "|(#(length < 2), spades)",
+    "performer=lemmy", "~basename=file_4", "title=/^(a|b)/", "a b c",
+    "black !keys", "/Ó/", "ó", "-", "title=/./", 'artist=""',
+]
+
+
+class TTagIndex(TestCase):
+
+    def setUp(self):
+        config.init()
+        self.library = SongLibrary()
+        self.library.use_tag_index = True
+        self.songs = make_songs()
+        self.library.add(self.songs)
+
+    def tearDown(self):
+        self.library.destroy()
+        config.quit()
+
+    def assertQueriesMatch(self):
+        for text in QUERIES:
+            query = Query(text)
+            expected = [s for s in self.library.values() if query.search(s)]
+            self.assertEqual(query.filter(self.library), expected, msg=text)
+
+    def test_same_results(self):
+        self.assertQueriesMatch()
+
+    def test_prunes(self):
+        index = self.library.tag_index
+        self.assertEqual(Query("black").candidates(index),
+                         {self.songs[1], self.songs[6]})
+        self.assertEqual(Query("artist=black").candidates(index),
+                         {self.songs[6]})
+        self.assertEqual(Query("&(black, !keys)").candidates(index),
+                         {self.songs[1], self.songs[6]})
+        self.assertEqual(Query("nothing").candidates(index), set())
+        self.assertEqual(sorted(index.tags), ["album", "artist", "title"])
+
+    def test_not_pruned(self):
+        index = self.library.tag_index
+        self.assertIsNone(Query("!black").candidates(index))
+        self.assertIsNone(Query("artist=/^(a|b)/").candidates(index))
+        self.assertIsNone(Query("#(length > 3)").candidates(index))
+        self.assertIsNone(Query("~playlists=foo").candidates(index))
+        self.assertIsNone(Query("|(black, #(length > 3))").candidates(index))
+
+    def test_updates(self):
+        self.assertQueriesMatch()
+        new = song(7, artist="Black Sabbath", title="Paranoid")
+        self.library.add([new])
+        self.assertQueriesMatch()
+        self.songs[0]["title"] = "Black Jóga"
+        self.library.changed([self.songs[0]])
+        self.assertQueriesMatch()
+        self.library.remove([self.songs[1], new])
+        self.assertQueriesMatch()
+
+    def test_batched_signals(self):
+        self.library.batch_signals = True
+        self.assertQueriesMatch()
+        self.songs[0]["title"] = "Black Jóga"
+        self.library.changed([self.songs[0]])
+        self.assertQueriesMatch()
+
+    def test_load_resets(self):
+        index = self.library.tag_index
+        Query("black").filter(self.library)
+        self.library._load_init([song(7, artist="Black Sabbath")])
+        self.assertQueriesMatch()
+        assert len(index.lookup("artist", ["black"])) == 2
+
+    def test_order(self):
+        index = self.library.tag_index
+        songs = list(self.library.values())
+        self.assertEqual(index.ordered(set(songs)), songs)
+
+    def test_memory_usage(self):
+        index = self.library.tag_index
+        self.assertEqual(index.memory_usage(), {})
+        Query("artist=black").filter(self.library)
+        usage = index.memory_usage()
+        self.assertEqual(list(usage), ["artist"])
+        assert usage["artist"] > 0
+
+    def test_disabled(self):
+        self.library.use_tag_index = False
+        self.assertIsNone(self.library.tag_index)
+        self.assertQueriesMatch()
+
+    def test_query(self):
+        self.assertEqual(set(self.library.query("black")),
+                         {self.songs[1], self.songs[6]})
+
+    def test_destroy(self):
+        index = TagIndex(self.library)
+        index.lookup("title", ["black"])
+        index.destroy()
+        self.library.add([song(7)])
+        self.assertEqual(index.tags, [])
+
+    def test_is_indexable(self):
+        assert is_indexable("artist")
+        assert is_indexable("~people")
+        assert is_indexable("~title~version")
+        assert not is_indexable("~lyrics")
+        assert not is_indexable("~title~~lyrics")
+        assert not is_indexable("~lastplayed")
+        assert not is_indexable("~#rating")
+
+    @skip("Enable for benchmarking queries with and without the index")
+    def test_performance(self):
+        words = ["love", "black", "night", "björk", "dream", "sun", "rain"]
+        self.library.add([song(
+            i, artist="Artist %d %s" % (i % 5000, words[i % 7]),
+            album="Album %d" % (i % 20000),
+            title="Title %d %s %s" % (i, words[i % 5], words[i % 3]))
+            for i in range(8, 200000)])
+        queries = ["black", "bjork night", "artist=dream", "artist 123",
+                   'title="Title 1234 sun love"']
+        for text in queries:
+            query = Query(text)
+            query.filter(self.library)
+            t = time.time()
+            with_index = query.filter(self.library)
+            indexed = time.time() - t
+            t = time.time()
+            without = query.filter(list(self.library.values()))
+            assert with_index == without
+            print("%-30r %6.1f ms with, %6.1f ms without index" % (
+                text, indexed * 1000, (time.time() - t) * 1000))
+        for tag, size in self.library.tag_index.memory_usage().items():
+            print("%-8s %6.1f MB" % (tag, size / 1024 ** 2))
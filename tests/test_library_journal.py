@@ -0,0 +1,171 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+import os
+import shutil
+
+from quodlibet.formats import dump_audio_files
+from quodlibet.library.base import Library
+from quodlibet.library.journal import (JournalingMixin, journal_path,
+                                       snapshot_id, read_journal)
+from senf import fsnative
+from tests import TestCase, mkdtemp, run_gtk_loop
+from tests.helper import make_song
+
+
+class JournalLibrary(Library, JournalingMixin):
+    pass
+
+
+class TJournalingMixin(TestCase):
+
+    def setUp(self):
+        self.temp = mkdtemp()
+        self.filename = os.path.join(self.temp, fsnative("songs"))
+        self.library = JournalLibrary()
+        self.library.load(self.filename)
+        self.library.add([make_song(i) for i in range(10)])
+        self.library.save()
+
+    def tearDown(self):
+        self.library.destroy()
+        shutil.rmtree(self.temp)
+
+    def reloaded(self):
+        library = JournalLibrary()
+        library.load(self.filename)
+        return library
+
+    def test_first_save_is_snapshot(self):
+        assert snapshot_id(self.filename)
+        assert not os.path.exists(journal_path(self.filename))
+        assert len(self.reloaded()) == 10
+
+    def test_add_appends(self):
+        before = snapshot_id(self.filename)
+        self.library.add([make_song(10)])
+        self.library.save()
+        assert snapshot_id(self.filename) == before
+        assert len(read_journal(journal_path(self.filename), before)) == 1
+        assert len(self.reloaded()) == 11
+
+    def test_change(self):
+        first = next(iter(self.library))
+        first["title"] = "Changed"
+        self.library.changed([first])
+        self.library.save()
+        assert self.reloaded()[first.key]["title"] == "Changed"
+
+    def test_remove(self):
+        first = next(iter(self.library))
+        self.library.remove([first])
+        self.library.save()
+        library = self.reloaded()
+        assert len(library) == 9
+        assert first.key not in library
+
+    def test_rename_drops_old_key(self):
+        first = next(iter(self.library))
+        old_key = first.key
+        del self.library._contents[old_key]
+        first.sanitize(fsnative("/dir/renamed.mp3"))
+        self.library._contents[first.key] = first
+        self.library.changed([first])
+        self.library.save()
+        library = self.reloaded()
+        assert len(library) == 10
+        assert old_key not in library
+        assert fsnative("/dir/renamed.mp3") in library
+
+    def test_save_only_touches_changes(self):
+        def fail():
+            raise AssertionError("save shouldn't look at all items")
+
+        self.library._get_save_content = fail
+        items = list(self.library)
+        self.library.remove(items[:2])
+        items[2]["title"] = "Changed"
+        self.library.changed([items[2]])
+        self.library.add([make_song(10)])
+        self.library.save()
+        library = self.reloaded()
+        assert len(library) == 9
+        assert items[0].key not in library
+        assert library[items[2].key]["title"] == "Changed"
+
+    def test_remove_and_add_again(self):
+        first = next(iter(self.library))
+        self.library.remove([first])
+        self.library.add([first])
+        self.library.save()
+        assert first.key in self.reloaded()
+
+    def test_nothing_to_save(self):
+        self.library.save()
+        assert not os.path.exists(journal_path(self.filename))
+
+    def test_stale_journal_ignored(self):
+        self.library.add([make_song(10)])
+        self.library.save()
+        # e.g. an older version rewrote the snapshot
+        with open(self.filename, "wb") as h:
+            h.write(dump_audio_files([make_song(42)]))
+        library = self.reloaded()
+        assert list(library.keys()) == [fsnative("/dir/file_42.mp3")]
+        assert not os.path.exists(journal_path(self.filename))
+
+    def test_truncated_record(self):
+        self.library.add([make_song(10)])
+        self.library.save()
+        self.library.add([make_song(11)])
+        self.library.save()
+        jfilename = journal_path(self.filename)
+        with open(jfilename, "rb+") as h:
+            h.truncate(os.path.getsize(jfilename) - 3)
+        library = self.reloaded()
+        assert len(library) == 11
+        assert fsnative("/dir/file_10.mp3") in library
+
+    def test_compact(self):
+        self.library.add([make_song(10)])
+        self.library.save()
+        self.library.compact()
+        assert not os.path.exists(journal_path(self.filename))
+        assert len(self.reloaded()) == 11
+
+    def test_compact_async(self):
+        self.library.journal_compact_min = 0
+        self.library.journal_compact_ratio = 0
+        self.library.add([make_song(10)])
+        self.library.save()
+        self.library.add([make_song(11)])
+        while self.library._journal_compaction is not None:
+            run_gtk_loop()
+        self.library.save()
+        # the save above starts another one
+        while self.library._journal_compaction is not None:
+            run_gtk_loop()
+        library = self.reloaded()
+        assert len(library) == 12
+
+    def test_disabled(self):
+        self.library.use_journal = False
+        before = snapshot_id(self.filename)
+        self.library.add([make_song(10)])
+        self.library.save()
+        assert snapshot_id(self.filename) != before
+        assert not os.path.exists(journal_path(self.filename))
+        assert len(self.reloaded()) == 11
+
+    def test_migrate_existing_snapshot(self):
+        with open(self.filename, "wb") as h:
+            h.write(dump_audio_files([make_song(i) for i in range(3)]))
+        library = self.reloaded()
+        before = snapshot_id(self.filename)
+        library.add([make_song(3)])
+        library.save()
+        assert snapshot_id(self.filename) == before
+        assert len(self.reloaded()) == 4
+        library.destroy()
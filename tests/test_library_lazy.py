@@ -0,0 +1,253 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+import os
+import shutil
+import time
+from io import BytesIO
+from unittest import skip
+
+from quodlibet.formats import (AudioFile, SerializationError,
+                               dump_audio_files)
+from quodlibet.library import SongFileLibrary
+from quodlibet.library.journal import journal_path
+from quodlibet.library.lazy import (LazyItems, dump_items, is_lazy_file,
+                                    load_items)
+from senf import fsnative
+from tests import TestCase, mkdtemp
+from tests.helper import make_song
+
+
+def song(num, **kwargs):
+    tags = {"~mountpoint": fsnative("/"), "title": f"Song {num}",
+            "~#rating": 0.5, "~#track": num, "artist": "Foo\nBar"}
+    tags.update(kwargs)
+    return make_song(num, **tags)
+
+
+class TLazyItems(TestCase):
+
+    def setUp(self):
+        self.temp = mkdtemp()
+        self.filename = os.path.join(self.temp, fsnative("songs"))
+        self.songs = [song(i) for i in range(5)]
+        self.songs[1]["~#added"] = 2 ** 70
+        self.songs[2]["~filename"] = fsnative("/dir/\udcff.mp3")
+        dict.__setitem__(self.songs[3], "~pickled", ("a", 1))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp)
+
+    def load(self, items):
+        # a new file every time, loaded files are mapped
+        filename = self.filename + fsnative(str(len(os.listdir(self.temp))))
+        with open(filename, "wb") as fileobj:
+            fileobj.write(dump_items(items))
+        with open(filename, "rb") as fileobj:
+            assert is_lazy_file(fileobj)
+            assert fileobj.tell() == 0
+            return load_items(fileobj)
+
+    def test_roundtrip(self):
+        items = self.load(self.songs)
+        assert isinstance(items, LazyItems)
+        self.assertEqual(list(items), [s.key for s in self.songs])
+        self.assertEqual(items.loaded_count, 0)
+        for orig in self.songs:
+            loaded = items[orig.key]
+            assert type(loaded) is AudioFile
+            self.assertEqual(dict(loaded), dict(orig))
+            assert items[orig.key] is loaded
+        self.assertEqual(items.loaded_count, len(self.songs))
+
+    def test_get_tag(self):
+        items = self.load(self.songs)
+        key = self.songs[1].key
+        self.assertEqual(items.get_tag(key, "title"), "Song 1")
+        self.assertEqual(items.get_tag(key, "~#added"), 2 ** 70)
+        self.assertEqual(items.get_tag(key, "~#rating"), 0.5)
+        self.assertEqual(items.get_tag(key, "nope", "x"), "x")
+        assert not items.is_loaded(key)
+        items[key]["title"] = "changed"
+        self.assertEqual(items.get_tag(key, "title"), "changed")
+        self.assertRaises(KeyError, items.get_tag, "nope", "title")
+
+    def test_odd_records(self):
+        dict.__setitem__(self.songs[0], "with\0nul", "foo")
+        items = self.load(self.songs)
+        key = self.songs[0].key
+        self.assertEqual(items.get_tag(key, "with\0nul"), "foo")
+        self.assertEqual(items.get_tag(key, "title"), "Song 0")
+        self.assertEqual(dict(items[key]), dict(self.songs[0]))
+
+    def test_mutate(self):
+        items = self.load(self.songs)
+        new = song(10)
+        items[new.key] = new
+        del items[self.songs[0].key]
+        assert self.songs[0].key not in items
+        assert new.key in items
+        self.assertEqual(len(items), 5)
+        self.assertEqual(items.loaded_count, 1)
+
+    def test_entries_resave(self):
+        items = self.load(self.songs)
+        items[self.songs[0].key]["title"] = "changed"
+        entries = list(items.entries())
+        self.assertEqual(sum(isinstance(e, AudioFile) for e in entries), 1)
+        self.assertEqual([e.key for e in entries], [s.key for s in self.songs])
+        resaved = self.load(entries)
+        self.assertEqual(resaved[self.songs[0].key]["title"], "changed")
+        for orig in self.songs[1:]:
+            self.assertEqual(dict(resaved[orig.key]), dict(orig))
+
+    def test_mountpoints(self):
+        self.songs[0]["~mountpoint"] = fsnative("/mnt")
+        items = self.load(self.songs)
+        mounts = items.mountpoints()
+        self.assertEqual(mounts[fsnative("/mnt")], [self.songs[0].key])
+        self.assertEqual(len(mounts[fsnative("/")]), 4)
+        self.assertEqual(items.loaded_count, 0)
+
+    def test_unknown_class(self):
+        FakeFile = type("FakeFile", (AudioFile,), {})
+        FakeFile.__qualname__ = "DoesNotExist"
+        items = self.load([FakeFile(self.songs[0])] + self.songs[1:])
+        self.assertEqual(len(items), 4)
+        self.assertRaises(SerializationError,
+                          self.load, [FakeFile(self.songs[0])])
+
+    def test_invalid(self):
+        data = dump_items(self.songs)
+        for broken in [data[:-10], data[:20], b"QLL1"]:
+            with open(self.filename, "wb") as fileobj:
+                fileobj.write(broken)
+            with open(self.filename, "rb") as fileobj:
+                self.assertRaises(SerializationError, load_items, fileobj)
+
+    def test_is_lazy_file(self):
+        assert not is_lazy_file(BytesIO(dump_audio_files(self.songs)))
+        assert not is_lazy_file(BytesIO(b""))
+
+
+class TLazyLibrary(TestCase):
+
+    def setUp(self):
+        self.temp = mkdtemp()
+        self.filename = os.path.join(self.temp, fsnative("songs"))
+        library = SongFileLibrary()
+        library.lazy_load = True
+        library.load(self.filename)
+        library.add([song(i) for i in range(10)])
+        library.save()
+        library.destroy()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp)
+
+    def reloaded(self, lazy=True):
+        library = SongFileLibrary()
+        library.lazy_load = lazy
+        library.load(self.filename)
+        self.addCleanup(library.destroy)
+        return library
+
+    def test_lazy(self):
+        library = self.reloaded()
+        assert isinstance(library._contents, LazyItems)
+        self.assertEqual(len(library), 10)
+        self.assertEqual(library._contents.loaded_count, 0)
+        self.assertEqual(library.tag_values("artist"), {"Foo", "Bar"})
+        self.assertEqual(library._contents.loaded_count, 0)
+        self.assertEqual(library[fsnative("/dir/file_3.mp3")]["title"],
+                         "Song 3")
+        self.assertEqual(library._contents.loaded_count, 1)
+
+    def test_tag_memory_usage(self):
+        library = self.reloaded()
+        self.assertEqual(library.tag_memory_usage(), {})
+        library[fsnative("/dir/file_3.mp3")]
+        assert library.tag_memory_usage()["title"] > 0
+        list(library.values())
+        self.assertEqual(len(library.tag_memory_usage()), 6)
+
+    def test_masked(self):
+        library = self.reloaded()
+        library.add([song(10, **{"~mountpoint": fsnative("/nope/mnt")})])
+        library.compact()
+        library = self.reloaded()
+        self.assertEqual(len(library), 10)
+        self.assertEqual(library.masked_mount_points, [fsnative("/nope/mnt")])
+        self.assertEqual(library._contents.loaded_count, 0)
+        self.assertEqual(len(library.get_content()), 11)
+
+    def test_journal(self):
+        library = self.reloaded()
+        first = library[fsnative("/dir/file_0.mp3")]
+        first["title"] = "Changed"
+        library.changed([first])
+        library.remove([library[fsnative("/dir/file_1.mp3")]])
+        library.add([song(10)])
+        library.save()
+        assert os.path.exists(journal_path(self.filename))
+
+        library = self.reloaded()
+        self.assertEqual(len(library), 10)
+        self.assertEqual(library._contents.loaded_count, 2)
+        self.assertEqual(library[first.key]["title"], "Changed")
+
+        library.compact()
+        assert not os.path.exists(journal_path(self.filename))
+        library = self.reloaded()
+        self.assertEqual(library[first.key]["title"], "Changed")
+        self.assertEqual(library._contents.loaded_count, 1)
+
+    def test_journal_rename(self):
+        library = self.reloaded()
+        first = library[fsnative("/dir/file_0.mp3")]
+        del library._contents[first.key]
+        first.sanitize(fsnative("/dir/renamed.mp3"))
+        library._contents[first.key] = first
+        library.changed([first])
+        library.save()
+        self.assertEqual(library._contents.loaded_count, 1)
+
+        library = self.reloaded()
+        self.assertEqual(len(library), 10)
+        assert fsnative("/dir/renamed.mp3") in library
+        assert fsnative("/dir/file_0.mp3") not in library
+
+    def test_switch_format(self):
+        library = self.reloaded(lazy=False)
+        library.add([song(10)])
+        library.save()
+        assert not os.path.exists(journal_path(self.filename))
+        with open(self.filename, "rb") as fileobj:
+            assert not is_lazy_file(fileobj)
+
+        library = self.reloaded()
+        assert not isinstance(library._contents, LazyItems)
+        self.assertEqual(len(library), 11)
+        library.save()
+        library = self.reloaded()
+        assert isinstance(library._contents, LazyItems)
+        self.assertEqual(len(library), 11)
+
+    @skip("Enable for benchmarking loading the library file")
+    def test_performance(self):
+        songs = [song(i, album=f"Album {i // 10}", genre="Rock",
+                      date="2000", **{"~#length": i, "~#added": i})
+                 for i in range(100000)]
+        for lazy in [False, True]:
+            library = self.reloaded(lazy)
+            library.add(songs)
+            library.compact()
+            t = time.time()
+            library = self.reloaded(lazy)
+            loaded = time.time() - t
+            t = time.time()
+            library.tag_values("album")
+            print("lazy=%-5s %6.1f ms to load, %6.1f ms for all albums" % (
+                lazy, loaded * 1000, (time.time() - t) * 1000))
@@ -96,6 +96,22 @@ class TLibrarian(TestCase):
         self.assertEqual(self.changed_1, self.Frange(6, 12))
         self.assertEqual(self.changed_2, self.Frange(12, 18))
 
+    def test_changed_batched(self):
+        emitted = []
+        self.librarian.connect("changed", lambda lib, items: emitted.append(1))
+        for obj in [self.librarian, self.lib1, self.lib2]:
+            obj.batch_signals = True
+        self.lib1.add(self.Frange(12))
+        self.lib2.add(self.Frange(12, 24))
+        run_gtk_loop()
+        self.librarian.changed(self.Frange(6, 18))
+        self.librarian.changed(self.Frange(8, 20))
+        self.assertEqual(self.changed, [])
+        run_gtk_loop()
+        self.assertEqual(sorted(self.changed), self.Frange(6, 20))
+        self.assertEqual(sorted(self.changed_1), self.Frange(6, 12))
+        self.assertEqual(len(emitted), 1)
+
     def test___getitem__(self):
         self.lib1.add(self.Frange(12))
         self.lib2.add(self.Frange(12, 24))
@@ -235,6 +235,86 @@ class TLibrary(TestCase):
         self.library.destroy()
 
 
+class TBatchedSignals(TestCase):
+
+    def setUp(self):
+        self.library = Library()
+        self.library.batch_signals = True
+        self.signals = []
+        for name in ["added", "changed", "removed"]:
+            self.library.connect(name, self.__signal, name)
+
+    def __signal(self, library, items, name):
+        self.signals.append((name, set(items)))
+
+    def tearDown(self):
+        self.library.destroy()
+
+    def test_merged(self):
+        songs = Frange(10)
+        self.library.add(songs[:5])
+        self.library.add(songs[5:])
+        self.library.changed(songs[:3])
+        self.library.changed(songs[2:4])
+        self.assertEqual(self.signals, [])
+        run_gtk_loop()
+        self.assertEqual(self.signals, [("added", set(songs))])
+
+        del self.signals[:]
+        self.library.changed(songs[:3])
+        self.library.remove(songs[2:4])
+        self.library.changed(songs[4:6])
+        self.library.add(songs[3:4])
+        self.library.remove(songs[8:])
+        self.library.flush_signals()
+        self.assertEqual(self.signals, [
+            ("changed", {songs[0], songs[1], songs[4], songs[5]}),
+            ("removed", set(songs[2:4])),
+            ("added", {songs[3]}),
+            ("removed", set(songs[8:])),
+        ])
+        self.assertEqual(set(self.library), set(songs[:8]) - {songs[2]})
+
+    def test_added_and_removed(self):
+        songs = Frange(3)
+        self.library.add(songs)
+        self.library.remove(songs[:2])
+        self.library.flush_signals()
+        self.assertEqual(self.signals, [("added", {songs[2]})])
+
+    def test_emitted_by_handler(self):
+        songs = Frange(3)
+
+        def on_added(library, items):
+            if songs[0] in items:
+                library.changed(songs)
+
+        self.library.connect("added", on_added)
+        self.library.add(songs[:1])
+        self.library.add(songs[1:])
+        self.library.flush_signals()
+        self.assertEqual(self.signals, [("added", set(songs)),
+                                        ("changed", set(songs))])
+        self.library.add(Frange(3, 4))
+        self.library.remove(songs[:1])
+        self.library.flush_signals()
+        self.assertEqual(self.signals[-1], ("removed", {songs[0]}))
+
+    def test_synchronous(self):
+        self.library.batch_signals = False
+        songs = Frange(2)
+        self.library.add(songs[:1])
+        self.library.add(songs[1:])
+        self.assertEqual(self.signals, [("added", {songs[0]}),
+                                        ("added", {songs[1]})])
+
+    def test_destroy(self):
+        self.library.add(Frange(2))
+        self.library.destroy()
+        run_gtk_loop()
+        self.assertEqual(self.signals, [])
+
+
 class FakeAudioFile(AudioFile):
 
     def __init__(self, key):
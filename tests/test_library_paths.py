@@ -0,0 +1,108 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+import os
+
+from quodlibet.formats import AudioFile
+from quodlibet.library import SongFileLibrary
+from quodlibet.library.paths import PathIndex
+from senf import fsnative
+from tests import TestCase
+
+
+def song(*parts):
+    return AudioFile({"~filename": fsnative(os.path.join(os.sep, *parts)),
+                      "~mountpoint": fsnative(os.sep)})
+
+
+def keys(*paths):
+    return [os.path.join(os.sep, *path.split("/")) for path in paths]
+
+
+class TPathIndex(TestCase):
+
+    def setUp(self):
+        self.library = SongFileLibrary()
+        self.songs = [
+            song("music", "a", "1.mp3"),
+            song("music", "a", "2.mp3"),
+            song("music", "a b", "1.mp3"),
+            song("music", "ab", "1.mp3"),
+            song("music", "a", "sub", "1.mp3"),
+            song("other", "1.mp3"),
+        ]
+        self.library.add(self.songs)
+        self.index = self.library.path_index
+
+    def tearDown(self):
+        self.library.destroy()
+
+    def below(self, *parts):
+        return self.index.keys_below(os.path.join(os.sep, *parts))
+
+    def test_below(self):
+        self.assertEqual(self.below("music", "a"),
+                         keys("music/a/1.mp3", "music/a/2.mp3",
+                              "music/a/sub/1.mp3"))
+        self.assertEqual(self.below("music", "ab"), keys("music/ab/1.mp3"))
+        self.assertEqual(len(self.below("music")), 5)
+        self.assertEqual(len(self.below()), 6)
+        self.assertEqual(self.below("music", "a", "1.mp3"), [])
+        self.assertEqual(self.below("nothing"), [])
+
+    def test_items(self):
+        self.assertEqual(
+            self.index.items_below(os.path.join(os.sep, "other")),
+            [self.songs[-1]])
+
+    def test_signals(self):
+        self.below()
+        new = song("music", "a", "3.mp3")
+        self.library.add([new])
+        self.library.remove(self.songs[:1])
+        self.assertEqual(self.below("music", "a"),
+                         keys("music/a/2.mp3", "music/a/3.mp3",
+                              "music/a/sub/1.mp3"))
+
+    def test_rebuild(self):
+        self.below()
+        self.index.MAX_PENDING = 1
+        self.library.add([song("music", "a", "3.mp3"),
+                          song("music", "a", "4.mp3")])
+        self.assertEqual(len(self.below("music", "a")), 5)
+        self.assertEqual(len(self.index), 8)
+
+    def test_moved(self):
+        self.below()
+        moved = self.songs[0]
+        self.library.move_song(
+            moved, fsnative(os.path.join(os.sep, "other", "moved.mp3")))
+        self.assertEqual(self.below("other"),
+                         keys("other/1.mp3", "other/moved.mp3"))
+        self.assertEqual(self.below("music", "a"),
+                         keys("music/a/2.mp3", "music/a/sub/1.mp3"))
+
+    def test_changed_key(self):
+        self.below()
+        renamed = self.songs[0]
+        contents = self.library._contents
+        del contents[renamed.key]
+        renamed.sanitize(fsnative(os.path.join(os.sep, "other", "r.mp3")))
+        contents[renamed.key] = renamed
+        self.library.changed([renamed])
+        self.assertEqual(self.below("other"), keys("other/1.mp3", "other/r.mp3"))
+        self.assertEqual(len(self.below("music", "a")), 2)
+
+    def test_load_resets(self):
+        self.below()
+        self.library._load_init([song("new", "1.mp3")])
+        self.assertEqual(self.below("new"), keys("new/1.mp3"))
+
+    def test_destroy(self):
+        index = PathIndex(self.library)
+        index.keys_below(os.sep)
+        index.destroy()
+        self.library.add([song("new", "1.mp3")])
+        self.assertIsNone(index._keys)
@@ -3,11 +3,13 @@
 # the Free Software Foundation; either version 2 of the License, or
 # (at your option) any later version.
 import os
+import shutil
+from unittest import mock
 
 from quodlibet import config
 from quodlibet.formats import AudioFileError
 from quodlibet.library import SongLibrary, SongFileLibrary
-from tests import get_data_path, run_gtk_loop
+from tests import get_data_path, run_gtk_loop, mkdtemp
 from tests.helper import get_temp_copy, capture_output
 from tests.test_library_libraries import (TLibrary, FakeSong, FSrange, FakeSongFile,
                                           FSFrange)
@@ -147,6 +149,84 @@ class TSongFileLibrary(TSongLibrary):
         finally:
             config.quit()
 
+    def test_scan_parallel(self):
+        temp_dir = mkdtemp()
+        try:
+            for i in range(5):
+                shutil.copy(get_data_path("empty.flac"),
+                            os.path.join(temp_dir, f"{i}.flac"))
+            self.library.scan_workers = 2
+            self.library.scan_batch_size = 2
+            for _ in self.library.scan([temp_dir]):
+                pass
+            assert len(self.library) == 5
+            assert {s("~basename") for s in self.added} == \
+                {f"{i}.flac" for i in range(5)}
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def _scan_copies(self, num):
+        temp_dir = mkdtemp()
+        for i in range(num):
+            shutil.copy(get_data_path("empty.flac"),
+                        os.path.join(temp_dir, f"{i}.flac"))
+        for _ in self.library.scan([temp_dir]):
+            pass
+        return temp_dir
+
+    def _rebuild(self, **kwargs):
+        self.changed.clear()
+        self.removed.clear()
+        for _ in self.library.rebuild([], **kwargs):
+            pass
+
+    def test_rebuild_by_dir(self):
+        temp_dir = self._scan_copies(3)
+        try:
+            self._rebuild()
+            assert not self.changed and not self.removed
+
+            changed = os.path.join(temp_dir, "0.flac")
+            os.utime(changed, (0, 1000))
+            os.unlink(os.path.join(temp_dir, "1.flac"))
+            self._rebuild()
+            assert [s("~filename") for s in self.changed] == [changed]
+            assert [s("~basename") for s in self.removed] == ["1.flac"]
+            assert len(self.library) == 2
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_rebuild_quick_skips_unchanged_dirs(self):
+        temp_dir = self._scan_copies(2)
+        try:
+            self._rebuild(quick=True)
+            dir_stat = os.stat(temp_dir)
+            changed = os.path.join(temp_dir, "0.flac")
+            os.utime(changed, (0, 1000))
+            os.utime(temp_dir, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+            self._rebuild(quick=True)
+            assert not self.changed
+
+            self._rebuild()
+            assert [s("~filename") for s in self.changed] == [changed]
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_rebuild_normcased_keys(self):
+        temp_dir = mkdtemp()
+        try:
+            filename = os.path.join(temp_dir, "Mixed Case.flac")
+            shutil.copy(get_data_path("empty.flac"), filename)
+            for _ in self.library.scan([temp_dir]):
+                pass
+            song = self.library.get_filename(filename)
+            # Like on Windows, where keys get lower cased by normalize_path
+            with mock.patch("os.path.normcase", str.lower):
+                items = {"mixed case.flac": song}
+                assert self.library._outdated_in_dir(temp_dir, items) == []
+        finally:
+            shutil.rmtree(temp_dir)
+
     def test_contains_filename(self):
         filename = self.__get_file()
         try:
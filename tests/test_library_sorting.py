@@ -0,0 +1,220 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+import bisect
+import random
+import time
+from unittest import skip
+
+from quodlibet.formats import AudioFile
+from quodlibet.library import SongLibrary
+from quodlibet.library.sorting import SortKeys, merge_blocks, sort_order
+from quodlibet.util import human_sort_key as human
+from tests import TestCase
+from tests.helper import make_song
+
+
+def make_songs(count):
+    rand = random.Random(42)
+    return [make_song(i, artist=f"Artist {rand.randrange(count // 20 + 1)}",
+                      album=f"Album {rand.randrange(count // 10 + 1)}",
+                      title=f"Title {rand.randrange(count)}",
+                      date=str(rand.randrange(1960, 2020)),
+                      **{"~#rating": rand.randrange(5) / 4.0,
+                         "~#track": i % 12})
+            for i in range(count)]
+
+
+def multi_pass_order(items, keys):
+    # what sorting once per key does, least significant key first
+    order = list(range(len(items)))
+    for key, reverse in reversed(keys):
+        order.sort(key=lambda i: key(items[i]), reverse=reverse)
+    return order
+
+
+COMBINATIONS = [
+    ["album"],
+    ["artist", "album", "title"],
+    ["~#rating", "artist"],
+    ["date", "album", "~#track"],
+    ["title", "~#rating", "artist"],
+]
+
+
+class TSortOrder(TestCase):
+
+    def test_empty(self):
+        self.assertEqual(sort_order([], [(human, False)]), [])
+        self.assertEqual(sort_order(["b", "a"], []), [0, 1])
+
+    def test_single(self):
+        items = ["b", "a", "c", "a"]
+        self.assertEqual(sort_order(items, [(str, False)]), [1, 3, 0, 2])
+        self.assertEqual(sort_order(items, [(str, True)]), [2, 0, 1, 3])
+
+    def test_same_as_multi_pass(self):
+        songs = make_songs(300)
+        for tags in COMBINATIONS:
+            for directions in range(2 ** len(tags)):
+                keys = [(AudioFile.sort_by_func(tag), bool(directions >> i & 1))
+                        for i, tag in enumerate(tags)]
+                self.assertEqual(sort_order(songs, keys),
+                                 multi_pass_order(songs, keys),
+                                 msg=(tags, directions))
+
+    def test_calls_keys_once(self):
+        calls = []
+
+        def key(item):
+            calls.append(item)
+            return item
+
+        items = list(range(50, 0, -1))
+        sort_order(items, [(key, False), (key, True)])
+        self.assertEqual(len(calls), 2 * len(items))
+
+
+class TMergeBlocks(TestCase):
+
+    def merged(self, items, new_items, keys):
+        items = list(items)
+        inserted = 0
+        for position, block in merge_blocks(
+                len(items), items.__getitem__, new_items, keys):
+            items[position + inserted:position + inserted] = block
+            inserted += len(block)
+        return items
+
+    def test_empty(self):
+        self.assertEqual(merge_blocks(0, None, [], [(str, False)]), [])
+        self.assertEqual(merge_blocks(0, None, ["a", "b"], [(str, False)]),
+                         [(0, ["a", "b"])])
+
+    def test_blocks(self):
+        items = ["a", "c", "e"]
+        self.assertEqual(
+            merge_blocks(3, items.__getitem__, ["f", "b", "d", "b2", "a"],
+                         [(lambda s: s[0], False)]),
+            [(1, ["a", "b", "b2"]), (2, ["d"]), (3, ["f"])])
+
+    def test_after_equal(self):
+        items = [1, 2, 2, 3]
+        new = [2.0]
+        self.assertEqual(merge_blocks(4, items.__getitem__, new,
+                                      [(int, False)]), [(3, [2.0])])
+        self.assertEqual(merge_blocks(4, items[::-1].__getitem__, new,
+                                      [(int, True)]), [(3, [2.0])])
+
+    def test_same_as_insertion(self):
+        songs = make_songs(100)
+        for tags in COMBINATIONS:
+            for reverse in [False, True]:
+                keys = [(AudioFile.sort_by_func(tag), reverse ^ (i == 1))
+                        for i, tag in enumerate(tags)]
+                existing = [songs[i]
+                            for i in sort_order(songs[:60], keys)]
+                expected = list(existing)
+                for song in songs[60:]:
+                    # what inserting them one by one did: after all songs
+                    # the new one doesn't sort before
+                    position = bisect.bisect_right(
+                        [sort_order([s, song], keys) == [1, 0]
+                         for s in expected], False)
+                    expected.insert(position, song)
+                self.assertEqual(self.merged(existing, songs[60:], keys),
+                                 expected, msg=(tags, reverse))
+
+
+class TSortKeys(TestCase):
+
+    def setUp(self):
+        self.library = SongLibrary()
+        self.library.use_sort_keys = True
+        self.songs = make_songs(20)
+        self.library.add(self.songs)
+
+    def tearDown(self):
+        self.library.destroy()
+
+    def test_cached(self):
+        keys = self.library.sort_keys
+        key = keys.key_func("title")
+        first = self.songs[0]
+        value = key(first)
+        self.assertEqual(value, human(first("title")))
+        assert key(first) is value
+        assert keys.key_func("title")(first) is value
+        self.assertEqual(list(keys.memory_usage()), ["title"])
+
+    def test_changed(self):
+        key = self.library.sort_keys.key_func("title")
+        first = self.songs[0]
+        key(first)
+        first["title"] = "Changed"
+        self.library.changed([first])
+        self.assertEqual(key(first), human("Changed"))
+
+    def test_batched(self):
+        self.library.batch_signals = True
+        keys = self.library.sort_keys
+        first = self.songs[0]
+        keys.key_func("title")(first)
+        first["title"] = "Changed"
+        self.library.changed([first])
+        self.assertEqual(keys.key_func("title")(first), human("Changed"))
+
+    def test_removed(self):
+        keys = self.library.sort_keys
+        key = keys.key_func("title")
+        first = self.songs[0]
+        key(first)
+        self.library.remove([first])
+        assert first not in keys._tags["title"]
+
+    def test_not_in_library(self):
+        keys = self.library.sort_keys
+        other = make_song(100, title="Other")
+        self.assertEqual(keys.key_func("title")(other), human("Other"))
+        assert other not in keys._tags["title"]
+
+    def test_not_cached(self):
+        keys = self.library.sort_keys
+        for tag in ["~#rating", "~filename", "~lastplayed", "artistsort"]:
+            keys.key_func(tag)(self.songs[0])
+        self.assertEqual(keys.memory_usage(), {})
+
+    def test_disabled(self):
+        self.library.use_sort_keys = False
+        self.assertIsNone(self.library.sort_keys)
+
+    def test_destroy(self):
+        keys = SortKeys(self.library)
+        keys.key_func("title")(self.songs[0])
+        keys.destroy()
+        self.assertEqual(keys.memory_usage(), {})
+
+    @skip("Enable for benchmarking sorting by several columns")
+    def test_performance(self):
+        songs = make_songs(150000)
+        self.library.add(songs)
+        sort_keys = self.library.sort_keys
+        for tags in COMBINATIONS:
+            reference = [(AudioFile.sort_by_func(tag), i % 2 == 1)
+                         for i, tag in enumerate(tags)]
+            t = time.time()
+            expected = multi_pass_order(songs, reference)
+            passes = time.time() - t
+            t = time.time()
+            self.assertEqual(sort_order(songs, reference), expected)
+            once = time.time() - t
+            cached = [(sort_keys.key_func(tag), r) for tag, (k, r) in
+                      zip(tags, reference, strict=True)]
+            sort_order(songs, cached)
+            t = time.time()
+            self.assertEqual(sort_order(songs, cached), expected)
+            print("%-26s %6.0f ms per key, %6.0f ms once, %6.0f ms cached" % (
+                ",".join(tags), passes * 1000, once * 1000,
+                (time.time() - t) * 1000))
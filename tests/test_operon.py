@@ -5,13 +5,15 @@
 # the Free Software Foundation; either version 2 of the License, or
 # (at your option) any later version.
 
+import io
 import os
+import shutil
 import sys
 
 from quodlibet.util import is_osx, is_windows
 from senf import fsnative, path2fsn
 
-from tests import TestCase, get_data_path, mkstemp, skipIf
+from tests import TestCase, get_data_path, mkdtemp, mkstemp, skipIf
 from .helper import capture_output, get_temp_copy
 
 from quodlibet import config
@@ -695,3 +697,97 @@ class TOperonFill(TOperonBase):
 
         self.assertTrue("title" in o)
         self.assertTrue(self.s("~basename") in o)
+
+
+class TOperonBatch(TOperonBase):
+    # [--jobs=<n>] [--recursive] [--files-from=<file>] <command> [<args>]
+
+    def setUp(self):
+        super().setUp()
+        self.dir = mkdtemp()
+        self.paths = []
+        for i in range(12):
+            sub = os.path.join(self.dir, "sub%d" % (i % 3))
+            os.makedirs(sub, exist_ok=True)
+            path = os.path.join(sub, "%02d.ogg" % i)
+            shutil.copy(self.f, path)
+            song = MusicFile(path)
+            song["title"] = "Title %d" % i
+            song.write()
+            self.paths.append(path)
+        self.paths.sort()
+        with open(os.path.join(self.dir, "cover.txt"), "w") as h:
+            h.write("not a song")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        super().tearDown()
+
+    def titles(self, paths):
+        return [MusicFile(path)("title") for path in paths]
+
+    def test_help(self):
+        o, e = self.check_true(["--help"], True, False)
+        self.assertTrue("--jobs" in o)
+        self.check_false(["--jobs", "x", "help"], False, True)
+
+    def test_jobs_ordered_output(self):
+        o, e = self.check_true(
+            ["-j", "4", "print", "-p", "<title>"] + self.paths, True, False)
+        self.assertEqual(o.splitlines(), self.titles(self.paths))
+
+    def test_recursive(self):
+        self.check_true(
+            ["--recursive", "--jobs=3", "set", "genre", "Batch", self.dir],
+            False, False)
+        self.assertEqual([MusicFile(p)("genre") for p in self.paths],
+                         ["Batch"] * len(self.paths))
+
+        o, e = self.check_true(
+            ["-r", "print", "-p", "<title>", self.dir], True, False)
+        self.assertEqual(o.splitlines(), self.titles(self.paths))
+
+    def test_files_from(self):
+        fd, list_path = mkstemp()
+        os.write(fd, b"\n".join(map(os.fsencode, self.paths[:5])) + b"\n")
+        os.close(fd)
+        try:
+            self.check_true(
+                ["--files-from", list_path, "add", "mood", "calm"],
+                False, False)
+        finally:
+            os.unlink(list_path)
+        self.assertEqual([MusicFile(p)("mood") for p in self.paths],
+                         ["calm"] * 5 + [""] * 7)
+
+    def test_files_from_stdin(self):
+        data = b"\n".join(map(os.fsencode, self.paths[3:6]))
+        old_stdin = sys.stdin
+        sys.stdin = io.TextIOWrapper(io.BytesIO(data))
+        try:
+            o, e = self.check_true(
+                ["--files-from=-", "-j", "2", "print", "-p", "<title>",
+                 self.paths[0]], True, False)
+        finally:
+            sys.stdin = old_stdin
+        self.assertEqual(o.splitlines(),
+                         self.titles(self.paths[:1] + self.paths[3:6]))
+
+    def test_errors(self):
+        paths = [self.paths[0], self.f3, self.paths[1]]
+        o, e = self.check_false(
+            ["-j", "2", "set", "genre", "Batch"] + paths, False, True)
+        # Failing files don't stop the others
+        self.assertEqual(MusicFile(self.paths[0])("genre"), "Batch")
+        self.assertEqual(MusicFile(self.paths[1])("genre"), "Batch")
+        lines = e.splitlines()
+        self.assertTrue(any(line.startswith(self.f3) for line in lines))
+        self.assertFalse(any(line.startswith(self.paths[0]) for line in lines))
+        self.assertTrue("1 of 3" in lines[-1])
+
+    def test_errors_serial(self):
+        # Without batch options the first error stops the command
+        # before anything gets written
+        paths = [self.paths[0], self.f3]
+        self.check_false(["set", "genre", "Batch"] + paths, False, True)
+        self.assertEqual(MusicFile(self.paths[0])("genre"), "Silence")
@@ -5,9 +5,11 @@
 
 from collections import defaultdict
 
+from gi.repository import Gtk
+
 from quodlibet.formats import AudioFile
 from quodlibet.order import OrderInOrder
-from quodlibet.order.reorder import OrderWeighted, OrderShuffle
+from quodlibet.order.reorder import OrderWeighted, OrderShuffle, _WeightTree
 from quodlibet.order.repeat import OneSong
 from quodlibet.qltk.songmodel import PlaylistModel
 from tests import TestCase
@@ -35,6 +37,26 @@ class TOrderWeighted(TestCase):
         self.assertTrue(scores[r2] > scores[r1])
         self.assertTrue(scores[r3] > scores[r2])
 
+    def test_all_zero(self):
+        pl = PlaylistModel()
+        pl.set([r0, r0, r0])
+        pl.order = order = OrderWeighted()
+        cur = None
+        for _i in range(3):
+            cur = order.next_explicit(pl, cur)
+            self.assertTrue(cur is not None)
+        self.assertEqual(order.next_explicit(pl, cur), None)
+
+    def test_rating_changed(self):
+        pl = PlaylistModel()
+        pl.set([AudioFile({"~#rating": 0}), r0])
+        pl.order = order = OrderWeighted()
+        order.next_explicit(pl, None)
+        pl[0][0]["~#rating"] = 1.0
+        pl.row_changed(Gtk.TreePath((0,)), pl.get_iter((0,)))
+        for _i in range(10):
+            self.assertEqual(pl.get_path(order.next_explicit(pl, None))[0], 0)
+
 
 class TOrderShuffle(TestCase):
 
@@ -51,6 +73,57 @@ class TOrderShuffle(TestCase):
         cur = order.next_explicit(pl, cur)
         self.assertEqual(len(order.remaining(pl)), len(songs))
 
+    def test_appended(self):
+        pl = PlaylistModel()
+        pl.set([r0, r1])
+        pl.order = order = OrderShuffle()
+        cur = order.next_explicit(pl, None)
+        played = [pl.get_value(cur)]
+        pl.append([r2])
+        pl.append([r3])
+        while True:
+            cur = order.next_explicit(pl, cur)
+            if cur is None:
+                break
+            played.append(pl.get_value(cur))
+        self.assertEqual(sorted(map(id, played)),
+                         sorted(map(id, [r0, r1, r2, r3])))
+
+    def test_previous_is_remaining(self):
+        pl = PlaylistModel()
+        pl.set([r0, r1, r2])
+        pl.order = order = OrderShuffle()
+        first = order.next_explicit(pl, None)
+        second = order.next_explicit(pl, first)
+        self.assertEqual(len(order.remaining(pl)), 2)
+        self.assertEqual(pl.get_path(order.previous_explicit(pl, second)),
+                         pl.get_path(first))
+        self.assertEqual(len(order.remaining(pl)), 3)
+
+
+class TWeightTree(TestCase):
+
+    def test_find(self):
+        tree = _WeightTree([2, 0, 1, 3])
+        self.assertEqual(tree.total, 6)
+        self.assertEqual([tree.find(v) for v in range(6)], [0, 0, 2, 3, 3, 3])
+
+    def test_update(self):
+        weights = [1, 0, 4, 2, 0]
+        tree = _WeightTree(weights[:2])
+        for weight in weights[2:]:
+            tree.append(weight)
+        tree[2] = 1
+        weights[2] = 1
+        self.assertEqual(tree.total, sum(weights))
+        found = [tree.find(v) for v in range(tree.total)]
+        expected = [i for i, w in enumerate(weights) for _ in range(w)]
+        self.assertEqual(found, expected)
+
+    def test_choice(self):
+        self.assertEqual(_WeightTree([0, 0]).choice(), None)
+        self.assertEqual(_WeightTree([0, 5, 0]).choice(), 1)
+
 
 class TOrderOneSong(TestCase):
 
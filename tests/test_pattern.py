@@ -6,9 +6,12 @@
 
 import os
 
+from quodlibet import config
 from quodlibet.formats import AudioFile
+from quodlibet.library import SongLibrary
 from quodlibet.pattern import (FileFromPattern, XMLFromPattern, Pattern,
-                               XMLFromMarkupPattern, ArbitraryExtensionFileFromPattern)
+                               XMLFromMarkupPattern, ArbitraryExtensionFileFromPattern,
+                               format_many, format_cache)
 from senf import fsnative
 from tests import TestCase
 
@@ -604,3 +607,91 @@ class TPatternFormatList(_TPattern):
     def test_string(self):
         pat = Pattern("display")
         self.assertEqual(pat.format_list(self.a), {("display", "display")})
+
+
+class TFormatMany(_TPattern):
+
+    def setUp(self):
+        super().setUp()
+        config.init()
+        self.songs = [self.a, self.b, self.h]
+        self.library = SongLibrary()
+        self.library.add(self.songs)
+
+    def tearDown(self):
+        format_cache.detach()
+        self.library.destroy()
+        config.quit()
+
+    def assertSameAsFormat(self):
+        patterns = [Pattern("<artist> - <title>"),
+                    XMLFromPattern("<xmltest|<~#track>|none>"),
+                    FileFromPattern("/<artist>/<title>")]
+        self.assertEqual(
+            format_many(patterns, self.songs),
+            [tuple(p.format(s) for p in patterns) for s in self.songs])
+        pattern = Pattern("<artist> <album>")
+        self.assertEqual(pattern.format_many(self.songs),
+                         [pattern.format(s) for s in self.songs])
+        self.assertEqual(pattern.format_list_many(self.songs),
+                         [pattern.format_list(s) for s in self.songs])
+
+    def test_uncached(self):
+        self.assertSameAsFormat()
+        self.assertEqual(len(format_cache), 0)
+
+    def test_cached(self):
+        format_cache.attach(self.library)
+        self.assertSameAsFormat()
+        self.assertEqual(len(format_cache), 3)
+        self.assertSameAsFormat()
+
+    def test_changed(self):
+        format_cache.attach(self.library)
+        pattern = Pattern("<title>")
+        self.assertEqual(pattern.format_many([self.a]), ["Title5"])
+        self.a["title"] = "Other"
+        self.assertEqual(pattern.format_many([self.a]), ["Title5"])
+        self.library.changed([self.a])
+        self.assertEqual(pattern.format_many([self.a]), ["Other"])
+        self.library.remove([self.a])
+        self.assertEqual(len(format_cache), 0)
+
+    def test_volatile(self):
+        format_cache.attach(self.library)
+        # Only used in a condition, so not part of Pattern.tags
+        pattern = Pattern("<title> <~playlists|listed|unlisted>")
+        self.assertEqual(pattern.format_many([self.a]), ["Title5 unlisted"])
+        self.assertEqual(len(format_cache._songs[self.a]), 0)
+        pattern = Pattern("<~lastplayed>")
+        before = pattern.format_many([self.a])
+        self.a["~#lastplayed"] = 1000000000
+        self.assertEqual(pattern.format_many([self.a]),
+                         [pattern.format(self.a)])
+        self.assertNotEqual(pattern.format_many([self.a]), before)
+
+    def test_settings_changed(self):
+        format_cache.attach(self.library)
+        pattern = Pattern("<~rating>")
+        before = pattern.format_many([self.a])
+        config.RATINGS.full_symbol = "+"
+        self.assertEqual(pattern.format_many([self.a]),
+                         [pattern.format(self.a)])
+        self.assertNotEqual(pattern.format_many([self.a]), before)
+
+    def test_max_size(self):
+        format_cache.attach(self.library)
+        format_cache.max_size = 2
+        try:
+            Pattern("<title>").format_many(self.songs)
+            self.assertEqual(len(format_cache), 2)
+            self.assertEqual(list(format_cache._songs), self.songs[1:])
+        finally:
+            format_cache.max_size = 10000
+
+    def test_detach(self):
+        format_cache.attach(self.library)
+        Pattern("<title>").format_many(self.songs)
+        format_cache.detach()
+        self.assertEqual(len(format_cache), 0)
+        self.assertFalse(format_cache.enabled)
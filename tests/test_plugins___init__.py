@@ -3,14 +3,17 @@
 # the Free Software Foundation; either version 2 of the License, or
 # (at your option) any later version.
 
-from tests import TestCase, mkstemp
+from tests import TestCase, mkstemp, mkdtemp
 
 import os
+import shutil
+import sys
 
 from quodlibet import config
 from quodlibet.formats import AudioFile
 from quodlibet.util.songwrapper import SongWrapper, list_wrapper
-from quodlibet.plugins import PluginConfig
+from quodlibet.plugins import PluginConfig, PluginManager, \
+    PluginConfigMixin, PluginHandler
 
 
 class TSongWrapper(TestCase):
@@ -162,3 +165,68 @@ class TPluginConfig(TestCase):
         c = PluginConfig("some")
         c.defaults.set("hm", "mh")
         self.assertEqual(c.get("hm"), "mh")
+
+
+class MixinHandler(PluginHandler):
+
+    def __init__(self):
+        self.enabled = []
+
+    def plugin_handle(self, plugin):
+        return plugin.is_subclass(PluginConfigMixin)
+
+    def plugin_enable(self, plugin):
+        self.enabled.append(plugin.cls)
+
+    def plugin_disable(self, plugin):
+        self.enabled.remove(plugin.cls)
+
+
+class TPluginManifest(TestCase):
+
+    def setUp(self):
+        config.init()
+        self.folder = mkdtemp()
+        self.manifest = os.path.join(mkdtemp(), "plugins.json")
+        for name in ["qlmixinplugin", "qlotherplugin"]:
+            base = "PluginConfigMixin" if name == "qlmixinplugin" else "object"
+            with open(os.path.join(self.folder, name + ".py"), "w") as h:
+                h.write("from quodlibet.plugins import PluginConfigMixin\n"
+                        f"class Plugin({base}):\n"
+                        f"    PLUGIN_ID = {name!r}\n"
+                        "    PLUGIN_DESC = 'Description'\n"
+                        "    PLUGIN_TAGS = 'Tag'\n")
+
+    def tearDown(self):
+        for name in ["qlmixinplugin", "qlotherplugin"]:
+            sys.modules.pop("quodlibet.fake.plugins." + name, None)
+        shutil.rmtree(self.folder)
+        shutil.rmtree(os.path.dirname(self.manifest))
+        config.quit()
+
+    def scan(self):
+        for name in ["qlmixinplugin", "qlotherplugin"]:
+            sys.modules.pop("quodlibet.fake.plugins." + name, None)
+        pm = PluginManager([self.folder], self.manifest)
+        handler = MixinHandler()
+        pm.register_handler(handler)
+        pm.rescan()
+        self.addCleanup(pm.quit)
+        return pm, handler
+
+    def test_not_imported(self):
+        self.scan()
+        pm, handler = self.scan()
+        assert "quodlibet.fake.plugins.qlmixinplugin" not in sys.modules
+        self.assertEqual(len(pm.plugins), 1)
+        plugin = pm.plugins[0]
+        self.assertEqual(plugin.id, "qlmixinplugin")
+        self.assertEqual(plugin.name, "qlmixinplugin")
+        self.assertEqual(plugin.description, "Description")
+        self.assertEqual(plugin.tags, ["Tag"])
+        assert plugin.can_enable
+
+        pm.enable(plugin, True)
+        assert "quodlibet.fake.plugins.qlmixinplugin" in sys.modules
+        self.assertEqual(handler.enabled, [plugin.cls])
+        assert "quodlibet.fake.plugins.qlotherplugin" not in sys.modules
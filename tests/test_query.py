@@ -246,6 +246,33 @@ class TQuery(TestCase):
         not_val_time = (time.time() - t1)
         assert ineq_time == pytest.approx(not_val_time, abs=0.1)
 
+    @skip("Enable for benchmarking compiled against interpreted queries")
+    def test_compiled_filter_performance(self):
+        genres = ["Rock", "Jazz", "Electrónica", "Pop", "Classical"]
+        songs = [AudioFile({
+            "artist": "Artist %d" % (i % 5000),
+            "album": "Album %d" % (i % 20000),
+            "title": "Title %d" % i,
+            "genre": genres[i % len(genres)],
+            "~filename": fsnative("/music/%d/%d.ogg" % (i % 20000, i)),
+            "~#rating": (i % 5) / 4,
+            "~#added": 1500000000 + i,
+        }) for i in range(200000)]
+        queries = ["album 123", "electronica", "&(genre=rock, #(rating > 0.5))",
+                   "|(artist=/^Artist 1/, title=!title)",
+                   "~dirname=music/1", "#(added < 3 days)"]
+        for text in queries:
+            query = Query(text)
+            t = time.time()
+            expected = query._match.filter(songs)
+            interpreted = time.time() - t
+            t = time.time()
+            actual = query.filter(songs)
+            compiled = time.time() - t
+            assert actual == expected
+            print("%-40s interpreted %.3fs compiled %.3fs (%.1fx)"
+                  % (text, interpreted, compiled, interpreted / compiled))
+
     def test_repr(self):
         query = Query("foo = bar", [])
         r = repr(query).replace("u'", "'")
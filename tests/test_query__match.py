@@ -4,11 +4,14 @@
 # (at your option) any later version.
 
 import pytest
+from quodlibet import config
 from quodlibet.formats import AudioFile
 from quodlibet.query._match import NumexprNow, numexprTagOrSpecial, Inter, True_, Neg
 from quodlibet.query._match import numexprUnit, ParseError, NumexprTag, Numcmp
 from quodlibet.util import parse_date
+from quodlibet.query import Query
 from quodlibet.util.collection import Collection
+from senf import fsnative
 from tests import TestCase
 
 
@@ -29,6 +32,57 @@ class TQueryInter(TestCase):
         assert q.filter([1]) == []
 
 
+class TQueryCompile(TestCase):
+
+    SONGS = [
+        AudioFile({"artist": "piman", "album": "Tests", "title": "Quuxly",
+                   "~filename": fsnative("/dir1/foobar.ogg"), "~#rating": 0.75,
+                   "~#playcount": 4, "date": "2007-05-24", "~#added": 0}),
+        AudioFile({"artist": "mu\npiman", "title": "Ångström",
+                   "~filename": fsnative("/dir2/\xf6\xe4\xfc.mp3"),
+                   "~mountpoint": fsnative("/dir2")}),
+        AudioFile({"title": "", "~title": "fallback", "filename": "tag",
+                   "~filename": fsnative("/x/y.flac")}),
+        Collection(),
+    ]
+
+    QUERIES = [
+        "", "piman", "!piman", "angstrom", "quux rock",
+        "artist=piman", "artist=!piman", "title=/^q/c", "title=fallback",
+        "filename=tag", "filename=foobar", "mountpoint=dir2",
+        "~filename=/dir1", "~people=mu", "~dirname=dir2",
+        "&(artist=piman, title=quux)", "|(artist=mu, album=tests)",
+        "!&(artist=piman, title=quux)", "artist=|(mu, nobody)",
+        "artist=&(pi, man)", "artist,title=!ngs",
+        "#(rating > 0.5)", "#(rating <= 0.5)", "#(playcount = 4)",
+        "#(playcount != 4)", "#(added > 3 days)", "#(date > 2005)",
+        "#(playcount + 1 = 5)", "#(rating:avg > 0.1)",
+    ]
+
+    def setUp(self):
+        config.init()
+
+    def tearDown(self):
+        config.quit()
+
+    def test_same_as_search(self):
+        for text in self.QUERIES:
+            match = Query(text)._match
+            compiled = match.compile()
+            for song in self.SONGS:
+                assert compiled(song) == match.search(song), (text, song)
+
+    def test_query_uses_compiled(self):
+        query = Query("artist=piman")
+        assert query.search is not query._match.search
+        assert query.filter(self.SONGS) == self.SONGS[:2]
+
+    def test_not_compiled(self):
+        query = Query("artist=piman")
+        query.compiled = False
+        assert query.search == query._match.search
+
+
 class TQueryMatch(TestCase):
 
     def test_numexpr_unit(self):
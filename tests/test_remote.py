@@ -12,7 +12,7 @@ import pytest
 from gi.repository import GLib, Gio
 from senf import fsn2bytes, bytes2fsn
 
-from . import TestCase, skipIf
+from . import TestCase, skipIf, run_gtk_loop
 from .helper import temp_filename
 
 import quodlibet
@@ -53,6 +53,16 @@ class TUnixRemote(TestCase):
             with open(fn, "rb") as h:
                 self.assertEqual(h.read(), b"resp")
 
+    def test_streamed_response(self):
+        with temp_filename() as fn:
+            chunks = [bytes2fsn(b, None) for b in [b"a\n", b"", b"b\n"]]
+            mock = Mock(resp=iter(chunks))
+            remote = QuodLibetUnixRemote(None, mock)
+            remote._callback(b"\x00foo\x00" + fsn2bytes(fn, None) + b"\x00")
+            run_gtk_loop()
+            with open(fn, "rb") as h:
+                self.assertEqual(h.read(), b"a\nb\n")
+
 
 @skipIf(is_windows(), "unix only")
 class TUnixRemoteFifoFullCycle(TestCase):
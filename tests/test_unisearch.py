@@ -10,8 +10,9 @@ import unicodedata
 
 from tests import TestCase
 
-from quodlibet.unisearch import compile
+from quodlibet.unisearch import compile, compile_regex
 from quodlibet.unisearch.db import diacritic_for_letters
+from quodlibet.unisearch.fold import fold, fold_words
 from quodlibet.unisearch.parser import re_replace_literals, re_add_variants
 
 
@@ -184,3 +185,25 @@ class TCompileMatch(TestCase):
 
         with self.assertRaises(ValueError):
             compile("(F", asym=True)
+
+
+class TFold(TestCase):
+
+    def test_fold(self):
+        assert fold("Björk") == "bjork"
+        assert fold("STRASSE") == fold("straße")
+        assert fold("Æon") == "aeon"
+        assert fold("o\u0308") == "o"
+        assert fold("İstanbul") == "istanbul"
+
+    def test_fold_words(self):
+        assert fold_words("AC/DC – Live!") == ["ac", "dc", "live"]
+        assert fold_words("") == []
+
+    def test_literal_matches_are_contained(self):
+        text = "".join(chr(i) for i in range(1, 0x800))
+        for literal in "abcdefghijklmnopqrstuvwxyzAEIOU0123456789":
+            for asym in (False, True):
+                reg = compile_regex(literal, True, False, asym)
+                for char in reg.findall(unicodedata.normalize("NFC", text)):
+                    assert fold(char) == fold(literal), (literal, char)
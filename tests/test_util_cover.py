@@ -7,7 +7,10 @@
 import glob
 import os
 import shutil
+import threading
+import time
 from os.path import basename
+from unittest import mock
 
 from gi.repository import Gio
 
@@ -20,8 +23,9 @@ from quodlibet.plugins import Plugin
 from quodlibet.util.cover.http import escape_query_value
 from quodlibet.util.cover.manager import CoverManager
 from quodlibet.util.path import normalize_path, path_equal, mkdir
+from quodlibet.util.thread import Cancellable
 
-from tests import TestCase, mkdtemp
+from tests import TestCase, mkdtemp, run_gtk_loop
 
 
 bar_2_1 = AudioFile({
@@ -237,6 +241,95 @@ class TCoverManager(TestCase):
         self.manager.search_cover(Gio.Cancellable(), album_songs)
 
 
+class TCoverManagerAsync(TestCase):
+
+    def setUp(self):
+        self.manager = CoverManager(use_built_in=False)
+        self.release = threading.Event()
+        self.lookups = []
+        self.manager.get_cover_many = self.get_cover_many
+        patcher = mock.patch(
+            "quodlibet.util.cover.manager.get_thumbnail_from_file",
+            lambda fileobj, size: (fileobj, size))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.release.set)
+        self.results = []
+
+    def get_cover_many(self, songs):
+        self.lookups.append(threading.current_thread())
+        self.release.wait(5)
+        name = songs[0]("album")
+        return None if name == "none" else name
+
+    def song(self, num, album="album"):
+        return AudioFile({"~filename": fsnative(f"/dir/{num}.ogg"),
+                          "album": album})
+
+    def request(self, songs, cancel=None, size=10):
+        self.manager.get_pixbuf_many_async(
+            songs, size, size, cancel, self.results.append)
+
+    def wait(self):
+        self.release.set()
+        deadline = time.time() + 5
+        while self.manager._requests and time.time() < deadline:
+            run_gtk_loop()
+            time.sleep(0.01)
+        run_gtk_loop()
+        assert not self.manager._requests
+
+    def test_in_thread(self):
+        self.request([self.song(1)])
+        self.wait()
+        self.assertEqual(self.results, [("album", (10, 10))])
+        assert self.lookups[0] is not threading.current_thread()
+
+    def test_coalesced(self):
+        songs = [self.song(1), self.song(2)]
+        self.request(songs)
+        self.request(songs[::-1])
+        self.request(songs, size=20)
+        self.wait()
+        self.assertEqual(len(self.lookups), 2)
+        self.assertEqual(sorted(self.results), [
+            ("album", (10, 10)), ("album", (10, 10)), ("album", (20, 20))])
+
+    def test_cancel(self):
+        cancel = Cancellable()
+        self.request([self.song(1)], cancel)
+        self.request([self.song(1)])
+        cancel.cancel()
+        self.wait()
+        self.assertEqual(len(self.results), 1)
+
+    def test_cancel_queued(self):
+        self.manager.max_resolving = 1
+        cancel = Cancellable()
+        self.request([self.song(1)])
+        self.request([self.song(2)], cancel)
+        self.assertEqual(len(self.manager._queue), 1)
+        cancel.cancel()
+        self.wait()
+        self.assertEqual(len(self.lookups), 1)
+        self.assertEqual(len(self.results), 1)
+
+    def test_bounded(self):
+        self.manager.max_resolving = 2
+        for i in range(5):
+            self.request([self.song(i, album=f"album {i}")])
+        self.assertEqual(self.manager._resolving, 2)
+        self.assertEqual(len(self.manager._queue), 3)
+        self.wait()
+        self.assertEqual(len(self.results), 5)
+        self.assertEqual(self.manager._resolving, 0)
+
+    def test_not_found(self):
+        self.request([self.song(1, album="none")])
+        self.wait()
+        self.assertEqual(self.results, [])
+
+
 class THttp(TestCase):
 
     def test_escape(self):
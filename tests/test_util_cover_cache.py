@@ -0,0 +1,302 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+import os
+import shutil
+import time
+from unittest import mock
+
+from quodlibet import config
+from quodlibet.formats import AudioFile
+from quodlibet.util.cover.built_in import EmbeddedCover, FilesystemCover
+from quodlibet.util.cover.cache import CoverCache, PixbufCache
+from quodlibet.util.cover.manager import CoverManager
+from quodlibet.util.path import path_equal
+from quodlibet.util.thread import Cancellable
+from tests import TestCase, mkdtemp, run_gtk_loop
+
+
+class TCoverCache(TestCase):
+
+    def setUp(self):
+        config.init()
+        self.dir = mkdtemp()
+        self.filename = os.path.join(self.dir, "cache", "covers.json")
+        self.cache = CoverCache(self.filename, max_size=3)
+        self.album = os.path.join(self.dir, "album")
+        os.mkdir(self.album)
+        self.cover = os.path.join(self.album, "cover.jpg")
+        open(self.cover, "wb").close()
+        self.song = self.make_song(self.album)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        config.quit()
+
+    def make_song(self, dirname, album="Album"):
+        return AudioFile({"~filename": os.path.join(dirname, "song.ogg"),
+                          "album": album})
+
+    def test_lookup(self):
+        self.assertEqual(self.cache.lookup(FilesystemCover, self.song),
+                         (False, None))
+        self.cache.store(FilesystemCover, self.song, self.cover)
+        self.assertEqual(self.cache.lookup(FilesystemCover, self.song),
+                         (True, self.cover))
+        self.assertEqual(self.cache.lookup(EmbeddedCover, self.song),
+                         (False, None))
+        other = self.make_song(self.album, "Other")
+        self.assertEqual(self.cache.lookup(FilesystemCover, other),
+                         (False, None))
+
+    def test_negative(self):
+        self.cache.store(FilesystemCover, self.song, None)
+        self.assertEqual(self.cache.lookup(FilesystemCover, self.song),
+                         (True, None))
+
+    def test_directory_changed(self):
+        self.cache.store(FilesystemCover, self.song, None)
+        stat = os.stat(self.album)
+        os.utime(self.album, (stat.st_atime, stat.st_mtime + 10))
+        self.assertEqual(self.cache.lookup(FilesystemCover, self.song),
+                         (False, None))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_cover_subdir_changed(self):
+        subdir = os.path.join(self.album, "Covers")
+        os.mkdir(subdir)
+        self.cache.store(FilesystemCover, self.song, None)
+        self.assertEqual(self.cache.lookup(FilesystemCover, self.song),
+                         (True, None))
+        open(os.path.join(subdir, "front.jpg"), "wb").close()
+        stat = os.stat(subdir)
+        os.utime(subdir, (stat.st_atime, stat.st_mtime + 10))
+        self.assertEqual(self.cache.lookup(FilesystemCover, self.song),
+                         (False, None))
+
+    def test_config_changed(self):
+        self.cache.store(FilesystemCover, self.song, None)
+        config.set("albumart", "force_filename", True)
+        config.set("albumart", "filename", "cover.jpg")
+        self.assertEqual(self.cache.lookup(FilesystemCover, self.song),
+                         (False, None))
+        config.set("albumart", "force_filename", False)
+        self.assertEqual(self.cache.lookup(FilesystemCover, self.song),
+                         (True, None))
+
+    def test_cover_removed(self):
+        self.cache.store(FilesystemCover, self.song, self.cover)
+        stat = os.stat(self.album)
+        os.remove(self.cover)
+        os.utime(self.album, (stat.st_atime, stat.st_mtime))
+        self.assertEqual(self.cache.lookup(FilesystemCover, self.song),
+                         (False, None))
+
+    def test_lru(self):
+        songs = [self.make_song(self.album, str(i)) for i in range(4)]
+        for song in songs[:3]:
+            self.cache.store(FilesystemCover, song, None)
+        self.cache.lookup(FilesystemCover, songs[0])
+        self.cache.store(FilesystemCover, songs[3], None)
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.cache.lookup(FilesystemCover, songs[1]),
+                         (False, None))
+        self.assertEqual(self.cache.lookup(FilesystemCover, songs[0]),
+                         (True, None))
+
+    def test_invalidate(self):
+        other_dir = os.path.join(self.dir, "other")
+        os.mkdir(other_dir)
+        other = self.make_song(other_dir)
+        self.cache.store(FilesystemCover, self.song, None)
+        self.cache.store(FilesystemCover, other, None)
+        self.cache.invalidate([self.song])
+        self.assertEqual(len(self.cache), 1)
+        self.cache.invalidate()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_save_load(self):
+        self.cache.store(FilesystemCover, self.song, self.cover)
+        self.cache.save()
+        cache = CoverCache(self.filename)
+        cache.load()
+        self.assertEqual(cache.lookup(FilesystemCover, self.song),
+                         (True, self.cover))
+
+    def test_load_broken(self):
+        os.mkdir(os.path.dirname(self.filename))
+        with open(self.filename, "w") as fileobj:
+            fileobj.write("[[1]]")
+        self.cache.load()
+        self.assertEqual(len(self.cache), 0)
+
+
+class TCoverManagerCache(TestCase):
+
+    def setUp(self):
+        config.init()
+        self.dir = mkdtemp()
+        self.manager = CoverManager()
+        self.manager.load_cache(os.path.join(self.dir, "covers.json"), 100)
+        self.song = AudioFile({"~filename": os.path.join(self.dir, "s.ogg"),
+                               "album": "Album"})
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        config.quit()
+
+    def test_cached(self):
+        self.assertIsNone(self.manager.get_cover(self.song))
+        self.assertEqual(self.manager.cache.lookup(FilesystemCover, self.song),
+                         (True, None))
+
+        # new files change the directory, so the cache doesn't hide them
+        cover = os.path.join(self.dir, "folder.jpg")
+        open(cover, "wb").close()
+        stat = os.stat(self.dir)
+        os.utime(self.dir, (stat.st_atime, stat.st_mtime + 10))
+        with self.manager.get_cover(self.song) as fileobj:
+            assert path_equal(fileobj.name, cover)
+        with self.manager.get_cover(self.song) as fileobj:
+            assert path_equal(fileobj.name, cover)
+
+    def test_cover_changed(self):
+        self.manager.get_cover(self.song)
+        self.manager.cover_changed([self.song])
+        self.assertEqual(len(self.manager.cache), 0)
+
+
+class FakePixbuf:
+
+    def __init__(self, name, size=1000):
+        self.name = name
+        self.size = size
+
+    def get_byte_length(self):
+        return self.size
+
+
+def pixbuf_key(*song_keys):
+    return frozenset(song_keys), 10, 10
+
+
+class TPixbufCache(TestCase):
+
+    def setUp(self):
+        self.cache = PixbufCache(3 * (1000 + PixbufCache.ENTRY_SIZE))
+
+    def test_lookup(self):
+        key = pixbuf_key("a")
+        self.assertEqual(self.cache.lookup(key), (False, None))
+        pixbuf = FakePixbuf("a")
+        self.cache.store(key, pixbuf)
+        self.assertEqual(self.cache.lookup(key), (True, pixbuf))
+        self.cache.store(pixbuf_key("b"), None)
+        self.assertEqual(self.cache.lookup(pixbuf_key("b")), (True, None))
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+    def test_lru(self):
+        keys = [pixbuf_key(str(i)) for i in range(4)]
+        for key in keys[:3]:
+            self.cache.store(key, FakePixbuf(key))
+        self.cache.lookup(keys[0])
+        self.cache.store(keys[3], FakePixbuf(keys[3]))
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.cache.size, self.cache.max_bytes)
+        self.assertEqual(self.cache.lookup(keys[1]), (False, None))
+        assert self.cache.lookup(keys[0])[0]
+
+    def test_too_large(self):
+        self.cache.store(pixbuf_key("a"), FakePixbuf("a", 10 ** 6))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.size, 0)
+
+    def test_replace(self):
+        key = pixbuf_key("a")
+        self.cache.store(key, FakePixbuf("a"))
+        self.cache.store(key, None)
+        self.assertEqual(self.cache.size, PixbufCache.ENTRY_SIZE)
+
+    def test_invalidate(self):
+        self.cache.store(pixbuf_key("a", "b"), None)
+        self.cache.store(pixbuf_key("c"), None)
+        self.cache.invalidate(["b"])
+        self.assertEqual(self.cache.lookup(pixbuf_key("a", "b")),
+                         (False, None))
+        self.assertEqual(len(self.cache), 1)
+        self.cache.invalidate()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.size, 0)
+
+
+class TCoverManagerPixbufCache(TestCase):
+
+    def setUp(self):
+        self.manager = CoverManager(use_built_in=False)
+        self.manager.enable_pixbuf_cache(10 ** 6)
+        self.lookups = []
+        self.manager.get_cover_many = self.get_cover_many
+        patcher = mock.patch(
+            "quodlibet.util.cover.manager.get_thumbnail_from_file",
+            lambda fileobj, size: FakePixbuf(fileobj))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.song = AudioFile({"~filename": "/dir/song.ogg", "album": "a"})
+        self.results = []
+
+    def get_cover_many(self, songs):
+        self.lookups.append(songs)
+        name = songs[0]("album")
+        return None if name == "none" else name
+
+    def request(self, cancel=None):
+        self.manager.get_pixbuf_many_async(
+            [self.song], 10, 10, cancel, self.results.append)
+
+    def wait(self):
+        deadline = time.time() + 5
+        while self.manager._requests and time.time() < deadline:
+            run_gtk_loop()
+            time.sleep(0.01)
+        run_gtk_loop()
+
+    def test_cached(self):
+        self.request()
+        self.wait()
+        self.request()
+        self.assertEqual(len(self.results), 2)
+        assert self.results[0] is self.results[1]
+        self.assertEqual(len(self.lookups), 1)
+        self.assertEqual(self.manager.pixbufs.hits, 1)
+
+    def test_cancelled(self):
+        self.request()
+        self.wait()
+        cancel = Cancellable()
+        cancel.cancel()
+        self.request(cancel)
+        self.assertEqual(len(self.results), 1)
+
+    def test_not_found(self):
+        self.song["album"] = "none"
+        self.request()
+        self.wait()
+        self.request()
+        self.assertEqual(self.results, [])
+        self.assertEqual(len(self.lookups), 1)
+
+    def test_cover_changed(self):
+        self.request()
+        self.wait()
+        self.manager.cover_changed([self.song])
+        self.request()
+        self.wait()
+        self.assertEqual(len(self.lookups), 2)
+
+    def test_changed_while_resolving(self):
+        self.request()
+        self.manager.cover_changed([self.song])
+        self.wait()
+        self.assertEqual(len(self.manager.pixbufs), 0)
@@ -8,7 +8,7 @@ import importlib
 import sys
 import shutil
 
-from quodlibet.util.modulescanner import ModuleScanner
+from quodlibet.util.modulescanner import ModuleScanner, ModuleManifest
 from quodlibet.util.importhelper import get_importables, load_dir_modules
 
 from tests import TestCase, mkdtemp
@@ -144,3 +144,67 @@ class TModuleScanner(TestCase):
         self.assertEqual(added, ["somepkg"])
         self.assertEqual(s.modules["somepkg"].module.main, 321)
         self.assertEqual(s.modules["somepkg"].module.test, 123)
+
+
+class TModuleManifest(TestCase):
+
+    def setUp(self):
+        self.d = mkdtemp("ql-mod")
+        self.filename = os.path.join(mkdtemp("ql-manifest"), "modules.json")
+        self.path = os.path.join(self.d, "qlmanifest.py")
+        with open(self.path, "wb") as h:
+            h.write(b"value = 42\n")
+        self.fullname = "quodlibet.fake.plugins.qlmanifest"
+
+    def tearDown(self):
+        sys.modules.pop(self.fullname, None)
+        shutil.rmtree(self.d)
+        shutil.rmtree(os.path.dirname(self.filename))
+
+    def scan(self, key=""):
+        # forget the import of the previous scan
+        sys.modules.pop(self.fullname, None)
+        manifest = ModuleManifest(self.filename, lambda m: m.value, key)
+        self.scanner = ModuleScanner([self.d], manifest)
+        removed, added = self.scanner.rescan()
+        self.assertEqual(added, ["qlmanifest"])
+        return self.scanner.modules["qlmanifest"]
+
+    def test_lazy(self):
+        module = self.scan()
+        assert module.loaded
+        self.assertEqual(module.info, 42)
+
+        module = self.scan()
+        assert not module.loaded
+        self.assertEqual(module.info, 42)
+        assert self.fullname not in sys.modules
+        self.assertEqual(module.module.value, 42)
+        assert module.loaded
+
+    def test_changed(self):
+        self.scan()
+        stat = os.stat(self.path)
+        os.utime(self.path, (stat.st_atime, stat.st_mtime + 10))
+        assert self.scan().loaded
+        assert not self.scan().loaded
+
+    def test_key_changed(self):
+        self.scan("1")
+        assert self.scan("2").loaded
+        assert not self.scan("2").loaded
+
+    def test_import_failed(self):
+        self.scan()
+        # broken without the modification time changing
+        stat = os.stat(self.path)
+        with open(self.path, "wb") as h:
+            h.write(b"1syntaxerror\n")
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        module = self.scan()
+        with self.assertRaises(SyntaxError):
+            module.module  # noqa
+        assert "qlmanifest" in self.scanner.failures
+        manifest = ModuleManifest(self.filename, None)
+        manifest.load()
+        self.assertEqual(len(manifest), 0)